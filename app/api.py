@@ -1,25 +1,64 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Dict, Optional
+import math
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
 from google.genai import types
 from fastapi import APIRouter, HTTPException
-from google.adk.runners import InMemoryRunner
+from fastapi.responses import StreamingResponse
+from google.adk.runners import Runner
 from google.adk.utils.context_utils import Aclosing
 
-from nl2sql.agent import root_agent
-from nl2sql.tools.sql.run_sql import run_sql as run_sql_tool
+from nl2sql.agents.llm_gateway import (
+    BACKGROUND,
+    INTERACTIVE,
+    LlmAdmissionError,
+    gate_snapshots,
+    llm_request_scope,
+)
+from nl2sql.agents.router import STRONG, classify_question, model_tier_scope
+from nl2sql.results import NDJSON_MEDIA_TYPE, encode_json
+from nl2sql.config import load_config
+from nl2sql.tools.agentic.agentic_utils import summarize_turn
+from nl2sql.tools.sql.schema_tools import cached_schema_state, load_schema_state
+from nl2sql.tools.sql.shared_results import SharedResults, shared_sql_results
+from nl2sql.utils import metrics
+from nl2sql.utils.query_log import QueryTrace, current_query_trace, query_trace
 
-from .schemas import AskRequest, RunSqlRequest
+from .conversations import get_conversation_store, new_session_id
+from .jobs import Job, JobManager, JobQueueFull
+from .responses import ResultJSONResponse
+from .schemas import AskBatchRequest, AskRequest
+from .session_service import BoundedSessionService, SessionBudgetError
+from .sql_api import METRICS_SECTIONS
 
 router = APIRouter()
-_RUNNER = InMemoryRunner(agent=root_agent, app_name="nl2sql")
+_CONFIG = load_config()
+_SESSIONS = BoundedSessionService(
+    max_bytes=_CONFIG.session_memory_budget_bytes,
+    ttl_seconds=_CONFIG.session_ttl_seconds,
+)
+_APP_NAME = "nl2sql"
 _DEFAULT_USER_ID = "local-user"
+_RUNNER: Optional[Runner] = None
 
-class _SimpleToolContext:
-    def __init__(self) -> None:
-        self.state: Dict[str, Any] = {}
+
+def _get_runner() -> Runner:
+    """Build the root agent (and every sub-agent and model) on first use."""
+    global _RUNNER
+    if _RUNNER is None:
+        from nl2sql.agent import root_agent
+
+        _RUNNER = Runner(agent=root_agent, app_name=_APP_NAME, session_service=_SESSIONS)
+    return _RUNNER
+
+
+def warm_up_agents() -> Dict[str, str]:
+    """Build the root agent and its models before the first question (a warm-up step)."""
+    return {"agent": _get_runner().agent.name}
 
 
 def _coerce_to_dict(payload: Any) -> Optional[Dict[str, Any]]:
@@ -57,59 +96,296 @@ def _normalize_final_response(state: Dict[str, Any], response: Any) -> Dict[str,
     return payload
 
 
-async def _run_root_agent(question: str) -> Dict[str, Any]:
-    session = await _RUNNER.session_service.create_session(
-        app_name=_RUNNER.app_name,
-        user_id=_DEFAULT_USER_ID,
-    )
+async def _run_root_agent(
+    question: str,
+    initial_state: Optional[Dict[str, Any]] = None,
+    on_tool_call: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    runner = _get_runner()
     content = types.Content(role="user", parts=[types.Part(text=question)])
-    async with Aclosing(
-        _RUNNER.run_async(
+    async with _SESSIONS.session(
+        app_name=runner.app_name,
+        user_id=_DEFAULT_USER_ID,
+        state=dict(initial_state or {}),
+    ) as session:
+        async with Aclosing(
+            runner.run_async(
+                user_id=session.user_id,
+                session_id=session.id,
+                new_message=content,
+            )
+        ) as agen:
+            trace = current_query_trace()
+            # Root-agent tool calls are the turn's stages; time each call to its response.
+            pending: Dict[str, tuple] = {}
+            async for event in agen:
+                if event.author != runner.agent.name:
+                    continue
+                for call in event.get_function_calls():
+                    pending[call.id] = (call.name, time.perf_counter())
+                    if on_tool_call is not None:
+                        on_tool_call(call.name)
+                for response in event.get_function_responses():
+                    started = pending.pop(response.id, None)
+                    if trace is not None and started is not None:
+                        trace.add_stage(started[0], time.perf_counter() - started[1])
+
+        updated_session = await _SESSIONS.get_session(
+            app_name=runner.app_name,
             user_id=session.user_id,
             session_id=session.id,
-            new_message=content,
         )
-    ) as agen:
-        async for _ in agen:
-            pass
-
-    updated_session = await _RUNNER.session_service.get_session(
-        app_name=_RUNNER.app_name,
-        user_id=session.user_id,
-        session_id=session.id,
-    )
-    state = updated_session.state if updated_session else {}
-    await _RUNNER.session_service.delete_session(
-        app_name=_RUNNER.app_name,
-        user_id=session.user_id,
-        session_id=session.id,
+        return updated_session.state if updated_session else {}
+
+
+def _route_question(question: str) -> str:
+    """Pick the model tier for a question; everything is STRONG unless FAST_MODEL is set."""
+    config = load_config()
+    if not config.fast_model:
+        return STRONG
+    decision = classify_question(question, config.allowed_tables, config.router_threshold)
+    metrics.increment("router_decisions", tier=decision.tier)
+    metrics.observe("router_score", decision.score)
+    return decision.tier
+
+
+async def _answer_question(
+    question: str,
+    session_id: Optional[str],
+    priority: int,
+    timeout_seconds: float,
+    on_tool_call: Optional[Callable[[str], None]] = None,
+    base_state: Optional[Dict[str, Any]] = None,
+    remember: bool = True,
+    kind: str = "ask",
+) -> Dict[str, Any]:
+    """Run one conversation turn and return the /ask payload.
+
+    With remember=False the turn is not saved as a conversation and the payload
+    has no session_id. base_state seeds the session below any carried state.
+    The turn is recorded in the query log as kind.
+    """
+    with query_trace(kind, question, session_id) as trace:
+        payload = await _answer_turn(
+            trace, question, session_id, priority, timeout_seconds, on_tool_call, base_state, remember
+        )
+        trace.sql = payload.get("sql") or None
+        trace.session_id = payload.get("session_id", session_id)
+        return payload
+
+
+async def _answer_turn(
+    trace: QueryTrace,
+    question: str,
+    session_id: Optional[str],
+    priority: int,
+    timeout_seconds: float,
+    on_tool_call: Optional[Callable[[str], None]],
+    base_state: Optional[Dict[str, Any]],
+    remember: bool,
+) -> Dict[str, Any]:
+    config = load_config()
+    deadline = time.monotonic() + timeout_seconds
+    tier = _route_question(question)
+    conversations = get_conversation_store()
+    conversation = conversations.get(session_id) if session_id else None
+    session_id = session_id or new_session_id()
+    # Each turn still runs in a fresh ADK session; only the carried state survives.
+    initial_state = dict(base_state or {})
+    if "table_schemas" not in initial_state:
+        # Schemas loaded by warm-up or an earlier turn spare a first turn the inspection.
+        initial_state.update(cached_schema_state() or {})
+    if conversation is not None:
+        initial_state.update(conversation.state)
+    metrics.increment("ask_turns", turn="follow_up" if conversation is not None else "first")
+    trace.fields.update(tier=tier, follow_up=conversation is not None)
+    with llm_request_scope(priority=priority, deadline=deadline), model_tier_scope(tier):
+        state = await _run_root_agent(question, initial_state, on_tool_call)
+
+    payload = _normalize_final_response(state, state.get("final_response"))
+    sql_result = state.get("sql_result")
+    if isinstance(sql_result, dict):
+        trace.row_count = sql_result.get("row_count")
+        if sql_result.get("result_id"):
+            payload["result_id"] = sql_result["result_id"]
+    if state.get("last_error") and not state.get("sql_run_success"):
+        trace.status = "error"
+        trace.error = str(state["last_error"])
+    if not remember:
+        return payload
+    if state.get("sql_result"):
+        state["previous_turn"] = summarize_turn(state, question, config.conversation_summary_rows)
+    conversations.save(session_id, state)
+    payload["session_id"] = session_id
+    return payload
+
+
+async def _run_job(job: Job) -> Dict[str, Any]:
+    return await _answer_question(
+        job.question,
+        job.session_id,
+        priority=BACKGROUND,
+        timeout_seconds=load_config().jobs_timeout_seconds,
+        on_tool_call=job.enter_stage,
+        kind="job",
     )
-    return state
 
 
-@router.post("/ask")
-async def ask(request: AskRequest) -> Dict[str, Any]:
+_JOBS = JobManager(
+    _run_job,
+    workers=_CONFIG.jobs_workers,
+    max_queued=_CONFIG.jobs_max_queued,
+    retention_seconds=_CONFIG.jobs_retention_seconds,
+    max_retained=_CONFIG.jobs_max_retained,
+)
+
+
+METRICS_SECTIONS.update(
+    llm_gates=gate_snapshots,
+    conversations=lambda: get_conversation_store().snapshot(),
+    sessions=_SESSIONS.snapshot,
+    jobs=_JOBS.snapshot,
+)
+
+
+async def shutdown() -> None:
+    """Stop job workers; called from the app lifespan."""
+    await _JOBS.shutdown()
+
+
+@router.post("/ask", response_class=ResultJSONResponse)
+async def ask(request: AskRequest) -> ResultJSONResponse:
     question = request.question.strip()
     if not question:
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
 
     try:
-        state = await _run_root_agent(question)
+        payload = await _answer_question(
+            question,
+            request.session_id,
+            priority=INTERACTIVE,
+            timeout_seconds=load_config().ask_timeout_seconds,
+        )
+    except LlmAdmissionError as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=f"LLM capacity exhausted: {exc}",
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        ) from exc
+    except SessionBudgetError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Agent execution failed: {exc}") from exc
+    return ResultJSONResponse(payload)
+
+
+async def _batch_item(
+    index: int,
+    question: str,
+    base_state: Dict[str, Any],
+    shared: SharedResults,
+    limiter: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    async with limiter:
+        with shared_sql_results(shared):
+            try:
+                payload = await _answer_question(
+                    question,
+                    None,
+                    priority=BACKGROUND,
+                    timeout_seconds=load_config().ask_timeout_seconds,
+                    base_state=base_state,
+                    remember=False,
+                    kind="batch",
+                )
+            except Exception as exc:
+                return {"index": index, "question": question, "status": "error", "error": str(exc)}
+    return {"index": index, "question": question, "status": "success", **payload}
+
+
+async def _stream_batch(questions: List[str], base_state: Dict[str, Any], concurrency: int) -> AsyncIterator[bytes]:
+    shared = SharedResults()
+    limiter = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.ensure_future(_batch_item(index, question, base_state, shared, limiter))
+        for index, question in enumerate(questions)
+    ]
+    failed = 0
+    try:
+        for finished in asyncio.as_completed(tasks):
+            item = await finished
+            failed += item["status"] != "success"
+            yield encode_json(item) + b"\n"
+    finally:
+        # The client went away or the stream errored: stop the remaining questions.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    summary = {
+        "questions": len(questions),
+        "failed": failed,
+        "sql_executions": shared.executions,
+        "sql_reused": shared.reused,
+    }
+    yield encode_json({"summary": summary}) + b"\n"
+
+
+@router.post("/ask/batch")
+async def ask_batch(request: AskBatchRequest) -> StreamingResponse:
+    questions = [question.strip() for question in request.questions]
+    if not questions or not all(questions):
+        raise HTTPException(status_code=400, detail="Questions cannot be empty.")
+    config = load_config()
+    if len(questions) > config.batch_max_questions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.batch_max_questions} questions per batch.",
+        )
+
+    # One schema load (or the cached one) for the whole batch; each question reuses it from state.
+    schema_result = await asyncio.to_thread(load_schema_state)
+    if schema_result.get("status") != "success":
+        raise HTTPException(status_code=500, detail=schema_result.get("error_message") or "Schema inspection failed.")
+
+    concurrency = config.batch_max_concurrency
+    if request.max_concurrency:
+        concurrency = max(1, min(request.max_concurrency, concurrency))
+    metrics.increment("batch_questions", len(questions))
+    return StreamingResponse(
+        _stream_batch(questions, dict(schema_result["state"]), concurrency),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: AskRequest) -> Dict[str, Any]:
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question cannot be empty.")
+    try:
+        job = _JOBS.submit(question, request.session_id)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"}) from exc
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_class=ResultJSONResponse)
+async def get_job(job_id: str) -> ResultJSONResponse:
+    job = _JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return ResultJSONResponse(job.to_dict())
 
-    return _normalize_final_response(state, state.get("final_response"))
 
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    job = _JOBS.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job.to_dict()
 
-@router.post("/run_sql")
-def run_sql(request: RunSqlRequest) -> Dict[str, Any]:
-    sql = request.sql.strip()
-    if not sql:
-        raise HTTPException(status_code=400, detail="SQL cannot be empty.")
 
-    tool_context = _SimpleToolContext()
-    result = run_sql_tool(sql, tool_context)
-    if result.get("status") != "success":
-        message = result.get("error_message") or "SQL run failed."
-        raise HTTPException(status_code=400, detail=message)
-    return result
+@router.delete("/conversations/{session_id}")
+def delete_conversation(session_id: str) -> Dict[str, str]:
+    get_conversation_store().discard(session_id)
+    return {"status": "deleted", "session_id": session_id}
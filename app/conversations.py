@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Union
+
+from nl2sql.config import load_config
+from nl2sql.results import encode_json
+from nl2sql.utils import metrics
+
+# State keys carried from one turn of a conversation into the next.
+CARRIED_STATE_KEYS = ("table_schemas", "allowed_tables", "previous_turn")
+
+
+@dataclass
+class Conversation:
+    session_id: str
+    state: Dict[str, Any] = field(default_factory=dict)
+    turns: int = 0
+    size_bytes: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class ConversationStore:
+    """Carry-over state per conversation, bounded by TTL, session count and total bytes.
+
+    Only the compact carried state is kept (schemas and a summary of the last
+    turn), never ADK events or full result sets. The least recently used
+    conversations are evicted first when a cap is exceeded.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_bytes: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _drop(self, session_id: str, reason: str) -> None:
+        conversation = self._conversations.pop(session_id)
+        self.total_bytes -= conversation.size_bytes
+        metrics.increment("conversations_evicted", reason=reason)
+
+    def _expire(self, now: float) -> None:
+        while self._conversations:
+            session_id, oldest = next(iter(self._conversations.items()))
+            if now - oldest.updated_at < self.ttl_seconds:
+                break
+            self._drop(session_id, "ttl")
+
+    def get(self, session_id: str) -> Optional[Conversation]:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            conversation = self._conversations.get(session_id)
+            if conversation is not None:
+                conversation.updated_at = now
+                self._conversations.move_to_end(session_id)
+            return conversation
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> Conversation:
+        carried = {key: state[key] for key in CARRIED_STATE_KEYS if state.get(key) is not None}
+        size_bytes = len(encode_json(carried))
+        now = time.monotonic()
+        with self._lock:
+            previous = self._conversations.pop(session_id, None)
+            turns = 1
+            if previous is not None:
+                self.total_bytes -= previous.size_bytes
+                turns = previous.turns + 1
+            conversation = Conversation(session_id, carried, turns, size_bytes, now)
+            self._conversations[session_id] = conversation
+            self.total_bytes += size_bytes
+            self._expire(now)
+            while len(self._conversations) > self.max_sessions or (
+                self.total_bytes > self.max_bytes and len(self._conversations) > 1
+            ):
+                self._drop(next(iter(self._conversations)), "capacity")
+        return conversation
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._conversations:
+                self._drop(session_id, "deleted")
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._conversations),
+                "bytes": self.total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SqliteConversationStore:
+    """ConversationStore with the same caps, kept in a SQLite file instead of RAM.
+
+    Conversations survive restarts and are shared by workers on one host; only
+    the conversation being answered is loaded into memory.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS conversations ("
+        "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, turns INTEGER NOT NULL, "
+        "size_bytes INTEGER NOT NULL, updated_at REAL NOT NULL)"
+    )
+
+    def __init__(self, path: str, ttl_seconds: float, max_sessions: int, max_bytes: int) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(self._SCHEMA)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS conversations_updated_at ON conversations (updated_at)"
+        )
+
+    def _expire(self, now: float) -> None:
+        expired = self._connection.execute(
+            "DELETE FROM conversations WHERE updated_at <= ?", (now - self.ttl_seconds,)
+        ).rowcount
+        if expired > 0:
+            metrics.increment("conversations_evicted", expired, reason="ttl")
+
+    def _enforce_caps(self) -> None:
+        count, total = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM conversations"
+        ).fetchone()
+        if count <= self.max_sessions and total <= self.max_bytes:
+            return
+        rows = self._connection.execute(
+            "SELECT session_id, size_bytes FROM conversations ORDER BY updated_at ASC"
+        ).fetchall()
+        doomed = []
+        for session_id, size_bytes in rows[:-1]:
+            if count <= self.max_sessions and total <= self.max_bytes:
+                break
+            doomed.append((session_id,))
+            count -= 1
+            total -= size_bytes
+        self._connection.executemany("DELETE FROM conversations WHERE session_id = ?", doomed)
+        metrics.increment("conversations_evicted", len(doomed), reason="capacity")
+
+    def get(self, session_id: str) -> Optional[Conversation]:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            row = self._connection.execute(
+                "SELECT state, turns, size_bytes FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE conversations SET updated_at = ? WHERE session_id = ?", (now, session_id)
+            )
+        state, turns, size_bytes = row
+        return Conversation(session_id, json.loads(state), turns, size_bytes, now)
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> Conversation:
+        carried = {key: state[key] for key in CARRIED_STATE_KEYS if state.get(key) is not None}
+        encoded = encode_json(carried).decode("utf-8")
+        size_bytes = len(encoded)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT turns FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            turns = row[0] + 1 if row else 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO conversations (session_id, state, turns, size_bytes, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, encoded, turns, size_bytes, now),
+            )
+            self._expire(now)
+            self._enforce_caps()
+        return Conversation(session_id, carried, turns, size_bytes, now)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            deleted = self._connection.execute(
+                "DELETE FROM conversations WHERE session_id = ?", (session_id,)
+            ).rowcount
+        if deleted > 0:
+            metrics.increment("conversations_evicted", reason="deleted")
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            count, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM conversations"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": count,
+            "bytes": total,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+_STORE: Optional[Union[ConversationStore, SqliteConversationStore]] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_conversation_store() -> Union[ConversationStore, SqliteConversationStore]:
+    """The process-wide store; CONVERSATION_BACKEND=sqlite keeps it on disk."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            config = load_config()
+            if config.conversation_backend == "sqlite":
+                _STORE = SqliteConversationStore(
+                    config.conversation_sqlite_path,
+                    ttl_seconds=config.conversation_ttl_seconds,
+                    max_sessions=config.conversation_max_sessions,
+                    max_bytes=config.conversation_max_bytes,
+                )
+            else:
+                _STORE = ConversationStore(
+                    ttl_seconds=config.conversation_ttl_seconds,
+                    max_sessions=config.conversation_max_sessions,
+                    max_bytes=config.conversation_max_bytes,
+                )
+        return _STORE
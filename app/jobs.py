@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from nl2sql.utils import metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Root agent tools in pipeline order; a job's stage is the last one called.
+STAGES = (
+    ("run_sql_task_agent_tool", "sql"),
+    ("run_plot_config_agent_tool", "plot_config"),
+    ("run_result_interpreter_agent_tool", "interpretation"),
+    ("run_output_tool", "output"),
+)
+_STAGE_NAMES = dict(STAGES)
+_STAGE_ORDER = [stage for _, stage in STAGES]
+
+JobRunner = Callable[["Job"], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """The job queue is at JOBS_MAX_QUEUED."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    question: str
+    session_id: Optional[str] = None
+    status: str = QUEUED
+    stage: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def enter_stage(self, tool_name: str) -> None:
+        stage = _STAGE_NAMES.get(tool_name)
+        if stage is not None:
+            self.stage = stage
+
+    @property
+    def progress(self) -> float:
+        if self.status == SUCCEEDED:
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        # A stage counts as half done while it runs.
+        return round((_STAGE_ORDER.index(self.stage) + 0.5) / len(_STAGE_ORDER), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "question": self.question,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.result is not None:
+            payload["result"] = self.result
+        if self.error is not None:
+            payload["error"] = self.error
+        return payload
+
+
+class JobManager:
+    """Queue of questions executed by a fixed pool of asyncio worker tasks.
+
+    Finished jobs are kept for retention_seconds and at most max_retained of
+    them, oldest dropped first. Workers start with the first submitted job.
+    """
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        workers: int,
+        max_queued: int,
+        retention_seconds: float,
+        max_retained: int,
+    ) -> None:
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.retention_seconds = retention_seconds
+        self.max_retained = max(1, max_retained)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._workers = [
+                asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+            ]
+        return self._queue
+
+    def _prune(self, now: float) -> None:
+        finished = [job for job in self._jobs.values() if job.status in _FINISHED]
+        excess = len(finished) - self.max_retained
+        for job in finished:
+            if excess <= 0 and now - (job.finished_at or now) < self.retention_seconds:
+                continue
+            del self._jobs[job.job_id]
+            excess -= 1
+
+    def submit(self, question: str, session_id: Optional[str] = None) -> Job:
+        queue = self._ensure_workers()
+        self._prune(time.time())
+        job = Job(job_id=uuid.uuid4().hex, question=question, session_id=session_id)
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics.increment("jobs_rejected")
+            raise JobQueueFull(f"job queue is full ({self.max_queued} queued)") from None
+        self._jobs[job.job_id] = job
+        metrics.increment("jobs_submitted")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune(time.time())
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in _FINISHED:
+            return job
+        job.cancel_requested = True
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            # Still queued: the worker skips it when dequeued.
+            self._finish(job, CANCELLED)
+        return job
+
+    def _finish(self, job: Job, status: str, result=None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        metrics.increment("jobs_finished", status=status)
+        if job.started_at is not None:
+            metrics.observe("job_run_seconds", job.finished_at - job.started_at, status=status)
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                metrics.observe("job_queue_seconds", job.started_at - job.created_at)
+                # Run each job in its own task so DELETE cancels the job, not the worker.
+                job.task = asyncio.ensure_future(self.runner(job))
+                try:
+                    result = await job.task
+                except asyncio.CancelledError:
+                    self._finish(job, CANCELLED)
+                    if not job.cancel_requested:
+                        # The worker itself is being shut down.
+                        raise
+                except Exception as exc:
+                    self._finish(job, FAILED, error=str(exc))
+                else:
+                    self._finish(job, SUCCEEDED, result=result)
+                finally:
+                    job.task = None
+            finally:
+                queue.task_done()
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts,
+        }
+
+    async def shutdown(self) -> None:
+        for job in self._jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
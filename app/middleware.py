@@ -0,0 +1,256 @@
+"""ASGI middleware for response size: compression and ETag revalidation.
+
+Both are plain ASGI wrappers so they see streaming responses (NDJSON, Arrow)
+as the individual chunks the endpoint yields.
+"""
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from nl2sql.results import encode_json
+
+try:
+    import zstandard
+except ImportError:
+    # Optional dependency; zstd is not offered without it.
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    # Optional dependency; br is not offered without it.
+    brotli = None
+
+# Media types worth compressing; images, archives and Arrow IPC are left alone.
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "application/javascript", "text/", "image/svg+xml")
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        # wbits=31 writes a gzip header with mtime 0, so equal bodies compress to equal bytes.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Zstd:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings() -> Dict[str, Callable[[int], object]]:
+    """Content codings this process can produce, by name; each is built with its level."""
+    encodings: Dict[str, Callable[[int], object]] = {"gzip": _Gzip}
+    if zstandard is not None:
+        encodings["zstd"] = _Zstd
+    if brotli is not None:
+        encodings["br"] = _Brotli
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: Optional[str], preferred: List[str]) -> Optional[str]:
+    """The first of preferred the client accepts (q > 0), or None for identity."""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in preferred:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def _compressible(headers: MutableHeaders) -> bool:
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return "content-encoding" not in headers and media_type.startswith(_COMPRESSIBLE)
+
+
+class CompressionMiddleware:
+    """Compress compressible responses of at least minimum_size bytes.
+
+    The encoding is the first of `encodings` (e.g. zstd, br, gzip) that the
+    client accepts and this process supports. A response sent in one piece is
+    compressed whole; a streamed one is compressed chunk by chunk, each flushed
+    so rows reach the client as soon as the endpoint yields them. levels maps
+    an encoding to its level (gzip 1-9, zstd 1-22, br quality 0-11).
+    """
+
+    def __init__(self, app: ASGIApp, encodings: List[str], minimum_size: int, levels: Dict[str, int]) -> None:
+        self.app = app
+        supported = available_encodings()
+        self.encoders = {name: supported[name] for name in encodings if name in supported}
+        self.preferred = [name for name in encodings if name in self.encoders]
+        self.minimum_size = minimum_size
+        self.levels = levels
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.preferred:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), self.preferred)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                small = not more_body and len(body) < self.minimum_size
+                if start["status"] != 200 or small or not _compressible(headers):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = self.encoders[encoding](self.levels[encoding])
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+            chunk = encoder.compress(body) if body else b""
+            if not more_body:
+                chunk += encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _entity_tags(header: Optional[str]) -> List[str]:
+    return [tag.strip() for tag in (header or "").split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an If-None-Match header lists tag (weak comparison, as RFC 9110 asks for it)."""
+    listed = _entity_tags(if_none_match)
+    return "*" in listed or _opaque(tag) in {_opaque(candidate) for candidate in listed}
+
+
+def content_etag(*parts: object) -> str:
+    """Weak ETag for a response identified by what it shows (e.g. a result id and page), not its bytes.
+
+    Weak, because every encoding of the response shares the tag. An endpoint
+    that can name its content before doing the work (GET /results/{id})
+    answers 304 itself when the tag matches.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(encode_json(part))
+        digest.update(b"\0")
+    return 'W/"' + digest.hexdigest() + '"'
+
+
+class ETagMiddleware:
+    """ETags for GET/HEAD JSON responses sent in one piece, and 304 for repeats.
+
+    An ETag the endpoint set (see content_etag) is kept; other responses get a
+    strong tag hashing the body as sent (after compression, so each encoding
+    has its own tag). A request whose If-None-Match lists the tag gets 304 Not
+    Modified without the body. Other methods pass through untouched: 304 is
+    only defined for GET and HEAD (RFC 9110 section 13.1.2), and a POST has
+    already done its work by the time its body could be hashed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_tagged(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if start["status"] != 200 or message.get("more_body", False) or media_type != "application/json":
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            tag = headers.get("etag")
+            if tag is None:
+                tag = '"' + hashlib.blake2b(message.get("body", b""), digest_size=16).hexdigest() + '"'
+                headers["ETag"] = tag
+            headers["Cache-Control"] = "private, no-cache"
+            if etag_matches(if_none_match, tag):
+                kept: List[Tuple[bytes, bytes]] = [
+                    (name, value)
+                    for name, value in start["headers"]
+                    if name.lower() in (b"etag", b"cache-control", b"vary")
+                ]
+                await send({"type": "http.response.start", "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from nl2sql.results import encode_json
+
+
+class ResultJSONResponse(JSONResponse):
+    """JSON response rendered by the SQL result encoder.
+
+    Endpoints return this directly so FastAPI skips its jsonable_encoder pass;
+    columnar results, Decimal and datetime values are encoded column by column.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
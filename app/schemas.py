@@ -1,19 +1,35 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class AskRequest(BaseModel):
     question: str
+    session_id: Optional[str] = Field(default=None, max_length=128)
+
+
+class AskBatchRequest(BaseModel):
+    questions: List[str]
+    max_concurrency: Optional[int] = None
 
 
 class AskResponse(BaseModel):
     answer: str
     plot_config: Dict[str, Any]
     sql: str
+    session_id: Optional[str] = None
+    result_id: Optional[str] = None
 
 
 class RunSqlRequest(BaseModel):
     sql: str
+    page_size: Optional[int] = Field(default=None, ge=1)
+    cursor: Optional[str] = Field(default=None, max_length=4096)
+
+
+class PlotDataRequest(BaseModel):
+    sql: str
+    plot_config: Dict[str, Any]
+    max_points: Optional[int] = None
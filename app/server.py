@@ -1,19 +1,49 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from .api import router
+from nl2sql.config import load_config
+
+from .middleware import CompressionMiddleware, ETagMiddleware
 from .settings import FRONTEND_DIR
+from .sql_api import router as sql_router
+from .sql_api import shutdown as sql_shutdown
+from .warmup import Warmup
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    app.state.warmup.start()
+    yield
+    await app.state.warmup.stop()
+    for hook in app.state.shutdown_hooks:
+        await hook()
+
 
+def create_app(profile: str | None = None) -> FastAPI:
+    """Build the app for a worker profile: "full" (default) or "sql".
 
-def create_app() -> FastAPI:
-    app = FastAPI(title="NL2SQL API")
-    app.include_router(router)
+    The sql profile serves /run_sql, /plot_data, /results, /healthz, /readyz and /metrics
+    only and never imports the agents, google-adk or litellm. Both start a background
+    warm-up (app.warmup); the full profile also builds the agents during it.
+    """
+    profile = (profile or os.getenv("APP_PROFILE", "full")).strip().lower()
+    app = FastAPI(title="NL2SQL API", lifespan=_lifespan)
+    app.state.shutdown_hooks = [sql_shutdown]
+    app.state.warmup = Warmup()
+    app.include_router(sql_router)
+    if profile != "sql":
+        from .api import router, shutdown, warm_up_agents
+
+        app.include_router(router)
+        app.state.shutdown_hooks.append(shutdown)
+        app.state.warmup.extra_steps.append(("agents", warm_up_agents))
 
     if os.getenv("ENABLE_CORS", "").lower() in {"1", "true", "yes"}:
         app.add_middleware(
@@ -22,8 +52,24 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["ETag"],
         )
 
+    config = load_config()
+    # The ETag middleware is added after (outside) compression, so body tags hash the bytes sent.
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=config.compression_encodings,
+        minimum_size=config.compression_min_bytes,
+        levels={
+            "gzip": config.compression_gzip_level,
+            "zstd": config.compression_zstd_level,
+            "br": config.compression_brotli_quality,
+        },
+    )
+    if config.http_etags:
+        app.add_middleware(ETagMiddleware)
+
     if FRONTEND_DIR.exists():
         app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="frontend")
 
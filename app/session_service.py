@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService, Session
+
+from nl2sql.results import approx_nbytes
+from nl2sql.utils import metrics
+
+_SessionKey = Tuple[str, str, str]
+
+
+class SessionBudgetError(Exception):
+    """Active sessions already use the whole memory budget; retry after some finish."""
+
+
+def _event_nbytes(event: Event) -> int:
+    # state_delta values are the same objects as the session state, counted there.
+    size = 512
+    if event.content is not None:
+        for part in event.content.parts or []:
+            if part.text:
+                size += len(part.text)
+            if part.function_call is not None:
+                size += approx_nbytes(part.function_call.args or {})
+            if part.function_response is not None:
+                size += approx_nbytes(part.function_response.response or {})
+    return size
+
+
+class _Usage:
+    __slots__ = ("state_bytes", "event_bytes", "last_used", "pinned")
+
+    def __init__(self, state_bytes: int, now: float) -> None:
+        self.state_bytes = state_bytes
+        self.event_bytes = 0
+        self.last_used = now
+        self.pinned = 0
+
+    @property
+    def total(self) -> int:
+        return self.state_bytes + self.event_bytes
+
+
+class BoundedSessionService(InMemorySessionService):
+    """In-memory ADK sessions under a memory budget with LRU and idle-TTL eviction.
+
+    Sizes are estimated from state values (see approx_nbytes) and event
+    payloads as they are appended. Sessions opened through session() are pinned
+    for the duration of the run and always deleted afterwards, including on
+    errors and cancellation; anything else left behind is evicted once idle
+    for ttl_seconds or when the budget needs the room.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.total_bytes = 0
+        self._usage: "OrderedDict[_SessionKey, _Usage]" = OrderedDict()
+
+    def _stored(self, key: _SessionKey) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _forget(self, key: _SessionKey) -> None:
+        usage = self._usage.pop(key, None)
+        if usage is not None:
+            self.total_bytes -= usage.total
+
+    def _evict(self, now: float, reserve: int = 0) -> None:
+        """Drop idle sessions, then least recently used ones until reserve more bytes fit."""
+        for key, usage in list(self._usage.items()):
+            if usage.pinned:
+                continue
+            idle = now - usage.last_used >= self.ttl_seconds
+            if not idle and self.total_bytes + reserve <= self.max_bytes:
+                break
+            self._remove(key)
+            metrics.increment("sessions_evicted", reason="ttl" if idle else "memory")
+
+    def _remove(self, key: _SessionKey) -> None:
+        # Synchronous, so cleanup also completes while a task is being cancelled.
+        app_name, user_id, session_id = key
+        self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+        self._forget(key)
+
+    def _touch(self, key: _SessionKey, now: float) -> Optional[_Usage]:
+        usage = self._usage.get(key)
+        if usage is not None:
+            usage.last_used = now
+            self._usage.move_to_end(key)
+        return usage
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        now = time.monotonic()
+        state_bytes = approx_nbytes(state or {})
+        self._evict(now, reserve=state_bytes)
+        if self.total_bytes + state_bytes > self.max_bytes:
+            metrics.increment("sessions_rejected")
+            raise SessionBudgetError(
+                f"session memory budget exhausted ({self.total_bytes} of {self.max_bytes} bytes in use)"
+            )
+        session = await super().create_session(
+            app_name=app_name,
+            user_id=user_id,
+            state=state,
+            session_id=session_id,
+        )
+        self._usage[(app_name, user_id, session.id)] = _Usage(state_bytes, now)
+        self.total_bytes += state_bytes
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config=None) -> Optional[Session]:
+        session = await super().get_session(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=config,
+        )
+        if session is not None:
+            self._touch((app_name, user_id, session.id), time.monotonic())
+        return session
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._remove((app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        now = time.monotonic()
+        usage = self._touch(key, now)
+        stored = self._stored(key)
+        if usage is not None and stored is not None:
+            before = usage.total
+            usage.event_bytes += _event_nbytes(event)
+            if event.actions and event.actions.state_delta:
+                usage.state_bytes = approx_nbytes(stored.state)
+            self.total_bytes += usage.total - before
+            self._evict(now)
+        return event
+
+    @asynccontextmanager
+    async def session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Session]:
+        """Create a pinned session for one run and delete it however the run ends."""
+        session = await self.create_session(app_name=app_name, user_id=user_id, state=state)
+        key = (app_name, user_id, session.id)
+        self._usage[key].pinned += 1
+        try:
+            yield session
+        finally:
+            self._remove(key)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "sessions": len(self._usage),
+            "pinned": sum(1 for usage in self._usage.values() if usage.pinned),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
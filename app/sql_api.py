@@ -0,0 +1,313 @@
+"""SQL and result endpoints; importing this module does not load the LLM stack.
+
+Served by every worker. With APP_PROFILE=sql a worker serves only these routes
+(see app.server), so it starts without google-adk, litellm or the agents.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from nl2sql.config import load_config
+from nl2sql.results import (
+    ARROW_STREAM_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    ColumnarResult,
+    SpilledResult,
+    arrow_available,
+    build_plot_data,
+    get_result_store,
+    get_spill_directory,
+    iter_arrow_stream,
+    iter_ndjson,
+)
+from nl2sql.tools.sql.execution import execute_sql, open_sql_streams
+from nl2sql.tools.sql.incremental import get_incremental_cache
+from nl2sql.tools.sql.pagination import PagingError, decode_cursor, result_cursor, run_sql_page
+from nl2sql.tools.sql.query_templates import explain_template, get_template_stats
+from nl2sql.utils import metrics
+from nl2sql.utils.query_log import QueryTrace, get_query_log, query_trace
+
+from .middleware import content_etag, etag_matches
+from .responses import ResultJSONResponse
+from .schemas import PlotDataRequest, RunSqlRequest
+
+router = APIRouter()
+
+
+def _query_log_snapshot() -> Optional[Dict[str, object]]:
+    log = get_query_log()
+    return log.snapshot() if log is not None else None
+
+
+def _incremental_snapshot() -> Optional[Dict[str, object]]:
+    cache = get_incremental_cache()
+    return cache.snapshot() if cache is not None else None
+
+
+# Extra /metrics sections (name -> snapshot callable) registered by other routers.
+METRICS_SECTIONS: Dict[str, Callable[[], Any]] = {
+    "results": lambda: get_result_store().snapshot(),
+    "result_spill": lambda: get_spill_directory().snapshot(),
+    "sql_templates": lambda: get_template_stats().snapshot(),
+    "query_log": _query_log_snapshot,
+    "incremental": _incremental_snapshot,
+}
+
+_TEMPLATE_ORDERS = ("total_ms", "p95_ms", "mean_ms", "count", "errors")
+
+
+class SimpleToolContext:
+    """Stand-in for ADK's ToolContext when tools run outside an agent."""
+
+    def __init__(self) -> None:
+        self.state: Dict[str, Any] = {}
+
+
+def _negotiate_format(accept: Optional[str]) -> str:
+    """Pick the /run_sql output format from the Accept header (JSON by default)."""
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type == NDJSON_MEDIA_TYPE:
+            return "ndjson"
+        if media_type == ARROW_STREAM_MEDIA_TYPE:
+            return "arrow"
+        if media_type in ("application/json", "*/*"):
+            return "json"
+    return "json"
+
+
+def _stream_sql(sql: str, output_format: str) -> StreamingResponse:
+    if output_format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=406, detail="Arrow output requires pyarrow on the server.")
+
+    opened = open_sql_streams(sql, single_statement=output_format == "arrow")
+    if opened.get("status") != "success":
+        message = opened.get("error_message") or "SQL run failed."
+        raise HTTPException(status_code=400, detail=message)
+
+    streams = opened["streams"]
+    if output_format == "arrow":
+        return StreamingResponse(
+            iter_arrow_stream(streams[0][1], description=opened.get("description")),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+        )
+    return StreamingResponse(iter_ndjson(streams), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    """Liveness: the event loop answers. Never waits for warm-up."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness: 503 until startup warm-up (app.warmup) finished or timed out."""
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:
+        return JSONResponse({"status": "ready"})
+    payload = warmup.snapshot()
+    if not payload["ready"]:
+        return JSONResponse({**payload, "status": "warming"}, status_code=503, headers={"Retry-After": "1"})
+    return JSONResponse({**payload, "status": "ready"})
+
+
+@router.get("/metrics")
+def get_metrics() -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"metrics": metrics.snapshot()}
+    for name, snapshot in METRICS_SECTIONS.items():
+        payload[name] = snapshot()
+    return payload
+
+
+@router.post("/run_sql", response_class=ResultJSONResponse)
+def run_sql(request: RunSqlRequest, accept: Optional[str] = Header(default=None)) -> Response:
+    sql = request.sql.strip()
+    if not sql:
+        raise HTTPException(status_code=400, detail="SQL cannot be empty.")
+
+    output_format = _negotiate_format(accept)
+    paged = request.page_size is not None or request.cursor is not None
+    if paged and output_format != "json":
+        raise HTTPException(status_code=400, detail="page_size and cursor apply to JSON output only.")
+    with query_trace("run_sql") as trace:
+        trace.sql = sql
+        trace.fields["format"] = output_format
+        if output_format != "json":
+            return _stream_sql(sql, output_format)
+
+        tool_context = SimpleToolContext()
+        if paged:
+            return _run_sql_page(sql, request, tool_context, trace)
+        result = execute_sql(sql, tool_context, store_result=False)
+        if result.get("status") != "success":
+            trace.error = tool_context.state.get("last_error")
+            message = result.get("error_message") or "SQL run failed."
+            raise HTTPException(status_code=400, detail=message)
+        trace.row_count = result.get("row_count")
+        return ResultJSONResponse(result)
+
+
+def _run_sql_page(sql: str, request: RunSqlRequest, tool_context: SimpleToolContext, trace: QueryTrace) -> Response:
+    max_rows = load_config().result_page_max_rows
+    page_size = min(request.page_size or max_rows, max_rows)
+    trace.fields["page_size"] = page_size
+    try:
+        result = run_sql_page(sql, tool_context, page_size, request.cursor)
+    except PagingError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if result.get("status") != "success":
+        trace.error = tool_context.state.get("last_error")
+        raise HTTPException(status_code=400, detail=result.get("error_message") or "SQL run failed.")
+    trace.row_count = len(result["rows"])
+    trace.fields["paging"] = result["paging"]
+    return ResultJSONResponse(result)
+
+
+def _result_batches(result_set: ColumnarResult, offset: int) -> Iterator[ColumnarResult]:
+    if isinstance(result_set, SpilledResult):
+        return result_set.iter_batches(offset)
+    return iter((result_set.page(offset, result_set.row_count),))
+
+
+def _result_page(result_id: str, result_set: ColumnarResult, offset: int, limit: int) -> Dict[str, Any]:
+    page = result_set.page(offset, limit)
+    end = offset + page.row_count
+    more = end < result_set.row_count
+    return {
+        "sql": result_set.sql,
+        "columns": result_set.columns,
+        "rows": page.rows,
+        "row_count": result_set.row_count,
+        "offset": offset,
+        "next_offset": end if more else None,
+        "next_cursor": result_cursor(result_id, end) if more else None,
+    }
+
+
+@router.get("/results/{result_id}", response_class=ResultJSONResponse)
+def get_result(
+    result_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+    page_size: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None, max_length=4096),
+    accept: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    """A stored /ask or paged /run_sql result, served by the worker that ran it.
+
+    JSON returns one page per result set (page_size, or limit, capped at
+    RESULT_PAGE_MAX_ROWS) from offset or from the position a next_cursor of an
+    earlier page points at; NDJSON and Arrow stream every row from there on.
+    Spilled results are read from their memory-mapped file chunk by chunk.
+    A stored result never changes under its id, so a JSON page is tagged from
+    its parameters and revalidated before the result is even looked up.
+    """
+    config = load_config()
+    output_format = _negotiate_format(accept)
+    tag = None
+    if config.http_etags and output_format == "json":
+        tag = content_etag("results", result_id, offset, limit, page_size, cursor, config.result_page_max_rows)
+        if etag_matches(if_none_match, tag):
+            return Response(status_code=304, headers={"ETag": tag, "Cache-Control": "private, no-cache"})
+
+    result = get_result_store().get(result_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired.")
+    if cursor is not None:
+        try:
+            state = decode_cursor(cursor)
+        except PagingError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if state.get("result_id") != result_id or not isinstance(state.get("offset"), int) or state["offset"] < 0:
+            raise HTTPException(status_code=400, detail="Cursor does not belong to this result.")
+        offset = state["offset"]
+    result_sets = result.get("result_sets") or []
+
+    if output_format == "ndjson":
+        streams = [(result_set.sql, _result_batches(result_set, offset)) for result_set in result_sets]
+        return StreamingResponse(iter_ndjson(streams), media_type=NDJSON_MEDIA_TYPE)
+    if output_format == "arrow":
+        if not arrow_available():
+            raise HTTPException(status_code=406, detail="Arrow output requires pyarrow on the server.")
+        if len(result_sets) != 1:
+            raise HTTPException(status_code=400, detail="Arrow output needs a single result set.")
+        return StreamingResponse(
+            iter_arrow_stream(_result_batches(result_sets[0], offset)),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+        )
+
+    max_rows = config.result_page_max_rows
+    limit = min(page_size or limit or max_rows, max_rows)
+    pages = [_result_page(result_id, result_set, offset, limit) for result_set in result_sets]
+    payload: Dict[str, Any] = {"status": result.get("status"), "sql": result.get("sql"), "limit": limit}
+    if pages:
+        payload.update(pages[0])
+    payload["result_sets"] = pages
+    return ResultJSONResponse(payload, headers={"ETag": tag} if tag else None)
+
+
+@router.post("/plot_data", response_class=ResultJSONResponse)
+def plot_data(request: PlotDataRequest) -> ResultJSONResponse:
+    sql = request.sql.strip()
+    if not sql:
+        raise HTTPException(status_code=400, detail="SQL cannot be empty.")
+
+    config = load_config()
+    max_points = config.plot_max_points
+    if request.max_points:
+        max_points = max(3, min(request.max_points, max_points))
+    max_categories = min(config.plot_max_categories, max_points)
+
+    with query_trace("plot_data") as trace:
+        trace.sql = sql
+        tool_context = SimpleToolContext()
+        result = execute_sql(sql, tool_context, store_result=False)
+        if result.get("status") != "success":
+            trace.error = tool_context.state.get("last_error")
+            message = result.get("error_message") or "SQL run failed."
+            raise HTTPException(status_code=400, detail=message)
+        trace.row_count = result.get("row_count")
+
+        try:
+            data = build_plot_data(
+                request.plot_config, result["result_sets"][0], max_points, max_categories, config.plot_max_series
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return ResultJSONResponse({"status": "success", "sql": result.get("sql"), "plot_data": data})
+
+
+@router.get("/sql/templates")
+def sql_templates(
+    limit: int = Query(default=20, ge=1, le=500),
+    order_by: str = Query(default="total_ms"),
+    explain: bool = Query(default=False),
+) -> Dict[str, Any]:
+    """The costliest SQL templates with latency percentiles and, on request, their plans.
+
+    Plans are cached per template for SQL_EXPLAIN_TTL_SECONDS; without
+    explain=true only already cached plans are included.
+    """
+    if order_by not in _TEMPLATE_ORDERS:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of {', '.join(_TEMPLATE_ORDERS)}.")
+    templates = get_template_stats().top(limit, order_by)
+    if explain:
+        for template in templates:
+            try:
+                template["plan"] = explain_template(template["key"])
+            except Exception as exc:
+                template["plan_error"] = str(exc)
+    return {**get_template_stats().snapshot(), "templates": templates}
+
+
+async def shutdown() -> None:
+    get_result_store().close()
+    get_spill_directory().close()
+    log = get_query_log()
+    if log is not None:
+        log.close()
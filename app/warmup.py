@@ -0,0 +1,152 @@
+"""Background warm-up run when a worker starts; GET /readyz reports its progress.
+
+The worker answers /healthz (liveness) at once but only reports ready once
+warm-up finished or WARMUP_MAX_SECONDS passed, so a load balancer polling
+/readyz sends traffic to warm instances.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from nl2sql.config import load_config
+from nl2sql.database import pooled_connection
+from nl2sql.tools.sql.schema_tools import load_schema_state
+from nl2sql.tools.sql.sql_executor import execute_statements
+from nl2sql.tools.sql.sql_utils import _split_sql_statements, validate_sql_is_readonly
+from nl2sql.utils import metrics
+from nl2sql.utils.query_log import hot_statements
+
+# (name, blocking callable returning a JSON-able summary) run after the built-in steps.
+WarmupStep = Tuple[str, Callable[[], Any]]
+
+
+def _check_connection() -> Dict[str, float]:
+    """Borrow one pooled connection and ping it.
+
+    The MySQL pool opens its connections when it is created, so this only
+    creates the pool and proves the database answers; holding a single slot
+    keeps the rest free for requests that arrive during warm-up.
+    """
+    started = time.perf_counter()
+    with pooled_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+    return {"ping_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def _load_schemas() -> Dict[str, object]:
+    result = load_schema_state()
+    if result.get("status") != "success":
+        raise RuntimeError(result.get("error_message") or "Schema inspection failed.")
+    return {"tables": len(result["state"]["table_schemas"])}
+
+
+def warmup_statements() -> List[str]:
+    """WARMUP_SQL statements first, then the most frequent ones in QUERY_LOG_PATH."""
+    config = load_config()
+    statements: List[str] = []
+    if config.warmup_sql:
+        statements.extend(_split_sql_statements(config.warmup_sql))
+    if config.warmup_top_queries and config.query_log_path and os.path.exists(config.query_log_path):
+        statements.extend(hot_statements(config.query_log_path, config.warmup_top_queries))
+    unique = list(dict.fromkeys(statement.strip() for statement in statements if statement.strip()))
+    return [statement for statement in unique if validate_sql_is_readonly(statement)]
+
+
+class Warmup:
+    """Runs the warm-up steps once, in the background, and tracks readiness.
+
+    Steps run one after another in worker threads: create the pool and ping one
+    connection, load the table schemas into the schema cache, any extra steps
+    (the full profile builds the agents), then pre-execute warmup_statements()
+    at most WARMUP_QUERIES_PER_SECOND. A failing step is recorded and warm-up moves on.
+    """
+
+    def __init__(self, extra_steps: Optional[List[WarmupStep]] = None) -> None:
+        self.extra_steps = list(extra_steps or [])
+        self.status = "pending"
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        if self.status in ("ready", "disabled"):
+            return True
+        if self.started_at is None:
+            return False
+        # A slow warm-up must not keep the instance out of rotation forever.
+        return time.monotonic() - self.started_at >= load_config().warmup_max_seconds
+
+    async def _step(self, name: str, function: Callable[[], Any]) -> None:
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.to_thread(function)
+            outcome: Dict[str, Any] = {"status": "ok"}
+            if detail:
+                outcome["detail"] = detail
+        except Exception as exc:
+            outcome = {"status": "error", "error": str(exc)}
+        outcome["ms"] = (time.perf_counter() - started) * 1000
+        self.steps[name] = outcome
+        metrics.increment("warmup_steps", step=name, outcome=outcome["status"])
+
+    async def _execute_statements(self) -> None:
+        statements = await asyncio.to_thread(warmup_statements)
+        interval = 1.0 / load_config().warmup_queries_per_second
+        executed = failed = 0
+        started = time.perf_counter()
+        for statement in statements:
+            began = time.monotonic()
+            try:
+                await asyncio.to_thread(execute_statements, [statement], 1)
+                executed += 1
+            except Exception:
+                failed += 1
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - began)))
+        self.steps["statements"] = {
+            "status": "ok" if not failed else "error",
+            "detail": {"executed": executed, "failed": failed},
+            "ms": (time.perf_counter() - started) * 1000,
+        }
+        metrics.increment("warmup_statements", executed, outcome="executed")
+        metrics.increment("warmup_statements", failed, outcome="failed")
+
+    async def run(self) -> None:
+        self.status = "running"
+        self.started_at = time.monotonic()
+        await self._step("connections", _check_connection)
+        await self._step("schemas", _load_schemas)
+        for name, function in self.extra_steps:
+            await self._step(name, function)
+        await self._execute_statements()
+        self.finished_at = time.monotonic()
+        self.status = "ready"
+
+    def start(self) -> None:
+        if not load_config().warmup_enabled:
+            self.status = "disabled"
+            return
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {"status": self.status, "ready": self.ready, "elapsed_seconds": elapsed, "steps": dict(self.steps)}
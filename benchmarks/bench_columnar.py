@@ -0,0 +1,112 @@
+"""Memory and time for list-of-lists vs columnar SQL results.
+
+Usage:
+    python -m benchmarks.bench_columnar [--sizes 10000,100000,1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import datetime as dt
+import gc
+import json
+import time
+import tracemalloc
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+from nl2sql.results import ColumnarResult, sql_result_to_dict
+
+COLUMNS = ["id", "issuer", "pricing_date", "amount", "coupon"]
+
+
+def _driver_rows(count: int) -> List[Tuple[object, ...]]:
+    start = dt.date(2020, 1, 1)
+    return [
+        (
+            index,
+            f"issuer-{index % 500}",
+            start + dt.timedelta(days=index % 1500),
+            Decimal(index % 100000) / 100,
+            (index % 997) / 7.0,
+        )
+        for index in range(count)
+    ]
+
+
+def _legacy_pipeline(driver_rows: List[Tuple[object, ...]]) -> Dict[str, object]:
+    rows = [list(row) for row in driver_rows]
+    result_set = {"sql": "SELECT ...", "columns": COLUMNS, "rows": rows, "row_count": len(rows)}
+    return {
+        "status": "success",
+        "sql": "SELECT ...",
+        "columns": COLUMNS,
+        "rows": rows,
+        "row_count": len(rows),
+        "result_sets": [result_set],
+    }
+
+
+def _columnar_pipeline(driver_rows: List[Tuple[object, ...]]) -> Dict[str, object]:
+    primary = ColumnarResult.from_rows("SELECT ...", COLUMNS, driver_rows)
+    return {
+        "status": "success",
+        "sql": "SELECT ...",
+        "columns": primary.columns,
+        "rows": primary.rows,
+        "row_count": primary.row_count,
+        "result_sets": [primary],
+    }
+
+
+def _measure(count: int, build: Callable[[List[Tuple[object, ...]]], Dict[str, object]]) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    driver_rows = _driver_rows(count)
+    started = time.perf_counter()
+    payload = build(driver_rows)
+    build_seconds = time.perf_counter() - started
+    del driver_rows
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    copy.deepcopy(payload)
+    deepcopy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    json.dumps(sql_result_to_dict(payload, max_rows=20), default=str)
+    sample_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    json.dumps(sql_result_to_dict(payload), default=str)
+    full_json_seconds = time.perf_counter() - started
+    return {
+        "rows": count,
+        "retained_mb": retained / (1024 * 1024),
+        "build_ms": build_seconds * 1000,
+        "deepcopy_ms": deepcopy_seconds * 1000,
+        "sample_json_ms": sample_seconds * 1000,
+        "full_json_ms": full_json_seconds * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    header = f"{'variant':<10}{'rows':>10}{'retained MB':>14}{'build ms':>11}{'deepcopy ms':>13}{'sample ms':>11}{'json ms':>10}"
+    print(header)
+    for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+        for name, build in (("legacy", _legacy_pipeline), ("columnar", _columnar_pipeline)):
+            stats = _measure(size, build)
+            print(
+                f"{name:<10}{stats['rows']:>10}{stats['retained_mb']:>14.1f}{stats['build_ms']:>11.1f}"
+                f"{stats['deepcopy_ms']:>13.1f}{stats['sample_json_ms']:>11.2f}{stats['full_json_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
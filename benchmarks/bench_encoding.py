@@ -0,0 +1,93 @@
+"""JSON encoding throughput for wide numeric SQL results.
+
+Usage:
+    python -m benchmarks.bench_encoding [--rows 20000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from nl2sql.results import ColumnarResult, encode_json
+from nl2sql.results.encoding import orjson
+
+DECIMAL_COLUMNS = 20
+FLOAT_COLUMNS = 10
+INT_COLUMNS = 5
+DATETIME_COLUMNS = 5
+
+
+def _driver_rows(count: int) -> List[tuple]:
+    base = dt.datetime(2024, 1, 1)
+    rows = []
+    for index in range(count):
+        rows.append(
+            tuple(Decimal(index * (col + 1) % 1000003).scaleb(-2) for col in range(DECIMAL_COLUMNS))
+            + tuple(index / (col + 3) for col in range(FLOAT_COLUMNS))
+            + tuple(index * (col + 1) for col in range(INT_COLUMNS))
+            + tuple(base + dt.timedelta(minutes=index + col) for col in range(DATETIME_COLUMNS))
+        )
+    return rows
+
+
+def _columns() -> List[str]:
+    total = DECIMAL_COLUMNS + FLOAT_COLUMNS + INT_COLUMNS + DATETIME_COLUMNS
+    return [f"c{index}" for index in range(total)]
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - started)
+    return {"seconds": best, "bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = _columns()
+    driver_rows = _driver_rows(args.rows)
+    legacy_payload = {"columns": columns, "rows": [list(row) for row in driver_rows]}
+    columnar = ColumnarResult.from_rows("SELECT ...", columns, driver_rows)
+    columnar_payload = {"columns": columnar.columns, "rows": columnar.rows}
+
+    variants: Dict[str, Callable[[], bytes]] = {
+        "json.dumps(default=str)": lambda: json.dumps(legacy_payload, default=str).encode("utf-8"),
+        "encode_json[json]": lambda: encode_json(columnar_payload, backend="json"),
+    }
+    try:
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+
+        variants["fastapi jsonable_encoder"] = lambda: JSONResponse(
+            jsonable_encoder(legacy_payload)
+        ).body
+    except ImportError:
+        pass
+    if orjson is not None:
+        variants["encode_json[orjson]"] = lambda: encode_json(columnar_payload, backend="orjson")
+
+    cells = args.rows * len(columns)
+    print(f"{args.rows} rows x {len(columns)} columns ({cells} cells)")
+    print(f"{'encoder':<28}{'ms':>10}{'rows/s':>14}{'MB/s':>10}")
+    for name, fn in variants.items():
+        stats = _time(fn, args.repeat)
+        seconds = stats["seconds"]
+        print(
+            f"{name:<28}{seconds * 1000:>10.1f}{args.rows / seconds:>14.0f}"
+            f"{stats['bytes'] / seconds / (1024 * 1024):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
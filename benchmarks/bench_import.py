@@ -0,0 +1,111 @@
+"""Cold-start import time of the server profiles, from ``python -X importtime``.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat 3] [--top 10] [--output results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from .report import REPO_DIR, result_document, write_results
+
+# (name, module imported, extra environment)
+TARGETS: List[Tuple[str, str, Dict[str, str]]] = [
+    ("server[sql]", "app.server", {"APP_PROFILE": "sql"}),
+    ("server[full]", "app.server", {"APP_PROFILE": "full"}),
+    ("nl2sql.agent", "nl2sql.agent", {}),
+]
+
+# Modules the sql profile must not pull in.
+LLM_STACK = ("google.adk", "litellm")
+
+
+def _import_times(module: str, env: Dict[str, str]) -> Tuple[Dict[str, int], int]:
+    """Cumulative microseconds per imported module, and the total, for one cold interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        # Nesting is shown by indentation; top-level imports add up to the total.
+        if not name[1:].startswith(" "):
+            total += int(cumulative_us)
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative, total
+
+
+def _measure(name: str, module: str, extra_env: Dict[str, str], repeat: int, top: int) -> Dict[str, object]:
+    env = dict(os.environ, PYTHONPATH=str(REPO_DIR), AI_MODEL=os.environ.get("AI_MODEL", "bench-model"))
+    env.update(extra_env)
+    best: Dict[str, int] = {}
+    best_total = 0
+    for _ in range(repeat):
+        cumulative, total = _import_times(module, env)
+        if not best or total < best_total:
+            best, best_total = cumulative, total
+    # The target and its parent packages would just repeat the total.
+    parents = {module.rsplit(".", depth)[0] for depth in range(module.count(".") + 1)}
+    heaviest = sorted(
+        ((mod, us) for mod, us in best.items() if mod not in parents),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    return {
+        "mode": name,
+        "module": module,
+        "total_ms": best_total / 1000,
+        "modules": len(best),
+        "llm_stack_loaded": sorted(
+            prefix for prefix in LLM_STACK if any(mod == prefix or mod.startswith(prefix + ".") for mod in best)
+        ),
+        "heaviest": [{"module": mod, "ms": us / 1000} for mod, us in heaviest],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list per target")
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args()
+
+    runs = []
+    failed = False
+    for name, module, extra_env in TARGETS:
+        run = _measure(name, module, extra_env, max(1, args.repeat), args.top)
+        runs.append(run)
+        loaded = ", ".join(run["llm_stack_loaded"]) or "-"
+        print(
+            f"{name:<14} {run['total_ms']:>8.1f} ms  "
+            f"{run['modules']:>5} modules  llm stack: {loaded}"
+        )
+        for entry in run["heaviest"]:
+            print(f"    {entry['ms']:>8.1f} ms  {entry['module']}")
+        if name == "server[sql]" and run["llm_stack_loaded"]:
+            failed = True
+
+    if args.output:
+        write_results(args.output, result_document("import", {"repeat": args.repeat}, runs))
+        print(f"wrote {args.output}")
+    if failed:
+        print("error: the sql profile imported the LLM stack")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
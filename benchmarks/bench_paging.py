@@ -0,0 +1,60 @@
+"""Time to the first /run_sql page: full JSON result vs keyset page_size paging.
+
+Seeds one SQLite file per size and posts the same ordered query both ways
+through the app in-process.
+
+Usage:
+    python -m benchmarks.bench_paging [--sizes 10000,100000,500000] [--page-size 200]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from .fixtures import TABLE, seed_database
+from .offline import configure
+
+QUERY = f"SELECT id, issuer, currency, pricing_date, amount FROM {TABLE} ORDER BY pricing_date, id"
+
+
+def _time(client, body, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.post("/run_sql", json=body)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'full ms':>10}{'first page ms':>15}{'next page ms':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+            path = seed_database(os.path.join(directory, f"paging-{size}.db"), rows=size)
+            configure(path, latency_ms=0, jitter_ms=0, seed=0)
+            os.environ["WARMUP_ENABLED"] = "false"
+            from fastapi.testclient import TestClient
+
+            from app.server import create_app
+
+            with TestClient(create_app("sql")) as client:
+                full_ms = _time(client, {"sql": QUERY}, args.repeat)
+                first = {"sql": QUERY, "page_size": args.page_size}
+                first_ms = _time(client, first, args.repeat)
+                cursor = client.post("/run_sql", json=first).json()["next_cursor"]
+                next_ms = _time(client, {**first, "cursor": cursor}, args.repeat)
+            print(f"{size:>10}{full_ms:>10.1f}{first_ms:>15.1f}{next_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""End-to-end /ask and /run_sql benchmark with a scripted LLM and a seeded SQLite database.
+
+Runs offline: the agents talk to benchmarks.fake_llm.ScriptedLlm and SQL runs
+against a local SQLite file, so results only move when the pipeline does.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--clients 1,4,16] [--requests 60]
+        [--llm-latency-ms 20] [--output results.json] [--compare baseline.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from nl2sql.utils import metrics
+
+from . import fake_llm
+from .fixtures import SCENARIOS, seed_database
+from .offline import DB_STATS, configure
+from .report import compare_results, result_document, summarize_latencies, write_results
+
+
+def _ask_request(api, index: int) -> Callable:
+    from app.schemas import AskRequest
+
+    scenario = SCENARIOS[index % len(SCENARIOS)]
+
+    async def call() -> bool:
+        response = await api.ask(AskRequest(question=scenario.question))
+        body = json.loads(response.body)
+        return response.status_code == 200 and bool(body.get("sql"))
+
+    return call
+
+
+def _run_sql_request(api, index: int) -> Callable:
+    from app import sql_api
+    from app.schemas import RunSqlRequest
+
+    scenario = SCENARIOS[index % len(SCENARIOS)]
+
+    async def call() -> bool:
+        # FastAPI runs sync endpoints in a worker thread; do the same here.
+        response = await asyncio.to_thread(sql_api.run_sql, RunSqlRequest(sql=scenario.sql), None)
+        return response.status_code == 200
+
+    return call
+
+
+_MODES: Dict[str, Callable] = {"ask": _ask_request, "run_sql": _run_sql_request}
+
+
+async def _drive(api, mode: str, clients: int, requests: int) -> Dict[str, object]:
+    make_request = _MODES[mode]
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def client() -> None:
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            call = make_request(api, index)
+            started = time.perf_counter()
+            try:
+                ok = await call()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    fake_llm.STATS.reset()
+    DB_STATS.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    wall = time.perf_counter() - started
+
+    llm = fake_llm.STATS.snapshot()
+    completed = len(latencies)
+    run: Dict[str, object] = {
+        "mode": mode,
+        "clients": clients,
+        "requests": completed,
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_rps": completed / wall if wall else 0.0,
+        "llm_calls_per_request": llm["total_calls"] / completed if completed else 0.0,
+        "llm_calls_by_agent": {
+            agent: count / completed for agent, count in sorted(llm["calls"].items())
+        } if completed else {},
+        "llm_prompt_tokens_per_request": llm["prompt_tokens"] / completed if completed else 0.0,
+        "db_round_trips_per_request": DB_STATS.statements / completed if completed else 0.0,
+    }
+    run.update(summarize_latencies(latencies))
+    return run
+
+
+async def _benchmark(api, modes: List[str], client_levels: List[int], requests: int) -> List[Dict[str, object]]:
+    runs = []
+    for mode in modes:
+        # Warm-up: one pass over every scenario, excluded from the numbers.
+        await _drive(api, mode, 1, len(SCENARIOS))
+        for clients in client_levels:
+            runs.append(await _drive(api, mode, clients, requests))
+    return runs
+
+
+def _print_runs(runs: List[Dict[str, object]]) -> None:
+    print(
+        f"{'mode':<8}{'clients':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'req/s':>10}{'llm/req':>9}{'db/req':>8}{'errors':>8}"
+    )
+    for run in runs:
+        print(
+            f"{run['mode']:<8}{run['clients']:>8}{run['p50_ms']:>10.1f}{run['p95_ms']:>10.1f}"
+            f"{run['p99_ms']:>10.1f}{run['throughput_rps']:>10.1f}"
+            f"{run['llm_calls_per_request']:>9.1f}{run['db_round_trips_per_request']:>8.1f}"
+            f"{run['errors']:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=60, help="requests per concurrency level")
+    parser.add_argument("--modes", default="ask,run_sql", help="comma-separated: ask, run_sql")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-rows", type=int, default=20000)
+    parser.add_argument("--db-path", help="SQLite file to (re)create; defaults to a temp file")
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--compare", help="baseline JSON from a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p95 regression")
+    args = parser.parse_args()
+
+    client_levels = [int(value) for value in args.clients.split(",") if value.strip()]
+    modes = [value.strip() for value in args.modes.split(",") if value.strip()]
+    unknown = [mode for mode in modes if mode not in _MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = args.db_path or os.path.join(scratch, "bench.sqlite3")
+        seed_database(db_path, rows=args.db_rows, seed=args.seed)
+        api = configure(db_path, args.llm_latency_ms, args.llm_jitter_ms, args.seed)
+        runs = asyncio.run(_benchmark(api, modes, client_levels, args.requests))
+
+    _print_runs(runs)
+    config = {
+        "requests": args.requests,
+        "llm_latency_ms": args.llm_latency_ms,
+        "llm_jitter_ms": args.llm_jitter_ms,
+        "seed": args.seed,
+        "db_rows": args.db_rows,
+        "scenarios": len(SCENARIOS),
+    }
+    document = result_document("pipeline", config, runs)
+    document["metrics"] = metrics.snapshot()
+    if args.output:
+        write_results(args.output, document)
+        print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        lines, regressed = compare_results(baseline, document, args.tolerance)
+        print("\n".join(lines))
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Scripted stand-in for LiteLlm that replays the agent workflow without a network call.
+
+Each request is routed by the tools the calling agent exposes, and the next
+step is picked from the function responses already in the conversation, so the
+real tools, state handling and AgentTool plumbing all run unchanged.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+from collections import Counter
+from typing import AsyncGenerator, Dict, List
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+from .fixtures import find_scenario
+
+ROOT_STEPS = [
+    "run_sql_task_agent_tool",
+    "run_plot_config_agent_tool",
+    "run_result_interpreter_agent_tool",
+    "run_output_tool",
+]
+
+
+class CallStats:
+    """Thread-safe counters shared by every fake model instance."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, agent: str, prompt_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.calls[agent] += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.prompt_tokens = 0
+            self.output_tokens = 0
+
+
+STATS = CallStats()
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _text_of(content: types.Content) -> str:
+    return "".join(part.text or "" for part in content.parts or [])
+
+
+def _first_user_text(llm_request: LlmRequest) -> str:
+    for content in llm_request.contents:
+        if content.role == "user":
+            text = _text_of(content)
+            if text:
+                return text
+    return ""
+
+
+def _function_responses(llm_request: LlmRequest) -> Dict[str, dict]:
+    responses: Dict[str, dict] = {}
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.function_response is not None:
+                responses[part.function_response.name] = part.function_response.response or {}
+    return responses
+
+
+def _agent_kind(llm_request: LlmRequest) -> str:
+    tools = set(llm_request.tools_dict)
+    if "run_sql_task_agent_tool" in tools:
+        return "root"
+    if "generate_sql" in tools:
+        return "sql_task"
+    if "save_plot_config" in tools:
+        return "plot_config"
+    if "save_answer" in tools:
+        return "result_interpreter"
+    return "sql_generator"
+
+
+def _call(name: str, **args: object) -> types.Part:
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _text(text: str) -> types.Part:
+    return types.Part(text=text)
+
+
+class ScriptedLlm(BaseLlm):
+    """BaseLlm that answers from benchmarks.fixtures.SCENARIOS after a simulated delay."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"fake/.*"]
+
+    def _next_part(self, kind: str, llm_request: LlmRequest) -> types.Part:
+        scenario = find_scenario(_first_user_text(llm_request))
+        done = _function_responses(llm_request)
+        if kind == "root":
+            for step in ROOT_STEPS:
+                if step not in done:
+                    if step == "run_output_tool":
+                        return _call(step)
+                    return _call(step, question=scenario.question)
+            return _text(json.dumps(done["run_output_tool"], default=str))
+        if kind == "sql_task":
+            if "generate_sql" not in done:
+                return _call("generate_sql", question=scenario.question, table=scenario.table)
+            if "run_sql" not in done:
+                sql = done["generate_sql"].get("sql") or scenario.sql
+                return _call("run_sql", query=sql)
+            return _text("SQL_TASK_DONE")
+        if kind == "plot_config":
+            if "save_plot_config" not in done:
+                return _call("save_plot_config", plot_config=scenario.plot_config)
+            return _text("")
+        if kind == "result_interpreter":
+            if "save_answer" not in done:
+                return _call("save_answer", answer=scenario.answer)
+            return _text("Answer saved.")
+        return _text(scenario.sql)
+
+    async def _sleep(self) -> None:
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        kind = _agent_kind(llm_request)
+        part = self._next_part(kind, llm_request)
+        prompt_tokens = sum(_estimate_tokens(_text_of(content)) for content in llm_request.contents)
+        if part.function_call is not None:
+            output_tokens = _estimate_tokens(json.dumps(part.function_call.args or {}, default=str))
+        else:
+            output_tokens = _estimate_tokens(part.text or "")
+        STATS.record(kind, prompt_tokens, output_tokens)
+        await self._sleep()
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
+
+
+def scripted_model_factory(latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+    """Model factory for nl2sql.agents.model_provider.set_model_factory."""
+
+    def build(deployment: str) -> ScriptedLlm:
+        return ScriptedLlm(
+            model=f"fake/{deployment}",
+            latency_ms=latency_ms,
+            jitter_ms=jitter_ms,
+            seed=seed,
+        )
+
+    return build
+
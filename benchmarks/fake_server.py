@@ -0,0 +1,39 @@
+"""Serve app.server with the scripted model and a seeded SQLite database.
+
+Usage:
+    python -m benchmarks.fake_server [--port 8090] [--llm-latency-ms 20]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+
+from .fixtures import seed_database
+from .offline import configure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-rows", type=int, default=20000)
+    parser.add_argument("--db-path", help="SQLite file to (re)create; defaults to a temp file")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = args.db_path or os.path.join(scratch, "bench.sqlite3")
+        seed_database(db_path, rows=args.db_rows, seed=args.seed)
+        configure(db_path, args.llm_latency_ms, args.llm_jitter_ms, args.seed)
+        from app.server import create_app
+
+        uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
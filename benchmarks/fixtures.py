@@ -0,0 +1,149 @@
+"""Seeded SQLite database and scripted questions for the offline benchmarks."""
+from __future__ import annotations
+
+import datetime as dt
+import os
+import random
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+TABLE = "bond_prices"
+CURRENCIES = ["USD", "EUR", "CNY", "HKD", "SGD", "GBP"]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    question: str
+    sql: str
+    plot_config: Dict[str, object]
+    answer: str
+    table: str = TABLE
+    tags: List[str] = field(default_factory=list)
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        question="Top issuers by bond count",
+        sql=(
+            f"SELECT issuer, COUNT(*) AS bond_count FROM {TABLE} "
+            "GROUP BY issuer ORDER BY bond_count DESC LIMIT 10"
+        ),
+        plot_config={
+            "type": "bar",
+            "title": "Top Issuers by Bond Count",
+            "axis": {
+                "x": {"name": "Issuer", "value": "issuer"},
+                "y": {"name": "Bonds", "value": "bond_count"},
+            },
+        },
+        answer="The ten most active issuers each have a few hundred bonds.",
+        tags=["aggregate"],
+    ),
+    Scenario(
+        question="Show a pie chart of issued amount by currency",
+        sql=f"SELECT currency, SUM(amount) AS total FROM {TABLE} GROUP BY currency",
+        plot_config={
+            "type": "pie",
+            "title": "Issued Amount by Currency",
+            "axis": {
+                "series": {"name": "Currency", "value": "currency"},
+                "y": {"name": "Total", "value": "total"},
+            },
+        },
+        answer="USD and EUR account for the largest share of issued amount.",
+        tags=["aggregate"],
+    ),
+    Scenario(
+        question="Show daily pricing activity over time",
+        sql=(
+            f"SELECT pricing_date AS day, COUNT(*) AS total FROM {TABLE} "
+            "GROUP BY pricing_date ORDER BY pricing_date ASC LIMIT 2000"
+        ),
+        plot_config={
+            "type": "line",
+            "title": "Pricing Activity",
+            "axis": {
+                "x": {"name": "Date", "value": "day"},
+                "y": {"name": "Count", "value": "total"},
+            },
+        },
+        answer="Pricing activity is steady across the period.",
+        tags=["time_series"],
+    ),
+    Scenario(
+        question="List the 100 most recently priced bonds",
+        sql=(
+            f"SELECT id, issuer, currency, pricing_date, amount, coupon FROM {TABLE} "
+            "ORDER BY pricing_date DESC, id DESC LIMIT 100"
+        ),
+        plot_config={
+            "type": "table",
+            "title": "Recently Priced Bonds",
+            "columns": [
+                {"name": "Issuer", "value": "issuer"},
+                {"name": "Currency", "value": "currency"},
+                {"name": "Pricing Date", "value": "pricing_date"},
+                {"name": "Amount", "value": "amount"},
+            ],
+        },
+        answer="The latest bonds were priced on the last day of the dataset.",
+        tags=["rows"],
+    ),
+    Scenario(
+        question="Average coupon for USD bonds and for EUR bonds",
+        sql=(
+            f"SELECT AVG(coupon) AS avg_coupon FROM {TABLE} WHERE currency = 'USD'; "
+            f"SELECT AVG(coupon) AS avg_coupon FROM {TABLE} WHERE currency = 'EUR'"
+        ),
+        plot_config={
+            "type": "table",
+            "title": "Average Coupon",
+            "columns": [{"name": "Average Coupon", "value": "avg_coupon"}],
+        },
+        answer="USD and EUR bonds have similar average coupons.",
+        tags=["multi_statement"],
+    ),
+]
+
+
+def find_scenario(text: str) -> Scenario:
+    """Scenario whose question appears in text (agents embed it in their prompts)."""
+    for scenario in SCENARIOS:
+        if scenario.question in text:
+            return scenario
+    return SCENARIOS[sum(text.encode("utf-8")) % len(SCENARIOS)]
+
+
+def seed_database(path: str, rows: int = 20000, seed: int = 7) -> str:
+    """Create (or replace) the benchmark table at path with deterministic rows."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    start = dt.date(2020, 1, 1)
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(
+            f"CREATE TABLE {TABLE} ("
+            "id INTEGER PRIMARY KEY, issuer TEXT NOT NULL, currency TEXT NOT NULL, "
+            "pricing_date DATE NOT NULL, amount DECIMAL(18,2), coupon DOUBLE)"
+        )
+        connection.executemany(
+            f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    index,
+                    f"Issuer {rng.randrange(200):03d}",
+                    rng.choice(CURRENCIES),
+                    (start + dt.timedelta(days=rng.randrange(1500))).isoformat(),
+                    round(rng.uniform(1e6, 5e8), 2),
+                    round(rng.uniform(0.5, 9.0), 3),
+                )
+                for index in range(1, rows + 1)
+            ),
+        )
+        connection.execute(f"CREATE INDEX idx_{TABLE}_pricing_date ON {TABLE} (pricing_date)")
+        connection.commit()
+    finally:
+        connection.close()
+    return path
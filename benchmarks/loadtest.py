@@ -0,0 +1,348 @@
+"""Open-loop load and soak test for app/server.py over HTTP.
+
+Requests arrive at a fixed average rate (Poisson arrivals) with a weighted
+/ask vs /run_sql mix, independent of how fast the server answers, so event-loop
+stalls and threadpool exhaustion show up as growing latency instead of being
+hidden by a closed loop. A probe hits GET /healthz on a short interval: its
+latency is the event-loop lag. RSS and open file descriptors of the server
+process are sampled over time to spot session memory growth and connection
+leaks.
+
+By default benchmarks.fake_server is started in a subprocess (scripted model,
+seeded SQLite). Pass --url to target a running server, and --server-pid to
+sample its memory.
+
+Usage:
+    python -m benchmarks.loadtest [--rate 20] [--duration 60] [--mix ask=1,run_sql=4]
+        [--output soak.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .fixtures import SCENARIOS
+from .report import REPO_DIR, result_document, summarize_latencies, write_results
+
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class EndpointStats:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.window: List[float] = []
+        self.window_errors = 0
+
+    def record(self, seconds: float, error: Optional[str]) -> None:
+        self.latencies.append(seconds)
+        self.window.append(seconds)
+        millis = seconds * 1000
+        index = next(
+            (position for position, bound in enumerate(HISTOGRAM_BUCKETS_MS) if millis <= bound),
+            len(HISTOGRAM_BUCKETS_MS),
+        )
+        self.buckets[index] += 1
+        if error:
+            self.errors[error] += 1
+            self.window_errors += 1
+
+    def take_window(self) -> Tuple[List[float], int]:
+        window, errors = self.window, self.window_errors
+        self.window, self.window_errors = [], 0
+        return window, errors
+
+    def histogram(self) -> List[Dict[str, object]]:
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        return [{"bucket": label, "count": count} for label, count in zip(labels, self.buckets)]
+
+    def summary(self, duration: float) -> Dict[str, object]:
+        total = len(self.latencies)
+        failed = sum(self.errors.values())
+        run: Dict[str, object] = {
+            "mode": self.name,
+            "requests": total,
+            "errors": failed,
+            "error_rate": failed / total if total else 0.0,
+            "errors_by_kind": dict(self.errors),
+            "throughput_rps": (total - failed) / duration if duration else 0.0,
+            "histogram": self.histogram(),
+        }
+        run.update(summarize_latencies(self.latencies))
+        return run
+
+
+def process_sample(pid: Optional[int]) -> Dict[str, Optional[float]]:
+    """RSS (MB) and open descriptors of pid from /proc; None where unavailable."""
+    if pid is None:
+        return {"rss_mb": None, "open_fds": None}
+    rss_mb = None
+    open_fds = None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    rss_mb = int(line.split()[1]) / 1024
+                    break
+        open_fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except (OSError, ValueError):
+        pass
+    return {"rss_mb": rss_mb, "open_fds": open_fds}
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = [name for name in mix if name not in ("ask", "run_sql")]
+    if unknown or not mix:
+        raise ValueError(f"mix must weight ask and/or run_sql, got {value!r}")
+    return mix
+
+
+def _request_for(endpoint: str, rng: random.Random) -> Tuple[str, Dict[str, str]]:
+    scenario = rng.choice(SCENARIOS)
+    if endpoint == "ask":
+        return "/ask", {"question": scenario.question}
+    return "/run_sql", {"sql": scenario.sql}
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, url: str, server_pid: Optional[int]) -> None:
+        self.args = args
+        self.url = url
+        self.server_pid = server_pid
+        self.mix = _parse_mix(args.mix)
+        self.stats = {name: EndpointStats(name) for name in self.mix}
+        self.probe = EndpointStats("healthz")
+        self.timeline: List[Dict[str, object]] = []
+        self.inflight = 0
+        self.dropped = 0
+        self.rng = random.Random(args.seed)
+
+    async def _send(self, client: httpx.AsyncClient, endpoint: str) -> None:
+        path, payload = _request_for(endpoint, self.rng)
+        self.inflight += 1
+        started = time.perf_counter()
+        error = None
+        try:
+            response = await client.post(path, json=payload)
+            if response.status_code != 200:
+                error = f"http_{response.status_code}"
+        except httpx.HTTPError as exc:
+            error = type(exc).__name__
+        finally:
+            self.inflight -= 1
+        self.stats[endpoint].record(time.perf_counter() - started, error)
+
+    async def _arrivals(self, client: httpx.AsyncClient, deadline: float) -> List[asyncio.Task]:
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        tasks: List[asyncio.Task] = []
+        next_at = time.perf_counter()
+        while True:
+            next_at += self.rng.expovariate(self.args.rate)
+            if next_at >= deadline:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            if self.inflight >= self.args.max_inflight:
+                self.dropped += 1
+                continue
+            endpoint = self.rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(self._send(client, endpoint)))
+            tasks = [task for task in tasks if not task.done()]
+        return tasks
+
+    async def _probe(self, client: httpx.AsyncClient, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            error = None
+            try:
+                response = await client.get("/healthz")
+                if response.status_code != 200:
+                    error = f"http_{response.status_code}"
+            except httpx.HTTPError as exc:
+                error = type(exc).__name__
+            self.probe.record(time.perf_counter() - started, error)
+            await asyncio.sleep(self.args.probe_interval)
+
+    def _sample(self, started: float) -> None:
+        point: Dict[str, object] = {
+            "t": round(time.perf_counter() - started, 2),
+            "inflight": self.inflight,
+            "dropped": self.dropped,
+        }
+        for name, stats in self.stats.items():
+            window, errors = stats.take_window()
+            summary = summarize_latencies(window)
+            point[name] = {"completed": len(window), "errors": errors, "p95_ms": summary["p95_ms"]}
+        probe_window, _ = self.probe.take_window()
+        point["healthz_max_ms"] = max(probe_window) * 1000 if probe_window else None
+        point.update(process_sample(self.server_pid))
+        self.timeline.append(point)
+        if not self.args.quiet:
+            rss = point["rss_mb"]
+            print(
+                f"t={point['t']:>6}s inflight={self.inflight:<4}"
+                + "".join(
+                    f" {name}={point[name]['completed']}/{point[name]['errors']}err"
+                    f" p95={point[name]['p95_ms']:.0f}ms"
+                    for name in self.stats
+                )
+                + f" healthz_max={point['healthz_max_ms'] or 0:.0f}ms"
+                + (f" rss={rss:.1f}MB fds={point['open_fds']}" if rss is not None else ""),
+                flush=True,
+            )
+
+    async def _sampler(self, started: float, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.sample_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._sample(started)
+
+    async def run(self) -> float:
+        limits = httpx.Limits(max_connections=self.args.max_inflight + 1)
+        timeout = httpx.Timeout(self.args.timeout)
+        async with httpx.AsyncClient(base_url=self.url, limits=limits, timeout=timeout) as client:
+            self._sample(time.perf_counter())
+            started = time.perf_counter()
+            deadline = started + self.args.duration
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(self._sampler(started, stop))
+            probe = asyncio.create_task(self._probe(client, deadline))
+            pending = await self._arrivals(client, deadline)
+            await probe
+            if pending:
+                await asyncio.wait(pending, timeout=self.args.timeout)
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await sampler
+        return elapsed
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_fake_server(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.fake_server",
+        "--port",
+        str(port),
+        "--llm-latency-ms",
+        str(args.llm_latency_ms),
+        "--llm-jitter-ms",
+        str(args.llm_jitter_ms),
+        "--db-rows",
+        str(args.db_rows),
+        "--seed",
+        str(args.seed),
+    ]
+    process = subprocess.Popen(command, cwd=REPO_DIR)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"fake server exited with code {process.returncode}")
+        try:
+            # Wait for warm-up so the run starts against a warm instance.
+            if httpx.get(f"{url}/readyz", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("fake server did not become ready within 60s")
+
+
+def _print_summary(runs: List[Dict[str, object]], dropped: int) -> None:
+    print(f"{'endpoint':<10}{'requests':>10}{'err %':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ok/s':>8}")
+    for run in runs:
+        print(
+            f"{run['mode']:<10}{run['requests']:>10}{run['error_rate'] * 100:>8.2f}"
+            f"{run['p50_ms']:>10.1f}{run['p95_ms']:>10.1f}{run['p99_ms']:>10.1f}"
+            f"{run['throughput_rps']:>8.1f}"
+        )
+    if dropped:
+        print(f"{dropped} arrivals dropped at --max-inflight")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="target server; default starts benchmarks.fake_server")
+    parser.add_argument("--server-pid", type=int, help="pid to sample RSS/fds for with --url")
+    parser.add_argument("--rate", type=float, default=20.0, help="average arrivals per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of arrivals")
+    parser.add_argument("--mix", default="ask=1,run_sql=4", help="endpoint weights")
+    parser.add_argument("--max-inflight", type=int, default=256, help="drop arrivals above this")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--db-rows", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--quiet", action="store_true", help="no per-interval lines")
+    args = parser.parse_args()
+    try:
+        _parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    process = None
+    url, server_pid = args.url, args.server_pid
+    if url is None:
+        process, url = _start_fake_server(args)
+        server_pid = process.pid
+    try:
+        test = LoadTest(args, url, server_pid)
+        duration = asyncio.run(test.run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    runs = [stats.summary(duration) for stats in test.stats.values()]
+    _print_summary(runs, test.dropped)
+    probe = summarize_latencies(test.probe.latencies)
+    print(f"healthz (event-loop lag) p50={probe['p50_ms']:.1f}ms p99={probe['p99_ms']:.1f}ms max={probe['max_ms']:.1f}ms")
+
+    if args.output:
+        config = {
+            key: getattr(args, key)
+            for key in ("rate", "duration", "mix", "max_inflight", "timeout", "llm_latency_ms", "llm_jitter_ms", "db_rows", "seed")
+        }
+        config["target"] = "external" if args.url else "fake_server"
+        document = result_document("loadtest", config, runs)
+        document["healthz"] = probe
+        document["dropped"] = test.dropped
+        document["timeline"] = test.timeline
+        write_results(args.output, document)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Wire nl2sql to the scripted model and a seeded SQLite file for offline runs."""
+from __future__ import annotations
+
+import os
+import threading
+
+from . import fake_llm
+from .fixtures import TABLE
+
+
+class DbStats:
+    """Counts statements SQLite executes (one per round trip to a server database)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.statements = 0
+
+    def trace(self, _statement: str) -> None:
+        with self._lock:
+            self.statements += 1
+
+    def install(self, connection) -> None:
+        connection.set_trace_callback(self.trace)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements = 0
+
+
+DB_STATS = DbStats()
+
+
+def configure(db_path: str, latency_ms: float, jitter_ms: float, seed: int):
+    """Point nl2sql at the SQLite file and scripted model, then import the API."""
+    # Importing the config loads .env first so the overrides below win.
+    import nl2sql.config  # noqa: F401
+
+    os.environ.update(
+        {
+            "DB_TYPE": "sqlite",
+            "SQLITE_PATH": db_path,
+            "ALLOWED_TABLES": TABLE,
+            "TARGET_TABLE": "",
+            "AI_MODEL": "benchmark",
+        }
+    )
+    from nl2sql.agents.model_provider import set_model_factory
+    from nl2sql.database import close_sqlite_pool, sqlite_client
+
+    set_model_factory(fake_llm.scripted_model_factory(latency_ms, jitter_ms, seed))
+    close_sqlite_pool()
+    sqlite_client.CONNECTION_HOOKS.append(DB_STATS.install)
+
+    from app import api
+
+    return api
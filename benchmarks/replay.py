@@ -0,0 +1,179 @@
+"""Replay logged SQL or questions from a query log (QUERY_LOG_PATH) against a server.
+
+Use it as a regression benchmark (replayed vs logged latency, queries that
+succeeded when logged but fail now) or to pre-warm a fresh instance's caches
+with --distinct, which replays each SQL template or question once.
+
+Usage:
+    python -m benchmarks.replay queries.db --url http://127.0.0.1:8080
+        [--mode sql|questions] [--distinct] [--limit 500] [--concurrency 4]
+        [--output replay.json] [--compare baseline.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from nl2sql.utils.query_log import read_query_log
+
+from .report import compare_results, result_document, summarize_latencies, write_results
+
+# Record kinds that hold an end-user question.
+QUESTION_KINDS = ("ask", "job", "batch")
+
+
+def select_requests(
+    records: List[Dict[str, object]],
+    mode: str,
+    distinct: bool,
+    include_failed: bool,
+) -> List[Tuple[str, Dict[str, str], Dict[str, object]]]:
+    """(path, body, logged record) per request to replay, in log order."""
+    selected = []
+    seen = set()
+    for record in records:
+        if not include_failed and record.get("status") != "success":
+            continue
+        if mode == "questions":
+            if record.get("kind") not in QUESTION_KINDS or not record.get("question"):
+                continue
+            key = str(record["question"]).strip().lower()
+            request = ("/ask", {"question": record["question"]})
+        else:
+            if not record.get("sql"):
+                continue
+            fingerprints = [statement.get("fingerprint") for statement in record.get("statements") or []]
+            key = tuple(fingerprints) if all(fingerprints) and fingerprints else record["sql"]
+            request = ("/run_sql", {"sql": record["sql"]})
+        if distinct:
+            if key in seen:
+                continue
+            seen.add(key)
+        selected.append((*request, record))
+    return selected
+
+
+async def _replay(
+    url: str,
+    requests: List[Tuple[str, Dict[str, str], Dict[str, object]]],
+    concurrency: int,
+    timeout: float,
+) -> List[Tuple[float, Optional[str], Dict[str, object]]]:
+    limiter = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=httpx.Timeout(timeout)) as client:
+
+        async def send(path: str, body: Dict[str, str], record: Dict[str, object]):
+            async with limiter:
+                started = time.perf_counter()
+                error = None
+                try:
+                    response = await client.post(path, json=body)
+                    if response.status_code != 200:
+                        error = f"http_{response.status_code}"
+                except httpx.HTTPError as exc:
+                    error = type(exc).__name__
+                return time.perf_counter() - started, error, record
+
+        return await asyncio.gather(*(send(path, body, record) for path, body, record in requests))
+
+
+def _logged_seconds(record: Dict[str, object], mode: str) -> Optional[float]:
+    """What the logged request took for the part being replayed."""
+    if mode == "sql" and record.get("kind") in QUESTION_KINDS:
+        # Only the SQL of a question is replayed; compare with its execution time.
+        sql_ms = (record.get("stages") or {}).get("sql_execute")
+        return float(sql_ms) / 1000 if sql_ms is not None else None
+    if record.get("total_ms") is None:
+        return None
+    return float(record["total_ms"]) / 1000
+
+
+def _summarize(mode: str, concurrency: int, outcomes, duration: float) -> Dict[str, object]:
+    errors = [error for _, error, _ in outcomes if error]
+    regressions = [
+        {"sql": record.get("sql"), "question": record.get("question"), "error": error}
+        for _, error, record in outcomes
+        if error and record.get("status") == "success"
+    ]
+    logged = [
+        seconds for seconds in (_logged_seconds(record, mode) for _, _, record in outcomes) if seconds is not None
+    ]
+    run: Dict[str, object] = {
+        "mode": f"replay_{mode}",
+        "clients": concurrency,
+        "requests": len(outcomes),
+        "errors": len(errors),
+        "throughput_rps": (len(outcomes) - len(errors)) / duration if duration else 0.0,
+        "regressions": regressions,
+        "logged": summarize_latencies(logged),
+    }
+    run.update(summarize_latencies(seconds for seconds, _, _ in outcomes))
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", help="query log file (SQLite, or .jsonl/.ndjson)")
+    parser.add_argument("--url", required=True, help="target server, e.g. http://127.0.0.1:8080")
+    parser.add_argument("--mode", choices=("sql", "questions"), default="sql")
+    parser.add_argument("--distinct", action="store_true", help="each SQL template or question once")
+    parser.add_argument("--include-failed", action="store_true", help="also replay failed requests")
+    parser.add_argument("--limit", type=int, help="replay at most this many requests")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--compare", help="baseline JSON from a previous replay")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p95 regression")
+    args = parser.parse_args()
+
+    records = list(read_query_log(args.log))
+    requests = select_requests(records, args.mode, args.distinct, args.include_failed)
+    if args.limit is not None:
+        requests = requests[: args.limit]
+    if not requests:
+        print(f"nothing to replay from {args.log} ({len(records)} records)")
+        return
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(_replay(args.url, requests, max(1, args.concurrency), args.timeout))
+    run = _summarize(args.mode, max(1, args.concurrency), outcomes, time.perf_counter() - started)
+
+    logged = run["logged"]
+    print(f"replayed {run['requests']} of {len(records)} logged requests ({args.mode}), {run['errors']} errors")
+    print(f"  replay p50={run['p50_ms']:.1f}ms p95={run['p95_ms']:.1f}ms  {run['throughput_rps']:.1f} ok/s")
+    print(f"  logged p50={logged['p50_ms']:.1f}ms p95={logged['p95_ms']:.1f}ms")
+    for regression in run["regressions"][:10]:
+        print(f"  now failing ({regression['error']}): {regression['sql'] or regression['question']}")
+
+    config = {
+        "log": args.log,
+        "mode": args.mode,
+        "distinct": args.distinct,
+        "include_failed": args.include_failed,
+        "limit": args.limit,
+    }
+    document = result_document("replay", config, [run])
+    if args.output:
+        write_results(args.output, document)
+        print(f"wrote {args.output}")
+    failed = bool(run["regressions"])
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        lines, regressed = compare_results(baseline, document, args.tolerance)
+        print("\n".join(lines))
+        failed = failed or regressed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Latency summaries and machine-readable result files shared by the benchmarks."""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+import platform
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(seconds: Iterable[float]) -> Dict[str, float]:
+    values = sorted(seconds)
+    if not values:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def result_document(benchmark: str, config: Dict[str, object], runs: List[Dict[str, object]]) -> Dict[str, object]:
+    return {
+        "benchmark": benchmark,
+        "git_commit": git_commit(),
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": config,
+        "runs": runs,
+    }
+
+
+def write_results(path: str, document: Dict[str, object]) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _run_key(run: Dict[str, object]) -> Tuple[object, ...]:
+    return (run.get("mode"), run.get("clients"))
+
+
+def compare_results(
+    baseline: Dict[str, object],
+    current: Dict[str, object],
+    tolerance: float,
+) -> Tuple[List[str], bool]:
+    """Report p50/p95/throughput deltas per (mode, clients); flag p95 regressions over tolerance."""
+    baseline_runs = {_run_key(run): run for run in baseline.get("runs") or []}
+    lines = [f"compared with {baseline.get('git_commit') or 'baseline'}"]
+    regressed = False
+    for run in current.get("runs") or []:
+        before = baseline_runs.get(_run_key(run))
+        if before is None:
+            continue
+        mode, clients = _run_key(run)
+        parts = [f"{mode:<8} clients={clients:<4}"]
+        for metric in ("p50_ms", "p95_ms", "throughput_rps"):
+            old = float(before.get(metric) or 0.0)
+            new = float(run.get(metric) or 0.0)
+            change = (new - old) / old if old else 0.0
+            parts.append(f"{metric} {old:.1f}->{new:.1f} ({change:+.1%})")
+            if metric == "p95_ms" and change > tolerance:
+                regressed = True
+        lines.append("  ".join(parts))
+    return lines, regressed
@@ -1,6 +1,7 @@
 const elements = {
   question: document.getElementById("question"),
   askButton: document.getElementById("ask-button"),
+  newConversation: document.getElementById("new-conversation"),
   status: document.getElementById("status"),
   answer: document.getElementById("answer"),
   plotStatus: document.getElementById("plot-status"),
@@ -10,15 +11,102 @@ const elements = {
   copySql: document.getElementById("copy-sql"),
 };
 
+// Rows fetched per table page (/results or /run_sql page_size).
+const TABLE_PAGE_SIZE = 200;
+
+// The table keeps only the rows in view in the DOM, plus this many above and below.
+const TABLE_OVERSCAN_ROWS = 10;
+// Initial row height estimate in pixels; replaced by the measured height of the first row.
+const TABLE_ROW_HEIGHT = 34;
+
+// Line charts with more points than this across all traces render with WebGL (scattergl).
+const WEBGL_POINT_THRESHOLD = 5000;
+
+// Open the page with ?timings to show fetch and render times in a corner overlay.
+const SHOW_TIMINGS = new URLSearchParams(window.location.search).has("timings");
+const timings = new Map();
+let timingOverlay = null;
+let webglSupported = null;
+
+// GET responses kept for revalidation with If-None-Match; the server answers 304 when unchanged.
+const CONDITIONAL_CACHE_ENTRIES = 50;
+const conditionalCache = new Map();
+
 let resizeObserver = null;
 
 const state = {
   answer: "",
   plotConfig: null,
   sql: "",
-  sqlResult: null,
+  resultId: null,
+  plotData: null,
+  sessionId: null,
 };
 
+async function fetchJson(url, options = {}, failureMessage = "Request failed") {
+  // Only GET is revalidated: a POST may do work (or create a session) on every call.
+  const conditional = (options.method || "GET") === "GET";
+  const key = url;
+  const cached = conditional ? conditionalCache.get(key) : undefined;
+  const headers = { ...(options.headers || {}) };
+  if (cached) {
+    headers["If-None-Match"] = cached.etag;
+  }
+  const response = await fetch(url, { ...options, headers });
+  if (response.status === 304 && cached) {
+    conditionalCache.delete(key);
+    conditionalCache.set(key, cached);
+    return cached.data;
+  }
+  if (!response.ok) {
+    const errorText = await response.text();
+    const error = new Error(errorText || failureMessage);
+    error.status = response.status;
+    throw error;
+  }
+  const data = await response.json();
+  const etag = response.headers.get("ETag");
+  if (etag && conditional) {
+    conditionalCache.delete(key);
+    conditionalCache.set(key, { etag, data });
+    while (conditionalCache.size > CONDITIONAL_CACHE_ENTRIES) {
+      conditionalCache.delete(conditionalCache.keys().next().value);
+    }
+  }
+  return data;
+}
+
+function recordTiming(label, started, detail = "") {
+  if (!SHOW_TIMINGS) {
+    return;
+  }
+  const ended = performance.now();
+  performance.measure(label, { start: started, end: ended });
+  const entry = timings.get(label) || { count: 0, max: 0 };
+  entry.count += 1;
+  entry.last = ended - started;
+  entry.max = Math.max(entry.max, entry.last);
+  entry.detail = detail;
+  timings.set(label, entry);
+  if (!timingOverlay) {
+    timingOverlay = document.createElement("pre");
+    timingOverlay.className = "timing-overlay";
+    document.body.appendChild(timingOverlay);
+  }
+  timingOverlay.textContent = Array.from(timings, ([name, value]) => {
+    const counts = value.count > 1 ? ` (max ${value.max.toFixed(1)}, n=${value.count})` : "";
+    const suffix = value.detail ? `  ${value.detail}` : "";
+    return `${name}: ${value.last.toFixed(1)} ms${counts}${suffix}`;
+  }).join("\n");
+}
+
+function resetTimings() {
+  timings.clear();
+  if (timingOverlay) {
+    timingOverlay.textContent = "";
+  }
+}
+
 function setStatus(message, isError = false) {
   elements.status.textContent = message || "";
   elements.status.style.color = isError ? "#b23b2a" : "";
@@ -52,66 +140,133 @@ function clearPlot() {
   }
 }
 
-function rowsToObjects(columns, rows) {
-  return rows.map((row) => {
-    const obj = {};
-    columns.forEach((col, idx) => {
-      obj[col] = row[idx];
-    });
-    return obj;
-  });
-}
-
-function getPrimaryResult(sqlResult) {
-  if (!sqlResult) {
-    return null;
-  }
-  if (Array.isArray(sqlResult.result_sets) && sqlResult.result_sets.length > 0) {
-    return sqlResult.result_sets[0];
-  }
-  return sqlResult;
+function tableLayout(columns, columnConfig) {
+  const hasConfig = Array.isArray(columnConfig) && columnConfig.length;
+  return {
+    visibleColumns: hasConfig ? columnConfig.map((col) => col.value) : columns,
+    headerLabels: hasConfig ? columnConfig.map((col) => col.name) : columns,
+  };
 }
 
-function renderTable(columns, rows, columnConfig) {
-  const visibleColumns =
-    Array.isArray(columnConfig) && columnConfig.length
-      ? columnConfig.map((col) => col.value)
-      : columns;
-  const headerLabels =
-    Array.isArray(columnConfig) && columnConfig.length
-      ? columnConfig.map((col) => col.name)
-      : columns;
-
+function createVirtualTable(headerLabels, columnIndexes, onNearEnd) {
+  const viewport = document.createElement("div");
+  viewport.className = "table-viewport";
   const table = document.createElement("table");
-  table.className = "data-table";
+  table.className = "data-table virtual-table";
 
   const thead = document.createElement("thead");
   const headRow = document.createElement("tr");
   headerLabels.forEach((label) => {
     const th = document.createElement("th");
     th.textContent = label;
+    th.title = label;
     headRow.appendChild(th);
   });
   thead.appendChild(headRow);
   table.appendChild(thead);
 
+  // Spacer rows stand in for the rows above and below the window, so the
+  // scrollbar reflects every loaded row while only the window is in the DOM.
   const tbody = document.createElement("tbody");
-  rows.forEach((row) => {
+  const spacerRow = () => {
     const tr = document.createElement("tr");
-    visibleColumns.forEach((col) => {
-      const td = document.createElement("td");
-      td.textContent = row[col] !== undefined ? String(row[col]) : "";
-      tr.appendChild(td);
-    });
+    tr.className = "spacer-row";
+    const td = document.createElement("td");
+    td.colSpan = Math.max(headerLabels.length, 1);
+    tr.appendChild(td);
     tbody.appendChild(tr);
-  });
+    return td;
+  };
+  const topSpacer = spacerRow();
+  const bottomSpacer = spacerRow();
   table.appendChild(tbody);
+  viewport.appendChild(table);
+
+  const rows = [];
+  const pool = [];
+  let rowHeight = TABLE_ROW_HEIGHT;
+  let measured = false;
+  let frame = 0;
+
+  function render() {
+    frame = 0;
+    const started = performance.now();
+    const first = Math.max(0, Math.floor(viewport.scrollTop / rowHeight) - TABLE_OVERSCAN_ROWS);
+    const windowSize = Math.ceil(viewport.clientHeight / rowHeight) + 2 * TABLE_OVERSCAN_ROWS;
+    const last = Math.min(rows.length, first + windowSize);
+    while (pool.length < last - first) {
+      const tr = document.createElement("tr");
+      columnIndexes.forEach(() => tr.appendChild(document.createElement("td")));
+      tbody.insertBefore(tr, bottomSpacer.parentNode);
+      pool.push(tr);
+    }
+    pool.forEach((tr, offset) => {
+      const row = rows[first + offset];
+      tr.hidden = !row;
+      if (!row) {
+        return;
+      }
+      columnIndexes.forEach((column, idx) => {
+        const text = row[column] !== undefined ? String(row[column]) : "";
+        const td = tr.cells[idx];
+        if (td.textContent !== text) {
+          td.textContent = text;
+          td.title = text;
+        }
+      });
+    });
+    topSpacer.style.height = `${first * rowHeight}px`;
+    bottomSpacer.style.height = `${(rows.length - last) * rowHeight}px`;
+    recordTiming("table render", started, `${last - first} of ${rows.length} rows in DOM`);
+
+    if (!measured && last > first) {
+      measured = true;
+      const height = pool[0].getBoundingClientRect().height;
+      if (height > 0 && Math.abs(height - rowHeight) > 0.5) {
+        rowHeight = height;
+        schedule();
+      }
+    }
+    if (onNearEnd && rows.length - last < TABLE_OVERSCAN_ROWS) {
+      onNearEnd();
+    }
+  }
+
+  function schedule() {
+    if (!frame) {
+      frame = requestAnimationFrame(render);
+    }
+  }
+
+  viewport.addEventListener("scroll", schedule, { passive: true });
+  // The viewport grows with its first rows up to its max-height; re-render for the new size.
+  new ResizeObserver(schedule).observe(viewport);
 
   elements.table.innerHTML = "";
-  elements.table.appendChild(table);
+  elements.table.appendChild(viewport);
+
+  return {
+    append(newRows) {
+      for (const row of newRows) {
+        rows.push(row);
+      }
+      schedule();
+    },
+    get rowCount() {
+      return rows.length;
+    },
+  };
+}
+
+function hasWebgl() {
+  if (webglSupported === null) {
+    const canvas = document.createElement("canvas");
+    webglSupported = Boolean(canvas.getContext("webgl") || canvas.getContext("experimental-webgl"));
+  }
+  return webglSupported;
 }
 
-function renderPlot(plotConfig, sqlResult) {
+function renderPlot(plotConfig, plotData) {
   clearPlot();
   if (!plotConfig || !plotConfig.type) {
     setPlotStatus("No plot_config available.");
@@ -126,79 +281,48 @@ function renderPlot(plotConfig, sqlResult) {
     return;
   }
 
-  const primary = getPrimaryResult(sqlResult);
-  if (!primary || !Array.isArray(primary.columns) || !Array.isArray(primary.rows)) {
+  if (!plotData || !Array.isArray(plotData.traces)) {
     setPlotStatus("No SQL data available for chart.");
     return;
   }
-
-  const rows = rowsToObjects(primary.columns, primary.rows);
-  if (!rows.length) {
+  if (!plotData.row_count) {
     setPlotStatus("Query returned no rows.");
     return;
   }
 
-  setPlotStatus("");
-
-  if (plotConfig.type === "table") {
-    renderTable(primary.columns, rows, plotConfig.columns);
-    return;
-  }
+  setPlotStatus(plotData.reduced ? `Reduced view of ${plotData.row_count} rows.` : "");
 
   if (!window.Plotly) {
     setPlotStatus("Plotly not available.", true);
     return;
   }
 
-  const axis = plotConfig.axis || {};
-  const xField = axis.x?.value;
-  const yField = axis.y?.value;
-  const seriesField = axis.series?.value;
-
-  if (!yField || (plotConfig.type !== "pie" && !xField)) {
-    setPlotStatus("Plot config missing axis fields.", true);
-    return;
-  }
-
-  const traces = [];
-  if (plotConfig.type === "pie") {
-    if (!seriesField) {
-      setPlotStatus("Plot config missing pie series field.", true);
-      return;
-    }
-    traces.push({
-      type: "pie",
-      labels: rows.map((row) => row[seriesField]),
-      values: rows.map((row) => row[yField]),
-      textinfo: "label+percent",
-      hoverinfo: "label+value",
-    });
-  } else {
-    const groups = seriesField
-      ? Array.from(new Set(rows.map((row) => row[seriesField])))
-      : [null];
-
-    groups.forEach((group) => {
-      const groupRows = group === null ? rows : rows.filter((row) => row[seriesField] === group);
-      const trace = {
-        name: group === null ? axis.y?.name || yField : String(group),
-        x: groupRows.map((row) => row[xField]),
-        y: groupRows.map((row) => row[yField]),
+  const points = plotData.traces.reduce((total, series) => total + (series.x || series.labels || []).length, 0);
+  const lineType = points > WEBGL_POINT_THRESHOLD && hasWebgl() ? "scattergl" : "scatter";
+  const traces = plotData.traces.map((series) => {
+    if (plotConfig.type === "pie") {
+      return {
+        type: "pie",
+        labels: series.labels,
+        values: series.values,
+        textinfo: "label+percent",
+        hoverinfo: "label+value",
       };
-      if (plotConfig.type === "line") {
-        trace.type = "scatter";
-        trace.mode = "lines+markers";
-      } else {
-        trace.type = "bar";
-        if (plotConfig.type === "bar") {
-          trace.orientation = "h";
-          trace.x = groupRows.map((row) => row[yField]);
-          trace.y = groupRows.map((row) => row[xField]);
-        }
+    }
+    const trace = { name: series.name, x: series.x, y: series.y };
+    if (plotConfig.type === "line") {
+      trace.type = lineType;
+      trace.mode = "lines+markers";
+    } else {
+      trace.type = "bar";
+      if (plotConfig.type === "bar") {
+        trace.orientation = "h";
+        trace.x = series.y;
+        trace.y = series.x;
       }
-      traces.push(trace);
-    });
-  }
+    }
+    return trace;
+  });
 
   const layout = {
     title: plotConfig.title || "",
@@ -207,7 +331,11 @@ function renderPlot(plotConfig, sqlResult) {
     autosize: true,
   };
 
+  const traceType = plotConfig.type === "line" ? lineType : plotConfig.type;
+  const started = performance.now();
   window.Plotly.react(elements.plot, traces, layout, { responsive: true }).then(() => {
+    // Measured to the next frame so the time includes drawing, not just building the figure.
+    requestAnimationFrame(() => recordTiming("plot render", started, `${points} points, ${traceType}`));
     if (resizeObserver) {
       resizeObserver.disconnect();
     }
@@ -218,29 +346,109 @@ function renderPlot(plotConfig, sqlResult) {
   });
 }
 
-async function runSql(sql) {
+async function fetchPlotData(sql, plotConfig) {
   if (!sql) {
     setPlotStatus("No SQL to run.");
     return null;
   }
   setPlotStatus("Running SQL for chart...");
   try {
-    const response = await fetch("/run_sql", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ sql }),
-    });
-    if (!response.ok) {
-      const errorText = await response.text();
-      throw new Error(errorText || "run_sql failed");
-    }
-    return await response.json();
+    const started = performance.now();
+    const data = await fetchJson(
+      "/plot_data",
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ sql, plot_config: plotConfig }),
+      },
+      "plot_data failed",
+    );
+    recordTiming("plot_data fetch", started);
+    return data.plot_data || null;
   } catch (error) {
     setPlotStatus(`SQL error: ${error.message}`, true);
     return null;
   }
 }
 
+async function fetchTablePage(source, cursor) {
+  if (source.resultId) {
+    const params = new URLSearchParams({ page_size: String(TABLE_PAGE_SIZE) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+    try {
+      return await fetchJson(`/results/${encodeURIComponent(source.resultId)}?${params}`, {}, "Loading rows failed");
+    } catch (error) {
+      if (error.status !== 404 || cursor) {
+        throw error;
+      }
+    }
+    // The stored result expired or is held by another worker; page the SQL instead.
+    source.resultId = null;
+  }
+  const body = { sql: source.sql, page_size: TABLE_PAGE_SIZE };
+  if (cursor) {
+    body.cursor = cursor;
+  }
+  return fetchJson(
+    "/run_sql",
+    {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    },
+    "run_sql failed",
+  );
+}
+
+async function pagedTable(sql, resultId, plotConfig) {
+  if (!sql) {
+    setPlotStatus("No SQL to run.");
+    return;
+  }
+  setPlotStatus("Running SQL for table...");
+  const source = { sql, resultId };
+  let table = null;
+  let nextCursor = null;
+  let loading = false;
+
+  async function loadPage(cursor) {
+    loading = true;
+    try {
+      const started = performance.now();
+      const page = await fetchTablePage(source, cursor);
+      recordTiming("table page fetch", started, `${(page.rows || []).length} rows`);
+      if (!table) {
+        const columns = page.columns || [];
+        const layout = tableLayout(columns, plotConfig.columns);
+        const columnIndexes = layout.visibleColumns.map((col) => columns.indexOf(col));
+        // Scrolling near the last loaded row fetches the next page.
+        table = createVirtualTable(layout.headerLabels, columnIndexes, () => {
+          if (nextCursor && !loading) {
+            loadPage(nextCursor);
+          }
+        });
+      }
+      nextCursor = page.next_cursor || null;
+      table.append(page.rows || []);
+      const total = typeof page.row_count === "number" ? ` of ${page.row_count}` : "";
+      if (!table.rowCount) {
+        setPlotStatus("Query returned no rows.");
+      } else {
+        setPlotStatus(nextCursor ? `Loaded ${table.rowCount}${total} rows; scroll for more.` : "");
+      }
+    } catch (error) {
+      nextCursor = null;
+      setPlotStatus(`SQL error: ${error.message}`, true);
+    } finally {
+      loading = false;
+    }
+  }
+
+  await loadPage(null);
+}
+
 async function askQuestion() {
   const question = elements.question.value.trim();
   if (!question) {
@@ -254,28 +462,41 @@ async function askQuestion() {
   renderAnswer("");
   renderSql("");
   clearPlot();
+  resetTimings();
 
   try {
-    const response = await fetch("/ask", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ question }),
-    });
-    if (!response.ok) {
-      const errorText = await response.text();
-      throw new Error(errorText || "Ask failed");
-    }
-    const data = await response.json();
+    const started = performance.now();
+    const data = await fetchJson(
+      "/ask",
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ question, session_id: state.sessionId }),
+      },
+      "Ask failed",
+    );
+    recordTiming("ask", started);
+    state.sessionId = data.session_id || null;
     state.answer = data.answer || "";
     state.plotConfig = data.plot_config || null;
     state.sql = data.sql || "";
+    state.resultId = data.result_id || null;
 
     renderAnswer(state.answer);
     renderSql(state.sql);
 
-    const sqlResult = await runSql(state.sql);
-    state.sqlResult = sqlResult;
-    renderPlot(state.plotConfig, state.sqlResult);
+    const plotType = state.plotConfig && state.plotConfig.type;
+    state.plotData = null;
+    if (plotType === "table") {
+      await pagedTable(state.sql, state.resultId, state.plotConfig);
+    } else if (!plotType || plotType === "none" || plotType === "error") {
+      renderPlot(state.plotConfig, null);
+    } else {
+      state.plotData = await fetchPlotData(state.sql, state.plotConfig);
+      if (state.plotData) {
+        renderPlot(state.plotConfig, state.plotData);
+      }
+    }
   } catch (error) {
     setStatus(`Error: ${error.message}`, true);
     renderAnswer("No answer available.");
@@ -284,7 +505,19 @@ async function askQuestion() {
   }
 }
 
+function newConversation() {
+  if (state.sessionId) {
+    fetch(`/conversations/${encodeURIComponent(state.sessionId)}`, { method: "DELETE" }).catch(() => {});
+  }
+  state.sessionId = null;
+  elements.question.value = "";
+  elements.question.focus();
+  setStatus("Started a new conversation.");
+  setTimeout(() => setStatus(""), 2000);
+}
+
 elements.askButton.addEventListener("click", askQuestion);
+elements.newConversation.addEventListener("click", newConversation);
 elements.copySql.addEventListener("click", () => {
   if (!state.sql) {
     return;
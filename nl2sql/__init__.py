@@ -1,3 +1,11 @@
-from .agent import root_agent
-
 __all__ = ["root_agent"]
+
+
+def __getattr__(name: str):
+    # Built on first access so config and model hooks can be set up before the
+    # agents (and their models) are constructed.
+    if name == "root_agent":
+        from .agent import root_agent
+
+        return root_agent
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
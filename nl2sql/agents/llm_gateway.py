@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import AsyncGenerator, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from ..config import load_config
+from ..utils import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Completion tokens assumed at admission; corrected from usage_metadata afterwards.
+_EXPECTED_OUTPUT_TOKENS = 256
+
+_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+class LlmAdmissionError(Exception):
+    """An LLM call was rejected because it could not start before the request deadline."""
+
+    def __init__(self, model: str, message: str, retry_after: float) -> None:
+        super().__init__(f"{model}: {message}")
+        self.model = model
+        self.retry_after = retry_after
+
+
+@contextmanager
+def llm_request_scope(priority: int = INTERACTIVE, deadline: Optional[float] = None) -> Iterator[None]:
+    """Set the priority and time.monotonic() deadline for LLM calls made inside the block.
+
+    Lower priority values are admitted first. Tasks started inside the block
+    (agent runs, sub-agents) inherit both values.
+    """
+    priority_token = _PRIORITY.set(priority)
+    deadline_token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(deadline_token)
+        _PRIORITY.reset(priority_token)
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; 0 means unlimited."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        if self.capacity:
+            self._refill(now)
+            self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, when negative, charge) the difference from the estimate."""
+        if self.capacity:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class ModelGate:
+    """Concurrency slots, priority queue and request/token buckets for one model."""
+
+    def __init__(self, name: str, concurrency: int, requests_per_minute: float, tokens_per_minute: float) -> None:
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.active = 0
+        self.avg_latency = 1.0
+        self.latencies: deque = deque(maxlen=256)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+
+    def _queued_ahead(self, priority: int) -> int:
+        return sum(1 for waiter_priority, _, future in self._waiters if waiter_priority <= priority and not future.done())
+
+    def estimate_wait(self, priority: int, tokens: float) -> float:
+        now = time.monotonic()
+        ahead = self._queued_ahead(priority)
+        slot_wait = 0.0
+        if self.active + ahead >= self.concurrency:
+            slot_wait = (ahead + 1) / self.concurrency * self.avg_latency
+        bucket_wait = max(self.requests.time_until(1, now), self.tokens.time_until(tokens, now))
+        return slot_wait + bucket_wait
+
+    def latency_percentile(self, percentile: float, min_samples: int) -> Optional[float]:
+        """Recent completed-call latency at percentile, once min_samples calls finished."""
+        if len(self.latencies) < max(1, min_samples):
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered), max(1, int(round(percentile / 100.0 * len(ordered)))))
+        return ordered[rank - 1]
+
+    def _reject(self, message: str, retry_after: float) -> LlmAdmissionError:
+        self.rejected += 1
+        metrics.increment("llm_rejected", model=self.name)
+        return LlmAdmissionError(self.name, message, retry_after)
+
+    async def acquire(self, priority: int, tokens: float, deadline: Optional[float]) -> None:
+        estimate = self.estimate_wait(priority, tokens)
+        if deadline is not None and time.monotonic() + estimate > deadline:
+            raise self._reject(f"queue wait ~{estimate:.1f}s exceeds the request deadline", estimate)
+
+        if self.active >= self.concurrency or self._queued_ahead(priority):
+            future = asyncio.get_running_loop().create_future()
+            entry = (priority, next(self._order), future)
+            heapq.heappush(self._waiters, entry)
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            except asyncio.TimeoutError:
+                if future.done() and not future.cancelled():
+                    # The slot was handed over just as the wait timed out.
+                    self.release()
+                future.cancel()
+                raise self._reject("timed out waiting for a concurrency slot", self.avg_latency) from None
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()
+                future.cancel()
+                raise
+        else:
+            self.active += 1
+
+        now = time.monotonic()
+        delay = max(self.requests.time_until(1, now), self.tokens.time_until(tokens, now))
+        if delay:
+            if deadline is not None and now + delay > deadline:
+                self.release()
+                raise self._reject("rate limit budget exhausted until after the deadline", delay)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+            now = time.monotonic()
+        self.requests.consume(1, now)
+        self.tokens.consume(tokens, now)
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the next waiter; active stays the same.
+                future.set_result(None)
+                return
+        self.active = max(0, self.active - 1)
+
+    def record(self, latency: float, estimated_tokens: float, used_tokens: Optional[int], completed: bool) -> None:
+        metrics.increment("llm_calls", model=self.name, outcome="completed" if completed else "aborted")
+        if used_tokens is not None:
+            self.tokens.refund(estimated_tokens - used_tokens)
+            metrics.increment("llm_tokens", used_tokens, model=self.name)
+        if completed:
+            # Aborted (cancelled or failed) calls would skew the hedge delay.
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+            self.latencies.append(latency)
+            metrics.observe("llm_latency_seconds", latency, model=self.name)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "active": self.active,
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+            "concurrency": self.concurrency,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_latency_s": round(self.avg_latency, 3),
+        }
+
+
+_GATES: Dict[str, ModelGate] = {}
+_GATES_LOCK = threading.Lock()
+
+
+def get_gate(name: str) -> ModelGate:
+    with _GATES_LOCK:
+        if name not in _GATES:
+            config = load_config()
+            _GATES[name] = ModelGate(
+                name,
+                concurrency=config.llm_max_concurrency,
+                requests_per_minute=config.llm_requests_per_minute,
+                tokens_per_minute=config.llm_tokens_per_minute,
+            )
+        return _GATES[name]
+
+
+def gate_snapshots() -> Dict[str, Dict[str, object]]:
+    with _GATES_LOCK:
+        return {name: gate.snapshot() for name, gate in _GATES.items()}
+
+
+def _estimate_prompt_tokens(llm_request: LlmRequest) -> int:
+    characters = 0
+    instruction = getattr(llm_request.config, "system_instruction", None)
+    if isinstance(instruction, str):
+        characters += len(instruction)
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                characters += len(part.text)
+            elif part.function_call is not None or part.function_response is not None:
+                characters += len(str(part.function_call or part.function_response))
+    return characters // 4 + 1
+
+
+def _hedge_delay(gate: ModelGate) -> Optional[float]:
+    config = load_config()
+    if config.llm_hedge_percentile <= 0:
+        return None
+    return gate.latency_percentile(config.llm_hedge_percentile, config.llm_hedge_min_samples)
+
+
+class GatedLlm(BaseLlm):
+    """Wraps a model so every call passes its deployment's ModelGate first."""
+
+    inner: BaseLlm
+    gate_name: str
+
+    @property
+    def capabilities(self):
+        return self.inner.capabilities
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return []
+
+    async def _gated_stream(
+        self, llm_request: LlmRequest, stream: bool, estimated: int
+    ) -> AsyncGenerator[LlmResponse, None]:
+        gate = get_gate(self.gate_name)
+        await gate.acquire(_PRIORITY.get(), estimated, _DEADLINE.get())
+        started = time.monotonic()
+        used_tokens = None
+        completed = False
+        last = None
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                usage = response.usage_metadata
+                if usage is not None and usage.total_token_count:
+                    used_tokens = usage.total_token_count
+                if last is not None:
+                    yield last
+                last = response
+            completed = True
+        finally:
+            gate.record(time.monotonic() - started, estimated, used_tokens, completed)
+            gate.release()
+        # The final response is yielded after the slot is released: the caller runs
+        # its tool calls (and nested agents needing slots) while consuming it.
+        if last is not None:
+            yield last
+
+    async def _collect(self, llm_request: LlmRequest, estimated: int) -> List[LlmResponse]:
+        return [response async for response in self._gated_stream(llm_request, False, estimated)]
+
+    async def _hedged(self, llm_request: LlmRequest, estimated: int, delay: float) -> List[LlmResponse]:
+        """Send a duplicate if the first call outlives delay; keep whichever succeeds first."""
+        primary = asyncio.ensure_future(self._collect(llm_request, estimated))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            duplicate = llm_request.model_copy(update={"contents": list(llm_request.contents)})
+            hedge = asyncio.ensure_future(self._collect(duplicate, estimated))
+            tasks.append(hedge)
+            metrics.increment("llm_hedges_sent", model=self.gate_name)
+            metrics.increment("llm_hedge_extra_tokens", estimated, model=self.gate_name)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.increment("llm_hedges_won", model=self.gate_name)
+                        return task.result()
+            raise primary.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        estimated = _estimate_prompt_tokens(llm_request) + _EXPECTED_OUTPUT_TOKENS
+        delay = None if stream else _hedge_delay(get_gate(self.gate_name))
+        if delay is None:
+            async for response in self._gated_stream(llm_request, stream, estimated):
+                yield response
+            return
+        for response in await self._hedged(llm_request, estimated, delay):
+            yield response
@@ -1,18 +1,67 @@
 from __future__ import annotations
-from google.adk.models.lite_llm import LiteLlm
+from typing import Callable
+
+from google.adk.models.base_llm import BaseLlm
+
 from ..config import load_config, require_ai_model
+from .llm_gateway import GatedLlm
+from .router import RoutedLlm
+
+ModelFactory = Callable[[str], BaseLlm]
+
+_GATED: dict[str, GatedLlm] = {}
+_MODELS: dict[str, BaseLlm] = {}
+_MODEL_FACTORY: ModelFactory | None = None
+
+
+def set_model_factory(factory: ModelFactory | None) -> None:
+    """Build agent models with factory(deployment) instead of LiteLlm.
+
+    Used by the offline benchmarks to plug in a scripted model. Agents pick up
+    their model when they are built, so call this before importing them.
+    """
+    global _MODEL_FACTORY
+    _MODEL_FACTORY = factory
+    _GATED.clear()
+    _MODELS.clear()
+
+
+def _gated_model(deployment_name: str) -> GatedLlm:
+    if deployment_name not in _GATED:
+        if _MODEL_FACTORY is not None:
+            inner = _MODEL_FACTORY(deployment_name)
+        else:
+            # litellm is slow to import; only load it when a real model is built.
+            from google.adk.models.lite_llm import LiteLlm
 
-_MODELS: dict[str, LiteLlm] = {}
+            config = load_config()
+            inner = LiteLlm(
+                model=f"azure/{deployment_name}",
+                api_key=config.ai_api_key,
+                api_base=config.ai_endpoint,
+                api_version=config.ai_version,
+            )
+        # Every agent sharing a deployment shares its concurrency and rate limits.
+        _GATED[deployment_name] = GatedLlm(model=inner.model, inner=inner, gate_name=deployment_name)
+    return _GATED[deployment_name]
 
 
-def get_model(deployment: str | None = None) -> LiteLlm:
+def get_model(deployment: str | None = None) -> BaseLlm:
     config = load_config()
-    deployment_name = deployment or require_ai_model(config)
+    if _MODEL_FACTORY is not None:
+        deployment_name = deployment or config.ai_model or "default"
+    else:
+        deployment_name = deployment or require_ai_model(config)
     if deployment_name not in _MODELS:
-        _MODELS[deployment_name] = LiteLlm(
-            model=f"azure/{deployment_name}",
-            api_key=config.ai_api_key,
-            api_base=config.ai_endpoint,
-            api_version=config.ai_version,
-        )
+        strong = _gated_model(deployment_name)
+        fast_name = config.fast_model
+        if fast_name and fast_name != deployment_name:
+            # The per-request model tier (see router.model_tier_scope) picks one.
+            _MODELS[deployment_name] = RoutedLlm(
+                model=strong.model,
+                strong=strong,
+                fast=_gated_model(fast_name),
+            )
+        else:
+            _MODELS[deployment_name] = strong
     return _MODELS[deployment_name]
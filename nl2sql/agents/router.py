@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import contextvars
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncGenerator, Iterator, List, Sequence, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from ..utils import metrics
+
+FAST = "fast"
+STRONG = "strong"
+
+_TIER: contextvars.ContextVar[str] = contextvars.ContextVar("model_tier", default=STRONG)
+
+_JOIN_HINTS = re.compile(
+    r"\b(join|joined|combine|combined|compare|comparison|versus|vs\.?|relative to|against|across|match(?:ing)?)\b",
+    re.IGNORECASE,
+)
+_AGGREGATE_HINTS = re.compile(
+    r"\b(average|avg|mean|median|sum|total|count|how many|per|group(?:ed)? by|by each|top \d+|rank(?:ing)?|"
+    r"ratio|share|percent(?:age)?|distribution|growth|change|trend|year over year|yoy|cumulative|running)\b",
+    re.IGNORECASE,
+)
+_HARD_HINTS = re.compile(
+    r"\b(for each .+ (?:and|then)|excluding|except|only those|having|at least|more than|less than|"
+    r"between .+ and|window|percentile|moving average|rolling|correlat\w*|deduplicat\w*|latest .+ per)\b",
+    re.IGNORECASE,
+)
+_LARGE_RESULT_HINTS = re.compile(
+    r"\b(all|every|each|full list|raw|daily|hourly|per day|per hour|history|top \d{3,})\b",
+    re.IGNORECASE,
+)
+_MULTI_PART = re.compile(r"\?.+\?|;|\b(and also|as well as|additionally|then also)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    tier: str
+    score: int
+    reasons: Tuple[str, ...]
+
+
+def _tables_mentioned(question: str, tables: Sequence[str]) -> List[str]:
+    lowered = question.lower()
+    mentioned = []
+    for table in tables:
+        name = table.lower()
+        variants = {name, name.replace("_", " ")}
+        variants.update(variant.rstrip("s") for variant in list(variants))
+        if any(re.search(rf"\b{re.escape(variant)}", lowered) for variant in variants if variant):
+            mentioned.append(table)
+    return mentioned
+
+
+def classify_question(question: str, tables: Sequence[str], threshold: int) -> RouteDecision:
+    """Score a question's SQL complexity from local signals; below threshold goes FAST.
+
+    Signals: allowed tables named in the question (a join when more than one),
+    join/comparison wording, aggregation wording, filters that need careful SQL,
+    large result hints, multi-part questions and length.
+    """
+    score = 0
+    reasons: List[str] = []
+    mentioned = _tables_mentioned(question, tables)
+    if len(mentioned) > 1:
+        score += 3
+        reasons.append(f"tables:{len(mentioned)}")
+    if _JOIN_HINTS.search(question):
+        score += 2
+        reasons.append("join")
+    aggregates = len(_AGGREGATE_HINTS.findall(question))
+    if aggregates:
+        score += min(aggregates, 2)
+        reasons.append(f"aggregations:{aggregates}")
+    if _HARD_HINTS.search(question):
+        score += 2
+        reasons.append("complex_filter")
+    if _LARGE_RESULT_HINTS.search(question):
+        score += 1
+        reasons.append("large_result")
+    if _MULTI_PART.search(question):
+        score += 2
+        reasons.append("multi_part")
+    if len(question.split()) > 25:
+        score += 1
+        reasons.append("long")
+    tier = FAST if score < threshold else STRONG
+    return RouteDecision(tier=tier, score=score, reasons=tuple(reasons))
+
+
+@contextmanager
+def model_tier_scope(tier: str) -> Iterator[None]:
+    """Route LLM calls made inside the block (and tasks started from it) to tier."""
+    token = _TIER.set(tier)
+    try:
+        yield
+    finally:
+        _TIER.reset(token)
+
+
+def current_tier() -> str:
+    return _TIER.get()
+
+
+class RoutedLlm(BaseLlm):
+    """Sends each call to the fast or strong model chosen by the current model tier."""
+
+    strong: BaseLlm
+    fast: BaseLlm
+
+    @property
+    def capabilities(self):
+        return self.strong.capabilities
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        tier = _TIER.get()
+        model = self.fast if tier == FAST else self.strong
+        started = time.monotonic()
+        completed = False
+        try:
+            async for response in model.generate_content_async(llm_request, stream=stream):
+                yield response
+            completed = True
+        finally:
+            if completed:
+                metrics.observe("llm_tier_latency_seconds", time.monotonic() - started, tier=tier)
+            metrics.increment("llm_tier_calls", tier=tier, model=model.model)
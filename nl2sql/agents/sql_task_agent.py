@@ -2,7 +2,8 @@ import os
 
 from google.adk.agents import Agent
 
-from ..tools.sql import generate_sql, run_sql
+from ..tools.sql.generate_sql import generate_sql
+from ..tools.sql.run_sql import run_sql
 from ..utils import load_prompt
 from .model_provider import get_model
 
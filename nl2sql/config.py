@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional
 
@@ -37,6 +37,70 @@ class AppConfig:
     db_schema: str
     allowed_tables: List[str]
     max_rows: int
+    mysql_pool_size: int = 5
+    mysql_pool_timeout: float = 10.0
+    sql_max_parallel_statements: int = 4
+    sql_tool_sample_rows: int = 5
+    stream_batch_size: int = 1000
+    stream_max_hold_seconds: float = 30.0
+    plot_max_points: int = 2000
+    plot_max_categories: int = 30
+    plot_max_series: int = 20
+    sqlite_path: Optional[str] = None
+    llm_max_concurrency: int = 8
+    llm_requests_per_minute: float = 0.0
+    llm_tokens_per_minute: float = 0.0
+    ask_timeout_seconds: float = 120.0
+    llm_hedge_percentile: float = 0.0
+    llm_hedge_min_samples: int = 20
+    sql_speculative_candidates: int = 1
+    fast_model: Optional[str] = None
+    router_threshold: int = 3
+    conversation_ttl_seconds: float = 1800.0
+    conversation_max_sessions: int = 1000
+    conversation_max_bytes: int = 32 * 1024 * 1024
+    conversation_summary_rows: int = 5
+    conversation_backend: str = "memory"
+    conversation_sqlite_path: str = "conversations.db"
+    session_memory_budget_bytes: int = 256 * 1024 * 1024
+    session_ttl_seconds: float = 600.0
+    jobs_workers: int = 2
+    jobs_max_queued: int = 100
+    jobs_timeout_seconds: float = 900.0
+    jobs_retention_seconds: float = 3600.0
+    jobs_max_retained: int = 1000
+    batch_max_questions: int = 50
+    batch_max_concurrency: int = 4
+    result_store_max_bytes: int = 256 * 1024 * 1024
+    result_ttl_seconds: float = 900.0
+    result_spill_dir: Optional[str] = None
+    result_spill_threshold_bytes: int = 64 * 1024 * 1024
+    result_spill_max_bytes: int = 4 * 1024 * 1024 * 1024
+    result_page_max_rows: int = 10000
+    sql_prepared_statements: bool = False
+    sql_prepared_cache_size: int = 32
+    sql_template_stats_max: int = 500
+    sql_explain_ttl_seconds: float = 3600.0
+    query_log_path: Optional[str] = None
+    query_log_batch_size: int = 200
+    query_log_flush_seconds: float = 1.0
+    query_log_max_queued: int = 10000
+    schema_cache_ttl_seconds: float = 300.0
+    warmup_enabled: bool = True
+    warmup_sql: Optional[str] = None
+    warmup_top_queries: int = 20
+    warmup_queries_per_second: float = 2.0
+    warmup_max_seconds: float = 120.0
+    incremental_refresh: bool = False
+    incremental_cache_max_bytes: int = 64 * 1024 * 1024
+    incremental_full_refresh_seconds: float = 3600.0
+    incremental_updated_at_column: str = ""
+    compression_encodings: List[str] = field(default_factory=lambda: ["zstd", "br", "gzip"])
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_zstd_level: int = 3
+    compression_brotli_quality: int = 4
+    http_etags: bool = True
 
 
 def _split_csv(value: Optional[str]) -> List[str]:
@@ -45,23 +109,27 @@ def _split_csv(value: Optional[str]) -> List[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
-def load_config() -> AppConfig:
-    allowed_tables = _split_csv(os.getenv("ALLOWED_TABLES"))
-    target_table = os.getenv("TARGET_TABLE")
-    if target_table and target_table not in allowed_tables:
-        allowed_tables.append(target_table)
-
-    max_rows_raw = os.getenv("MAX_ROWS", "200").strip()
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, str(default)).strip()
     try:
-        max_rows = int(max_rows_raw)
+        return int(raw)
     except ValueError:
-        max_rows = 200
+        return default
+
 
-    mysql_port_raw = os.getenv("MYSQL_PORT", "3306").strip()
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, str(default)).strip()
     try:
-        mysql_port = int(mysql_port_raw)
+        return float(raw)
     except ValueError:
-        mysql_port = 3306
+        return default
+
+
+def load_config() -> AppConfig:
+    allowed_tables = _split_csv(os.getenv("ALLOWED_TABLES"))
+    target_table = os.getenv("TARGET_TABLE")
+    if target_table and target_table not in allowed_tables:
+        allowed_tables.append(target_table)
 
     return AppConfig(
         ai_api_key=os.getenv("AI_API_KEY"),
@@ -69,14 +137,83 @@ def load_config() -> AppConfig:
         ai_version=os.getenv("AI_API_VERSION", "2025-01-01-preview"),
         ai_model=os.getenv("AI_MODEL"),
         mysql_host=os.getenv("MYSQL_HOST"),
-        mysql_port=mysql_port,
+        mysql_port=_env_int("MYSQL_PORT", 3306),
         mysql_user=os.getenv("MYSQL_USER"),
         mysql_password=os.getenv("MYSQL_PASSWORD"),
         mysql_database=os.getenv("MYSQL_DATABASE"),
         db_type=os.getenv("DB_TYPE", "mysql").strip().lower(),
         db_schema=os.getenv("DB_SCHEMA", "public"),
         allowed_tables=allowed_tables,
-        max_rows=max_rows,
+        max_rows=_env_int("MAX_ROWS", 200),
+        mysql_pool_size=max(1, _env_int("MYSQL_POOL_SIZE", 5)),
+        mysql_pool_timeout=_env_float("MYSQL_POOL_TIMEOUT", 10.0),
+        sql_max_parallel_statements=max(1, _env_int("SQL_MAX_PARALLEL_STATEMENTS", 4)),
+        sql_tool_sample_rows=max(0, _env_int("SQL_TOOL_SAMPLE_ROWS", 5)),
+        stream_batch_size=max(1, _env_int("STREAM_BATCH_SIZE", 1000)),
+        stream_max_hold_seconds=max(0.0, _env_float("STREAM_MAX_HOLD_SECONDS", 30.0)),
+        plot_max_points=max(3, _env_int("PLOT_MAX_POINTS", 2000)),
+        plot_max_categories=max(2, _env_int("PLOT_MAX_CATEGORIES", 30)),
+        plot_max_series=max(2, _env_int("PLOT_MAX_SERIES", 20)),
+        sqlite_path=os.getenv("SQLITE_PATH"),
+        llm_max_concurrency=max(1, _env_int("LLM_MAX_CONCURRENCY", 8)),
+        llm_requests_per_minute=max(0.0, _env_float("LLM_REQUESTS_PER_MINUTE", 0.0)),
+        llm_tokens_per_minute=max(0.0, _env_float("LLM_TOKENS_PER_MINUTE", 0.0)),
+        ask_timeout_seconds=max(1.0, _env_float("ASK_TIMEOUT_SECONDS", 120.0)),
+        llm_hedge_percentile=min(100.0, max(0.0, _env_float("LLM_HEDGE_PERCENTILE", 0.0))),
+        llm_hedge_min_samples=max(1, _env_int("LLM_HEDGE_MIN_SAMPLES", 20)),
+        sql_speculative_candidates=max(1, _env_int("SQL_SPECULATIVE_CANDIDATES", 1)),
+        fast_model=os.getenv("FAST_MODEL") or None,
+        router_threshold=max(1, _env_int("ROUTER_THRESHOLD", 3)),
+        conversation_ttl_seconds=max(1.0, _env_float("CONVERSATION_TTL_SECONDS", 1800.0)),
+        conversation_max_sessions=max(1, _env_int("CONVERSATION_MAX_SESSIONS", 1000)),
+        conversation_max_bytes=max(1024, _env_int("CONVERSATION_MAX_BYTES", 32 * 1024 * 1024)),
+        conversation_summary_rows=max(0, _env_int("CONVERSATION_SUMMARY_ROWS", 5)),
+        conversation_backend=os.getenv("CONVERSATION_BACKEND", "memory").strip().lower(),
+        conversation_sqlite_path=os.getenv("CONVERSATION_SQLITE_PATH", "conversations.db"),
+        session_memory_budget_bytes=max(1024 * 1024, _env_int("SESSION_MEMORY_BUDGET_BYTES", 256 * 1024 * 1024)),
+        session_ttl_seconds=max(1.0, _env_float("SESSION_TTL_SECONDS", 600.0)),
+        jobs_workers=max(1, _env_int("JOBS_WORKERS", 2)),
+        jobs_max_queued=max(1, _env_int("JOBS_MAX_QUEUED", 100)),
+        jobs_timeout_seconds=max(1.0, _env_float("JOBS_TIMEOUT_SECONDS", 900.0)),
+        jobs_retention_seconds=max(1.0, _env_float("JOBS_RETENTION_SECONDS", 3600.0)),
+        jobs_max_retained=max(1, _env_int("JOBS_MAX_RETAINED", 1000)),
+        batch_max_questions=max(1, _env_int("BATCH_MAX_QUESTIONS", 50)),
+        batch_max_concurrency=max(1, _env_int("BATCH_MAX_CONCURRENCY", 4)),
+        result_store_max_bytes=max(1024 * 1024, _env_int("RESULT_STORE_MAX_BYTES", 256 * 1024 * 1024)),
+        result_ttl_seconds=max(1.0, _env_float("RESULT_TTL_SECONDS", 900.0)),
+        result_spill_dir=os.getenv("RESULT_SPILL_DIR") or None,
+        result_spill_threshold_bytes=max(
+            1024 * 1024, _env_int("RESULT_SPILL_THRESHOLD_BYTES", 64 * 1024 * 1024)
+        ),
+        result_spill_max_bytes=max(1024 * 1024, _env_int("RESULT_SPILL_MAX_BYTES", 4 * 1024 * 1024 * 1024)),
+        result_page_max_rows=max(1, _env_int("RESULT_PAGE_MAX_ROWS", 10000)),
+        sql_prepared_statements=os.getenv("SQL_PREPARED_STATEMENTS", "false").strip().lower()
+        in {"1", "true", "yes"},
+        sql_prepared_cache_size=max(1, _env_int("SQL_PREPARED_CACHE_SIZE", 32)),
+        sql_template_stats_max=max(1, _env_int("SQL_TEMPLATE_STATS_MAX", 500)),
+        sql_explain_ttl_seconds=max(1.0, _env_float("SQL_EXPLAIN_TTL_SECONDS", 3600.0)),
+        query_log_path=os.getenv("QUERY_LOG_PATH") or None,
+        query_log_batch_size=max(1, _env_int("QUERY_LOG_BATCH_SIZE", 200)),
+        query_log_flush_seconds=max(0.05, _env_float("QUERY_LOG_FLUSH_SECONDS", 1.0)),
+        query_log_max_queued=max(1, _env_int("QUERY_LOG_MAX_QUEUED", 10000)),
+        schema_cache_ttl_seconds=max(0.0, _env_float("SCHEMA_CACHE_TTL_SECONDS", 300.0)),
+        warmup_enabled=os.getenv("WARMUP_ENABLED", "true").strip().lower() in {"1", "true", "yes"},
+        warmup_sql=os.getenv("WARMUP_SQL") or None,
+        warmup_top_queries=max(0, _env_int("WARMUP_TOP_QUERIES", 20)),
+        warmup_queries_per_second=max(0.1, _env_float("WARMUP_QUERIES_PER_SECOND", 2.0)),
+        warmup_max_seconds=max(1.0, _env_float("WARMUP_MAX_SECONDS", 120.0)),
+        incremental_refresh=os.getenv("INCREMENTAL_REFRESH", "").strip().lower() in {"1", "true", "yes"},
+        incremental_cache_max_bytes=max(1024 * 1024, _env_int("INCREMENTAL_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+        incremental_full_refresh_seconds=max(1.0, _env_float("INCREMENTAL_FULL_REFRESH_SECONDS", 3600.0)),
+        incremental_updated_at_column=os.getenv("INCREMENTAL_UPDATED_AT_COLUMN", "").strip(),
+        compression_encodings=[
+            name.lower() for name in _split_csv(os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip"))
+        ],
+        compression_min_bytes=max(0, _env_int("COMPRESSION_MIN_BYTES", 1024)),
+        compression_gzip_level=min(9, max(1, _env_int("COMPRESSION_GZIP_LEVEL", 6))),
+        compression_zstd_level=min(22, max(1, _env_int("COMPRESSION_ZSTD_LEVEL", 3))),
+        compression_brotli_quality=min(11, max(0, _env_int("COMPRESSION_BROTLI_QUALITY", 4))),
+        http_etags=os.getenv("HTTP_ETAGS", "true").strip().lower() in {"1", "true", "yes"},
     )
 
 
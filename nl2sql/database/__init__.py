@@ -1,3 +1,30 @@
-from .mysql_client import get_mysql_connection
+from .connection import (
+    TableVersion,
+    abandon_unread_result,
+    active_dialect,
+    execute_template,
+    pooled_connection,
+    snapshot_connection,
+    table_version,
+)
+from .mysql_client import (
+    PoolTimeoutError,
+    get_mysql_connection,
+    pooled_mysql_connection,
+)
+from .sqlite_client import close_sqlite_pool, pooled_sqlite_connection
 
-__all__ = ["get_mysql_connection"]
+__all__ = [
+    "PoolTimeoutError",
+    "TableVersion",
+    "abandon_unread_result",
+    "active_dialect",
+    "close_sqlite_pool",
+    "execute_template",
+    "get_mysql_connection",
+    "pooled_connection",
+    "pooled_mysql_connection",
+    "pooled_sqlite_connection",
+    "snapshot_connection",
+    "table_version",
+]
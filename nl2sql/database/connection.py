@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from ..config import load_config
+from ..utils.sql_dialect import normalize_db_type
+from . import mysql_client
+from .sqlite_client import pooled_sqlite_connection
+
+
+def active_dialect() -> str:
+    return normalize_db_type(load_config().db_type)
+
+
+@contextmanager
+def pooled_connection() -> Iterator[object]:
+    """Borrow a pooled connection for the configured DB_TYPE (MySQL unless sqlite)."""
+    if active_dialect() == "sqlite":
+        with pooled_sqlite_connection() as connection:
+            yield connection
+    else:
+        with mysql_client.pooled_mysql_connection() as connection:
+            yield connection
+
+
+@contextmanager
+def snapshot_connection() -> Iterator[object]:
+    """Borrow a pooled connection inside one read-only transaction.
+
+    Every statement run on it reads the same snapshot of the data: MySQL starts
+    a consistent-snapshot transaction, SQLite holds a single read transaction.
+    The transaction is rolled back on exit.
+    """
+    with pooled_connection() as connection:
+        if isinstance(connection, sqlite3.Connection):
+            connection.execute("BEGIN")
+            try:
+                yield connection
+            finally:
+                try:
+                    connection.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+        else:
+            with mysql_client.snapshot_transaction(connection):
+                yield connection
+
+
+def abandon_unread_result(connection) -> None:
+    """Release a connection whose result was not fully read."""
+    if isinstance(connection, sqlite3.Connection):
+        # SQLite has no socket to drop; the unread statement is finalized with its cursor.
+        return
+    mysql_client.abandon_unread_result(connection)
+
+
+def execute_template(connection, cursor, statement: str, key: str, template: str, params: Sequence[object]):
+    """Run statement as its parameterized template (see fingerprint_sql); return the cursor with the result.
+
+    MySQL uses server-side prepared statements cached per connection; sqlite3
+    already reuses compiled statements per connection keyed by the SQL text.
+    When the template fails, the original statement runs as plain text.
+    """
+    if isinstance(connection, sqlite3.Connection):
+        try:
+            cursor.execute(template, [float(value) if isinstance(value, Decimal) else value for value in params])
+        except sqlite3.Error:
+            cursor.execute(statement)
+        return cursor
+    cache_size = load_config().sql_prepared_cache_size
+    return mysql_client.execute_prepared(connection, cursor, statement, key, template, params, cache_size)
+
+
+class TableVersion(NamedTuple):
+    """When a table last changed, as far as the database reports it.
+
+    settled is True once updated_at is at least a second old: a write after
+    that point is guaranteed to move updated_at, whose resolution can be a
+    whole second.
+    """
+
+    updated_at: object
+    settled: bool
+
+
+def table_version(table: str) -> Optional[TableVersion]:
+    """The table's last-change marker, or None when the database cannot tell.
+
+    MySQL reports information_schema.TABLES.UPDATE_TIME; for sqlite the
+    database file's (and its WAL's) modification time stands for every table.
+    """
+    if active_dialect() == "sqlite":
+        path = load_config().sqlite_path
+        if not path:
+            return None
+        try:
+            updated_ns = max(
+                os.stat(candidate).st_mtime_ns for candidate in (path, path + "-wal") if os.path.exists(candidate)
+            )
+        except (OSError, ValueError):
+            return None
+        return TableVersion(updated_ns, time.time_ns() - updated_ns >= 1_000_000_000)
+    with pooled_connection() as connection:
+        updated_at, now = mysql_client.table_update_time(connection, table)
+    if updated_at is None:
+        return None
+    return TableVersion(updated_at, now is not None and (now - updated_at).total_seconds() >= 1)
@@ -1,37 +1,202 @@
 from __future__ import annotations
 
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Sequence, Tuple
+
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool, PooledMySQLConnection
 
 from ..config import load_config, require_mysql_config
+from ..utils import metrics
+from ..utils.query_log import record_cache_hit
 
 _CONNECTION: mysql.connector.MySQLConnection | None = None
+_POOL: MySQLConnectionPool | None = None
+_POOL_SLOTS: threading.BoundedSemaphore | None = None
+_POOL_LOCK = threading.Lock()
 
+# Prepared-statement cursors per physical connection: (connection_id, key -> (template, cursor)).
+_PREPARED: "weakref.WeakKeyDictionary[object, Tuple[int, OrderedDict]]" = weakref.WeakKeyDictionary()
+_PREPARED_LOCK = threading.Lock()
+# ER_UNSUPPORTED_PS: the statement cannot be prepared; it runs as plain text instead.
+_UNSUPPORTED_PS = 1295
 
-def get_mysql_connection() -> mysql.connector.MySQLConnection:
-    global _CONNECTION
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection frees up within MYSQL_POOL_TIMEOUT."""
+
+
+def _connect_kwargs() -> dict[str, object]:
     config = load_config()
     host, port, user, password, database = require_mysql_config(config)
+    return {
+        "host": host,
+        "port": port,
+        "user": user,
+        "password": password,
+        "database": database,
+        "autocommit": True,
+    }
+
+
+def get_mysql_connection() -> mysql.connector.MySQLConnection:
+    global _CONNECTION
+    connect_kwargs = _connect_kwargs()
 
     if _CONNECTION is None or not _CONNECTION.is_connected():
-        _CONNECTION = mysql.connector.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            autocommit=True,
-        )
+        _CONNECTION = mysql.connector.connect(**connect_kwargs)
     else:
         try:
             _CONNECTION.ping(reconnect=True, attempts=1, delay=0)
         except Error:
-            _CONNECTION = mysql.connector.connect(
-                host=host,
-                port=port,
-                user=user,
-                password=password,
-                database=database,
-                autocommit=True,
-            )
+            _CONNECTION = mysql.connector.connect(**connect_kwargs)
     return _CONNECTION
+
+
+def get_mysql_pool() -> tuple[MySQLConnectionPool, threading.BoundedSemaphore]:
+    global _POOL, _POOL_SLOTS
+    with _POOL_LOCK:
+        if _POOL is None:
+            pool_size = load_config().mysql_pool_size
+            _POOL = MySQLConnectionPool(
+                pool_name="nl2sql",
+                pool_size=pool_size,
+                pool_reset_session=False,
+                **_connect_kwargs(),
+            )
+            _POOL_SLOTS = threading.BoundedSemaphore(pool_size)
+    return _POOL, _POOL_SLOTS
+
+
+@contextmanager
+def pooled_mysql_connection() -> Iterator[PooledMySQLConnection]:
+    """Borrow a pooled connection, waiting up to MYSQL_POOL_TIMEOUT for a free slot."""
+    pool, slots = get_mysql_pool()
+    if not slots.acquire(timeout=load_config().mysql_pool_timeout):
+        raise PoolTimeoutError(msg="Timed out waiting for a pooled MySQL connection.")
+    try:
+        connection = pool.get_connection()
+        try:
+            yield connection
+        finally:
+            connection.close()
+    finally:
+        slots.release()
+
+
+def abandon_unread_result(connection) -> None:
+    """Disconnect a connection whose result was not fully read.
+
+    Draining the rest of a large unbuffered result would defeat streaming, so the
+    socket is dropped instead; the pool reconnects it on the next checkout.
+    """
+    try:
+        connection.disconnect()
+    except Error:
+        pass
+
+
+@contextmanager
+def snapshot_transaction(connection) -> Iterator[None]:
+    """Run the block in a read-only transaction WITH CONSISTENT SNAPSHOT, then roll it back.
+
+    The rollback is skipped quietly when the block dropped the socket (see
+    abandon_unread_result); the server ends the transaction with the session.
+    """
+    connection.start_transaction(consistent_snapshot=True, readonly=True)
+    try:
+        yield
+    finally:
+        try:
+            connection.rollback()
+        except Error:
+            pass
+
+
+def execute_prepared(
+    connection,
+    cursor,
+    statement: str,
+    key: str,
+    template: str,
+    params: Sequence[object],
+    cache_size: int,
+):
+    """Execute a fingerprinted template as a server-side prepared statement.
+
+    Each physical connection keeps up to cache_size prepared statements, least
+    recently used closed first, so a template is parsed once per connection.
+    A reconnect (e.g. after abandon_unread_result) starts a fresh cache. Returns
+    the cursor holding the result: the cached prepared cursor, or the plain
+    cursor running the original statement when the template fails for any
+    reason. A template that failed once runs as plain text on that connection
+    from then on.
+    """
+    raw = getattr(connection, "_cnx", connection)
+    with _PREPARED_LOCK:
+        connection_id, statements = _PREPARED.get(raw, (None, None))
+        if statements is None or connection_id != raw.connection_id:
+            statements = OrderedDict()
+            _PREPARED[raw] = (raw.connection_id, statements)
+    entry = statements.get(key)
+    if entry is not None and entry[1] is None:
+        statements.move_to_end(key)
+        cursor.execute(statement)
+        return cursor
+    if entry is None:
+        metrics.increment("sql_prepared_statements", outcome="prepared")
+        entry = (template, raw.cursor(prepared=True))
+        statements[key] = entry
+        while len(statements) > cache_size:
+            _, (_, evicted) = statements.popitem(last=False)
+            if evicted is not None:
+                evicted.close()
+    else:
+        metrics.increment("sql_prepared_statements", outcome="reused")
+        record_cache_hit("prepared_statement")
+        statements.move_to_end(key)
+    operation, prepared = entry
+    try:
+        # The driver re-prepares unless it is handed the identical operation object.
+        prepared.execute(operation, tuple(params))
+    except Error as exc:
+        # Not only 1295: a template the server rejects (e.g. 1064 for a ? where
+        # the grammar needs a literal) must not fail a statement that runs as text.
+        statements[key] = (operation, None)
+        try:
+            prepared.close()
+        except Error:
+            pass
+        outcome = "unsupported" if exc.errno == _UNSUPPORTED_PS else "failed"
+        metrics.increment("sql_prepared_statements", outcome=outcome)
+        cursor.execute(statement)
+        return cursor
+    return prepared
+
+
+def table_update_time(connection, table: str):
+    """(UPDATE_TIME, NOW()) for a table of the connected database.
+
+    UPDATE_TIME is None when the server does not track it (e.g. InnoDB before
+    the first write since a restart).
+    """
+    cursor = connection.cursor()
+    try:
+        try:
+            # MySQL 8 serves cached information_schema statistics for up to a day otherwise.
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        except Error:
+            pass
+        cursor.execute(
+            "SELECT UPDATE_TIME, NOW() FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,),
+        )
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return (row[0], row[1]) if row else (None, None)
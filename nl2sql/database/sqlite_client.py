@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+from ..config import load_config
+from .mysql_client import PoolTimeoutError
+
+# Called with every new SQLite connection, e.g. to install a trace callback.
+CONNECTION_HOOKS: List[Callable[[sqlite3.Connection], None]] = []
+
+_IDLE: queue.LifoQueue | None = None
+_SLOTS: threading.BoundedSemaphore | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    path = load_config().sqlite_path
+    if not path:
+        raise ValueError("Missing SQLITE_PATH in .env.")
+    # Read-only like the MySQL account the agents are expected to use.
+    connection = sqlite3.connect(
+        f"file:{path}?mode=ro",
+        uri=True,
+        check_same_thread=False,
+        isolation_level=None,
+    )
+    for hook in CONNECTION_HOOKS:
+        hook(connection)
+    return connection
+
+
+def _get_pool() -> tuple[queue.LifoQueue, threading.BoundedSemaphore]:
+    global _IDLE, _SLOTS
+    with _POOL_LOCK:
+        if _IDLE is None:
+            _IDLE = queue.LifoQueue()
+            _SLOTS = threading.BoundedSemaphore(load_config().mysql_pool_size)
+    return _IDLE, _SLOTS
+
+
+@contextmanager
+def pooled_sqlite_connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a read-only SQLite connection, bounded like the MySQL pool."""
+    idle, slots = _get_pool()
+    if not slots.acquire(timeout=load_config().mysql_pool_timeout):
+        raise PoolTimeoutError(msg="Timed out waiting for a pooled SQLite connection.")
+    try:
+        try:
+            connection = idle.get_nowait()
+        except queue.Empty:
+            connection = _connect()
+        try:
+            yield connection
+        finally:
+            idle.put(connection)
+    finally:
+        slots.release()
+
+
+def close_sqlite_pool() -> None:
+    """Close idle connections so the next checkout reopens SQLITE_PATH."""
+    global _IDLE, _SLOTS
+    with _POOL_LOCK:
+        idle, _IDLE, _SLOTS = _IDLE, None, None
+    while idle is not None:
+        try:
+            idle.get_nowait().close()
+        except queue.Empty:
+            break
@@ -4,7 +4,8 @@ PROMPT = (
     "- User question\n"
     "- Optional refinement\n"
     "- Target table name\n"
-    "- Table columns (name + type)\n\n"
+    "- Table columns (name + type)\n"
+    "- Optional previous question and previous SQL, when the question is a follow-up\n\n"
 
     "Rules:\n"
     "- Output SQL only (no JSON, no markdown).\n"
@@ -20,6 +21,8 @@ PROMPT = (
     "- If the user asks for aggregation or distribution, return raw rows for the "
     "relevant columns instead of using GROUP BY or aggregate functions.\n"
     "- Follow any dialect rules provided by the parent.\n"
+    "- If a previous SQL is provided and the question builds on it (e.g. 'now split that by currency'), "
+    "modify the previous SQL instead of starting over, keeping its filters unless the question changes them.\n"
     "- If a refinement is provided, always make sure that you always fulfill all the original user question as well. You must generate all queries that fulfill both user questions and refinement requirements.\n\n"
     
     "Examples (inputs include user question, refinement, target table, columns, dialect rules):\n"
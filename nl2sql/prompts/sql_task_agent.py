@@ -7,11 +7,15 @@ PROMPT = (
     "   - question: the question root agent provided to you\n"
     "   - refinement: the refinement requirement if provided\n"
     "   - table: the selected table name from the schema map\n"
-    "3) Call run_sql to execute the SQL.\n"
+    "3) Call run_sql to execute the SQL. It returns the columns, row count and a few sample rows; "
+    "the full result is kept for the next steps.\n"
     "If a refinement is provided, treat it as a hard requirement when choosing the table and generating SQL.\n"
     "If generate_sql or run_sql fails, retry once using the error message.\n"
     "If generate_sql failed to fulfill all the user requirements including the refinement (optional), call it again with a clearer and longer note about how to fulfill all requirements.\n"
     "Always select a table that exists in the provided schema map. Never invent table names.\n"
+    "If the request includes a previous turn, the question may be a follow-up to it: "
+    "resolve references such as 'that' or 'those' against the previous question and SQL, "
+    "and prefer the previous table unless the question asks for another one.\n"
     "After run_sql succeeds, stop immediately and return SQL_TASK_DONE.\n"
     "Do not answer the user. Return a short status token only: "
     "SQL_TASK_DONE or SQL_TASK_FAILED."
@@ -0,0 +1,49 @@
+from .columnar import (
+    ColumnarResult,
+    RowsView,
+    result_set_to_dict,
+    sample_result_set,
+    sql_result_to_dict,
+    summarize_sql_result,
+)
+from .encoding import dumps_json, encode_json, to_jsonable
+from .plot_data import build_plot_data, lttb_indices
+from .sizing import approx_nbytes
+from .spill import SpilledResult, SpillQuotaExceeded, get_spill_directory
+from .store import ResultStore, get_result_store, resolve_sql_result, store_sql_result
+from .streaming import (
+    ARROW_STREAM_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    arrow_available,
+    iter_arrow_stream,
+    iter_ndjson,
+    prepend_batch,
+)
+
+__all__ = [
+    "ARROW_STREAM_MEDIA_TYPE",
+    "NDJSON_MEDIA_TYPE",
+    "ColumnarResult",
+    "ResultStore",
+    "RowsView",
+    "SpillQuotaExceeded",
+    "SpilledResult",
+    "approx_nbytes",
+    "arrow_available",
+    "build_plot_data",
+    "dumps_json",
+    "encode_json",
+    "get_result_store",
+    "get_spill_directory",
+    "iter_arrow_stream",
+    "iter_ndjson",
+    "lttb_indices",
+    "prepend_batch",
+    "resolve_sql_result",
+    "result_set_to_dict",
+    "sample_result_set",
+    "sql_result_to_dict",
+    "store_sql_result",
+    "summarize_sql_result",
+    "to_jsonable",
+]
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, Iterator, List
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def _pack_column(values: Sequence[object]) -> Sequence[object]:
+    """Store a column as a typed array when every value fits, else as a tuple."""
+    if not values:
+        return ()
+    first = values[0]
+    if type(first) is int:
+        if all(type(value) is int and _INT64_MIN <= value <= _INT64_MAX for value in values):
+            return array("q", values)
+    elif type(first) is float:
+        if all(type(value) is float for value in values):
+            return array("d", values)
+    return values if isinstance(values, tuple) else tuple(values)
+
+
+class RowsView(Sequence):
+    """Lazy row-major view over a ColumnarResult; rows are built on access."""
+
+    __slots__ = ("_result",)
+
+    def __init__(self, result: "ColumnarResult") -> None:
+        self._result = result
+
+    def __len__(self) -> int:
+        return self._result.row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._result.row(i) for i in range(*index.indices(len(self)))]
+        return self._result.row(index)
+
+    def __iter__(self) -> Iterator[List[object]]:
+        data = self._result.data
+        if not data:
+            return iter([[] for _ in range(len(self))])
+        return (list(row) for row in zip(*data))
+
+    def __repr__(self) -> str:
+        return f"RowsView(row_count={len(self)})"
+
+
+class ColumnarResult(Mapping):
+    """Column-major result set.
+
+    Columns are stored once, as typed arrays for pure int/float columns and
+    tuples otherwise, and are shared by reference. Row access goes through
+    RowsView. The mapping interface exposes the legacy result-set keys
+    (sql, columns, rows, row_count) so existing readers keep working.
+    """
+
+    __slots__ = ("sql", "columns", "data", "row_count")
+
+    _KEYS = ("sql", "columns", "rows", "row_count")
+
+    def __init__(
+        self,
+        sql: str,
+        columns: List[str],
+        data: List[Sequence[object]],
+        row_count: int | None = None,
+    ) -> None:
+        self.sql = sql
+        self.columns = list(columns)
+        self.data = data
+        if row_count is None:
+            row_count = len(data[0]) if data else 0
+        self.row_count = row_count
+
+    @classmethod
+    def from_rows(
+        cls,
+        sql: str,
+        columns: List[str],
+        rows: Iterable[Sequence[object]],
+    ) -> "ColumnarResult":
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not columns:
+            return cls(sql, [], [], row_count=len(rows))
+        if rows:
+            data = [_pack_column(column) for column in zip(*rows)]
+        else:
+            data = [() for _ in columns]
+        return cls(sql, columns, data, row_count=len(rows))
+
+    @classmethod
+    def concat(cls, sql: str, columns: List[str], batches: List["ColumnarResult"]) -> "ColumnarResult":
+        """Join fetched batches into one result; a single batch is returned as-is."""
+        if len(batches) == 1:
+            return batches[0]
+        if not batches:
+            return cls.from_rows(sql, columns, [])
+        data = []
+        for index in range(len(columns)):
+            parts = [batch.data[index] for batch in batches]
+            first = parts[0]
+            if isinstance(first, array) and all(
+                isinstance(part, array) and part.typecode == first.typecode for part in parts
+            ):
+                joined = array(first.typecode)
+                for part in parts:
+                    joined.extend(part)
+                data.append(joined)
+            else:
+                data.append(_pack_column(tuple(value for part in parts for value in part)))
+        return cls(sql, columns, data, row_count=sum(batch.row_count for batch in batches))
+
+    @classmethod
+    def empty(cls, sql: str, row_count: int = 0) -> "ColumnarResult":
+        return cls(sql, [], [], row_count=row_count)
+
+    @property
+    def rows(self) -> RowsView:
+        return RowsView(self)
+
+    def row(self, index: int) -> List[object]:
+        if index < 0:
+            index += self.row_count
+        if not 0 <= index < self.row_count:
+            raise IndexError("row index out of range")
+        return [column[index] for column in self.data]
+
+    def head(self, max_rows: int | None) -> "ColumnarResult":
+        if max_rows is None or max_rows < 0 or max_rows >= self.row_count:
+            return self
+        return ColumnarResult(
+            self.sql,
+            self.columns,
+            [column[:max_rows] for column in self.data],
+            row_count=max_rows,
+        )
+
+    def page(self, offset: int, limit: int) -> "ColumnarResult":
+        """Rows offset..offset+limit as an in-memory result; only those rows are read."""
+        stop = min(offset + limit, self.row_count)
+        offset = min(offset, stop)
+        return ColumnarResult(
+            self.sql,
+            self.columns,
+            [column[offset:stop] for column in self.data],
+            row_count=stop - offset,
+        )
+
+    def column(self, name: str) -> Sequence[object]:
+        return self.data[self.columns.index(name)]
+
+    def to_dict(self, max_rows: int | None = None) -> Dict[str, object]:
+        rows = self.rows
+        sample = rows[:max_rows] if max_rows is not None and max_rows >= 0 else list(rows)
+        return {
+            "sql": self.sql,
+            "columns": list(self.columns),
+            "rows": sample,
+            "row_count": self.row_count,
+        }
+
+    def __getitem__(self, key: str) -> object:
+        if key == "rows":
+            return self.rows
+        if key in ("sql", "columns", "row_count"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"ColumnarResult(columns={self.columns!r}, row_count={self.row_count})"
+
+
+def sample_result_set(result_set: Mapping, max_rows: int | None = None) -> Mapping:
+    """Return the first max_rows rows, staying columnar when the input is columnar."""
+    if isinstance(result_set, ColumnarResult):
+        return result_set.head(max_rows)
+    return result_set_to_dict(result_set, max_rows)
+
+
+def result_set_to_dict(result_set: Mapping, max_rows: int | None = None) -> Dict[str, object]:
+    if isinstance(result_set, ColumnarResult):
+        return result_set.to_dict(max_rows)
+    rows = result_set.get("rows") or []
+    row_count = result_set.get("row_count", len(rows))
+    if max_rows is not None and max_rows >= 0:
+        rows = rows[:max_rows]
+    return {
+        "sql": result_set.get("sql", ""),
+        "columns": list(result_set.get("columns") or []),
+        "rows": [list(row) for row in rows],
+        "row_count": row_count,
+    }
+
+
+def sql_result_to_dict(sql_result: Mapping, max_rows: int | None = None) -> Dict[str, object]:
+    """Materialize a stored sql_result (columnar or legacy) as plain JSON-ready containers."""
+    result_sets = [
+        result_set_to_dict(result_set, max_rows)
+        for result_set in sql_result.get("result_sets") or []
+    ]
+    payload = {key: value for key, value in sql_result.items() if key not in ("rows", "result_sets")}
+    if result_sets:
+        payload["columns"] = result_sets[0]["columns"]
+        payload["rows"] = result_sets[0]["rows"]
+        payload["row_count"] = result_sets[0]["row_count"]
+    else:
+        rows = sql_result.get("rows") or []
+        if max_rows is not None and max_rows >= 0:
+            rows = rows[:max_rows]
+        payload["rows"] = [list(row) for row in rows]
+    if result_sets:
+        payload["result_sets"] = result_sets
+    return payload
+
+
+def summarize_sql_result(sql_result: Mapping, sample_rows: int) -> Dict[str, object]:
+    """Bounded view of a stored sql_result: columns, row counts and a few rows per result set.
+
+    ``truncated`` is true when a result set has more rows than the sample.
+    """
+    summaries = []
+    for result_set in sql_result.get("result_sets") or []:
+        sample = result_set_to_dict(result_set, sample_rows)
+        summaries.append(
+            {
+                "columns": sample["columns"],
+                "row_count": sample["row_count"],
+                "sample_rows": sample["rows"],
+                "truncated": sample["row_count"] > len(sample["rows"]),
+            }
+        )
+    return {
+        "status": sql_result.get("status"),
+        "sql": sql_result.get("sql", ""),
+        "row_count": summaries[0]["row_count"] if summaries else 0,
+        "result_sets": summaries,
+    }
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from array import array
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Callable, Dict, Sequence
+
+from .columnar import ColumnarResult, RowsView
+
+try:
+    import orjson
+except ImportError:
+    # Optional dependency; the stdlib encoder produces the same JSON.
+    orjson = None
+
+
+def _bytes_to_text(value: bytes) -> str:
+    return bytes(value).decode("utf-8", errors="replace")
+
+
+# Decimal keeps its exact text (scale included) as a JSON string; float() would round
+# wide DECIMALs, and NaN/Infinity have no JSON number form.
+_VALUE_ENCODERS: Dict[type, Callable[[object], object]] = {
+    Decimal: str,
+    dt.datetime: dt.datetime.isoformat,
+    dt.date: dt.date.isoformat,
+    dt.time: dt.time.isoformat,
+    dt.timedelta: str,
+    bytes: _bytes_to_text,
+    bytearray: _bytes_to_text,
+}
+
+_JSON_NATIVE = frozenset({str, int, float, bool})
+_ORJSON_NATIVE = _JSON_NATIVE | {dt.datetime, dt.date, dt.time}
+
+
+def _encode_value(value: object) -> object:
+    encoder = _VALUE_ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def _encode_column(column: Sequence[object], native: frozenset) -> Sequence[object]:
+    """Convert one column with an encoder picked from its first non-null value."""
+    if isinstance(column, array):
+        return column.tolist()
+    sample = next((value for value in column if value is not None), None)
+    if sample is None or type(sample) in native:
+        return column
+    encoder = _VALUE_ENCODERS.get(type(sample))
+    if encoder is None:
+        return column
+    try:
+        # str-based encoders (Decimal, timedelta) accept None, so NULLs are checked for.
+        if None not in column:
+            return list(map(encoder, column))
+        return [None if value is None else encoder(value) for value in column]
+    except (AttributeError, TypeError, ValueError):
+        # Mixed-type column: fall back to per-value dispatch.
+        return [None if value is None else _encode_value(value) for value in column]
+
+
+class _Preparer:
+    """Rewrites result containers into JSON-ready values, encoding each result once."""
+
+    def __init__(self, native: frozenset) -> None:
+        self.native = native
+        self._rows: Dict[int, list] = {}
+
+    def rows(self, result: ColumnarResult) -> list:
+        key = id(result)
+        if key not in self._rows:
+            if not result.data:
+                self._rows[key] = [[] for _ in range(result.row_count)]
+            else:
+                columns = [_encode_column(column, self.native) for column in result.data]
+                self._rows[key] = list(zip(*columns))
+        return self._rows[key]
+
+    def prepare(self, value: object) -> object:
+        if value is None or type(value) in self.native:
+            return value
+        if isinstance(value, ColumnarResult):
+            return {
+                "sql": value.sql,
+                "columns": list(value.columns),
+                "rows": self.rows(value),
+                "row_count": value.row_count,
+            }
+        if isinstance(value, RowsView):
+            return self.rows(value._result)
+        if isinstance(value, Mapping):
+            return {str(key): self.prepare(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.prepare(item) for item in value]
+        return _encode_value(value)
+
+
+def _orjson_enabled(backend: str | None) -> bool:
+    if backend == "json":
+        return False
+    if backend == "orjson" and orjson is None:
+        raise RuntimeError("orjson backend requested but orjson is not installed.")
+    return orjson is not None
+
+
+def to_jsonable(value: object) -> object:
+    """Return plain dict/list/scalar data that the stdlib json module can encode."""
+    return _Preparer(_JSON_NATIVE).prepare(value)
+
+
+def encode_json(value: object, backend: str | None = None) -> bytes:
+    """Encode results (columnar or plain) as compact UTF-8 JSON.
+
+    Uses orjson when installed unless backend="json" is passed.
+    """
+    if _orjson_enabled(backend):
+        prepared = _Preparer(_ORJSON_NATIVE).prepare(value)
+        return orjson.dumps(prepared, default=_encode_value)
+    prepared = _Preparer(_JSON_NATIVE).prepare(value)
+    return json.dumps(
+        prepared,
+        default=_encode_value,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dumps_json(value: object, backend: str | None = None) -> str:
+    return encode_json(value, backend=backend).decode("utf-8")
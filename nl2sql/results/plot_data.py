@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import datetime as dt
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Dict, List, Sequence, Tuple
+
+from .columnar import ColumnarResult
+
+OTHER_LABEL = "Other"
+
+
+def _as_number(value: object) -> float | None:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    try:
+        return float(str(value))
+    except ValueError:
+        return None
+
+
+def _x_position(value: object, index: int) -> float:
+    """Numeric position of an x value for LTTB; falls back to the row index."""
+    if isinstance(value, dt.datetime):
+        return value.timestamp() if value.tzinfo else (value - dt.datetime(1970, 1, 1)).total_seconds()
+    if isinstance(value, dt.date):
+        return float(value.toordinal())
+    number = _as_number(value)
+    if number is not None:
+        return number
+    if isinstance(value, str):
+        try:
+            return _x_position(dt.datetime.fromisoformat(value), index)
+        except ValueError:
+            pass
+    return float(index)
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: indices of the points that keep the series shape."""
+    count = len(xs)
+    if threshold >= count or count <= 2:
+        return list(range(count))
+    if threshold < 3:
+        return [0, count - 1] if threshold == 2 else [0]
+
+    every = (count - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        avg_start = int((bucket + 1) * every) + 1
+        avg_end = min(int((bucket + 2) * every) + 1, count)
+        span = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / span
+        avg_y = sum(ys[avg_start:avg_end]) / span
+
+        range_start = int(bucket * every) + 1
+        range_end = int((bucket + 1) * every) + 1
+        anchor_x = xs[anchor]
+        anchor_y = ys[anchor]
+        best_index = range_start
+        best_area = -1.0
+        for index in range(range_start, range_end):
+            area = abs(
+                (anchor_x - avg_x) * (ys[index] - anchor_y)
+                - (anchor_x - xs[index]) * (avg_y - anchor_y)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = index
+        selected.append(best_index)
+        anchor = best_index
+    selected.append(count - 1)
+    return selected
+
+
+def _column_values(result: Mapping, field: str | None) -> Sequence[object] | None:
+    if not field:
+        return None
+    columns = list(result.get("columns") or [])
+    if field not in columns:
+        raise ValueError(f"Plot field '{field}' is not a result column.")
+    if isinstance(result, ColumnarResult):
+        return result.column(field)
+    position = columns.index(field)
+    return [row[position] for row in result.get("rows") or []]
+
+
+def _group_rows(series: Sequence[object] | None, count: int) -> List[Tuple[object, List[int]]]:
+    if series is None:
+        return [(None, list(range(count)))]
+    groups: Dict[object, List[int]] = {}
+    for index, value in enumerate(series):
+        groups.setdefault(value, []).append(index)
+    return list(groups.items())
+
+
+def _fold_groups(
+    groups: List[Tuple[object, List[int]]],
+    series: Sequence[object] | None,
+    ys: Sequence[object],
+    limit: int,
+) -> Tuple[List[Tuple[object, List[int]]], bool]:
+    """Series groups in first-seen order; past limit, all but the limit - 1 largest become "Other"."""
+    if series is None:
+        return groups, False
+    kept, folded = _top_categories(series, ys, limit)
+    if not folded:
+        return groups, False
+    wanted = set(kept)
+    other: List[int] = []
+    remaining = []
+    for value, indices in groups:
+        if value in wanted:
+            remaining.append((value, indices))
+        else:
+            other.extend(indices)
+    remaining.append((OTHER_LABEL, sorted(other)))
+    return remaining, True
+
+
+def _line_trace(name: str, xs: Sequence[object], ys: Sequence[object], indices: List[int], max_points: int):
+    points = [(index, _as_number(ys[index])) for index in indices]
+    points = [(index, y) for index, y in points if y is not None]
+    positions = [_x_position(xs[index], index) for index, _ in points]
+    numbers = [y for _, y in points]
+    keep = lttb_indices(positions, numbers, max_points)
+    return {
+        "name": name,
+        "x": [xs[points[i][0]] for i in keep],
+        "y": [ys[points[i][0]] for i in keep],
+        "source_points": len(indices),
+    }
+
+
+def _summed_line_trace(name: str, xs: Sequence[object], ys: Sequence[object], indices: List[int], max_points: int):
+    """Line trace of the y values summed per x, for the series folded into "Other"."""
+    sums: Dict[object, float] = {}
+    for index in indices:
+        y = _as_number(ys[index])
+        if y is not None:
+            sums[xs[index]] = sums.get(xs[index], 0.0) + y
+    labels = list(sums)
+    order = sorted(range(len(labels)), key=lambda position: _x_position(labels[position], position))
+    trace = _line_trace(
+        name, [labels[i] for i in order], [sums[labels[i]] for i in order], list(range(len(order))), max_points
+    )
+    trace["source_points"] = len(indices)
+    return trace
+
+
+def _top_categories(xs: Sequence[object], ys: Sequence[object], limit: int) -> Tuple[List[object], bool]:
+    """Categories in first-seen order, keeping the limit - 1 largest when there are too many."""
+    totals: Dict[object, float] = {}
+    for x, y in zip(xs, ys):
+        totals[x] = totals.get(x, 0.0) + (_as_number(y) or 0.0)
+    if len(totals) <= limit:
+        return list(totals), False
+    ranked = sorted(totals, key=lambda key: totals[key], reverse=True)
+    keep = set(ranked[: max(limit - 1, 1)])
+    return [key for key in totals if key in keep], True
+
+
+def _category_trace(
+    name: str,
+    xs: Sequence[object],
+    ys: Sequence[object],
+    indices: List[int],
+    categories: List[object],
+    with_other: bool,
+):
+    sums: Dict[object, float] = {}
+    other = 0.0
+    seen_other = False
+    wanted = set(categories)
+    for index in indices:
+        value = _as_number(ys[index]) or 0.0
+        if xs[index] in wanted:
+            sums[xs[index]] = sums.get(xs[index], 0.0) + value
+        else:
+            other += value
+            seen_other = True
+    labels = [category for category in categories if category in sums]
+    values = [sums[label] for label in labels]
+    if with_other and seen_other:
+        labels.append(OTHER_LABEL)
+        values.append(other)
+    return {"name": name, "x": labels, "y": values, "source_points": len(indices)}
+
+
+def build_plot_data(
+    plot_config: Mapping,
+    result: Mapping,
+    max_points: int,
+    max_categories: int,
+    max_series: int = 20,
+) -> Dict[str, object]:
+    """Turn a result set into plot-ready series for plot_config.
+
+    Line charts are downsampled per series with LTTB to max_points. Bar, column
+    and pie charts keep the max_categories - 1 largest categories and fold the
+    rest into "Other". When axis.series is set, rows are grouped into one trace
+    per series value; past max_series, the max_series - 1 largest series are kept
+    and the rest fold into an "Other" trace (summed per x for line charts).
+    Raises ValueError when the config does not match the result.
+    """
+    plot_type = plot_config.get("type")
+    axis = plot_config.get("axis") or {}
+    x_field = (axis.get("x") or {}).get("value")
+    y_field = (axis.get("y") or {}).get("value")
+    series_field = (axis.get("series") or {}).get("value")
+    row_count = result.get("row_count", 0)
+    if plot_type not in ("line", "bar", "column", "pie"):
+        raise ValueError(f"Plot type '{plot_type}' has no series data.")
+    if not y_field or (plot_type == "pie" and not series_field) or (plot_type != "pie" and not x_field):
+        raise ValueError("Plot config missing axis fields.")
+
+    ys = _column_values(result, y_field)
+    if plot_type == "pie":
+        labels = _column_values(result, series_field)
+        categories, truncated = _top_categories(labels, ys, max_categories)
+        trace = _category_trace("", labels, ys, list(range(len(ys))), categories, truncated)
+        traces = [{"labels": trace["x"], "values": trace["y"], "source_points": trace["source_points"]}]
+        return {"type": plot_type, "traces": traces, "row_count": row_count, "reduced": truncated}
+
+    xs = _column_values(result, x_field)
+    series = _column_values(result, series_field)
+    groups, folded = _fold_groups(_group_rows(series, len(ys)), series, ys, max_series)
+    default_name = (axis.get("y") or {}).get("name") or y_field
+    traces = []
+    if plot_type == "line":
+        for position, (group, indices) in enumerate(groups):
+            name = default_name if group is None and series is None else str(group)
+            if folded and position == len(groups) - 1:
+                traces.append(_summed_line_trace(name, xs, ys, indices, max_points))
+            else:
+                traces.append(_line_trace(name, xs, ys, indices, max_points))
+        reduced = folded or any(len(trace["x"]) < trace["source_points"] for trace in traces)
+        return {"type": plot_type, "traces": traces, "row_count": row_count, "reduced": reduced}
+
+    categories, truncated = _top_categories(xs, ys, max_categories)
+    for group, indices in groups:
+        name = default_name if group is None and series is None else str(group)
+        traces.append(_category_trace(name, xs, ys, indices, categories, truncated))
+    return {"type": plot_type, "traces": traces, "row_count": row_count, "reduced": truncated or folded}
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Mapping
+
+from .columnar import ColumnarResult, RowsView
+
+# Long sequences are sized from a prefix sample and scaled up.
+_SAMPLE_ITEMS = 64
+_MAX_DEPTH = 8
+
+
+def _sequence_nbytes(values, depth: int) -> int:
+    count = len(values)
+    if not count:
+        return sys.getsizeof(values)
+    sample = values[:_SAMPLE_ITEMS] if count > _SAMPLE_ITEMS else values
+    sampled = sum(approx_nbytes(item, depth + 1) for item in sample)
+    return sys.getsizeof(values) + sampled * count // len(sample)
+
+
+def approx_nbytes(value: object, depth: int = 0) -> int:
+    """Cheap estimate of the memory held by a state value.
+
+    Exact for typed-array columns; long tuples and lists are sampled, so the
+    cost stays proportional to the number of columns, not rows.
+    """
+    if depth > _MAX_DEPTH:
+        return sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    if isinstance(value, array):
+        return len(value) * value.itemsize
+    if isinstance(value, ColumnarResult):
+        columns = sum(approx_nbytes(column, depth + 1) for column in value.data)
+        return columns + len(value.sql) + sum(len(name) for name in value.columns)
+    if isinstance(value, RowsView):
+        return 0
+    if isinstance(value, Mapping):
+        return sys.getsizeof(value) + sum(
+            approx_nbytes(key, depth + 1) + approx_nbytes(item, depth + 1) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return _sequence_nbytes(value, depth)
+    return sys.getsizeof(value)
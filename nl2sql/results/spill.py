@@ -0,0 +1,436 @@
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from decimal import Decimal
+from itertools import chain
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config import load_config
+from ..utils import metrics
+from .columnar import ColumnarResult
+
+# Column blocks: raw typed-array bytes for int64/float64 columns, JSON otherwise.
+# The directory may be shared between workers, so nothing read back is unpickled.
+_RAW_KINDS = ("q", "d")
+_JSON = "j"
+# JSON whose list items are [type, value] pairs for values JSON cannot hold.
+_TAGGED_JSON = "t"
+
+# (first row, row count, ((kind, offset, length) per column))
+_Chunk = Tuple[int, int, Tuple[Tuple[str, int, int], ...]]
+
+
+def _tag(value: object) -> list:
+    kind = type(value)
+    if kind is Decimal:
+        return ["decimal", str(value)]
+    if kind is dt.datetime:
+        return ["datetime", value.isoformat()]
+    if kind is dt.date:
+        return ["date", value.isoformat()]
+    if kind is dt.time:
+        return ["time", value.isoformat()]
+    if kind is dt.timedelta:
+        return ["timedelta", [value.days, value.seconds, value.microseconds]]
+    if kind in (bytes, bytearray):
+        return ["bytes", base64.b64encode(value).decode("ascii")]
+    if kind in (set, frozenset):
+        return ["set", sorted(value, key=str)]
+    return ["str", str(value)]
+
+
+_UNTAG: Dict[str, Callable[[object], object]] = {
+    "decimal": Decimal,
+    "datetime": dt.datetime.fromisoformat,
+    "date": dt.date.fromisoformat,
+    "time": dt.time.fromisoformat,
+    "timedelta": lambda parts: dt.timedelta(*parts),
+    "bytes": base64.b64decode,
+    "set": set,
+    "str": str,
+}
+
+
+def _encode_block(column: Sequence[object]) -> Tuple[str, bytes]:
+    """A column block as (kind, bytes): typed-array bytes, or JSON with tagged values."""
+    if isinstance(column, array) and column.typecode in _RAW_KINDS:
+        return column.typecode, column.tobytes()
+    tagged = False
+
+    def default(value: object) -> list:
+        nonlocal tagged
+        tagged = True
+        return _tag(value)
+
+    data = json.dumps(list(column), default=default, ensure_ascii=False, separators=(",", ":"))
+    return (_TAGGED_JSON if tagged else _JSON), data.encode("utf-8")
+
+
+def _decode_block(kind: str, data: bytes) -> Sequence[object]:
+    if kind == _JSON:
+        return tuple(json.loads(data))
+    if kind == _TAGGED_JSON:
+        return tuple(
+            _UNTAG[value[0]](value[1]) if type(value) is list else value for value in json.loads(data)
+        )
+    values = array(kind)
+    values.frombytes(data)
+    return values
+
+
+class SpillQuotaExceeded(Exception):
+    """Spill files would exceed RESULT_SPILL_MAX_BYTES even after cleanup."""
+
+
+class SpillDirectory:
+    """Directory of spill files under a disk quota and a TTL.
+
+    Files older than ttl_seconds are removed on cleanup. Live files are never
+    deleted to make room: when a write needs more than max_bytes allows, the
+    registered evictors (the result store) drop results they own, files
+    included, and if that is not enough the write fails. Usage is measured
+    from the directory itself, so workers sharing it share the quota.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_bytes: int,
+        ttl_seconds: float,
+        cleanup_interval: float = 30.0,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval = min(cleanup_interval, ttl_seconds)
+        self.used_bytes = 0
+        self._path = path
+        self._owns_path = not path
+        self._writing: Set[str] = set()
+        self._evictors: List[Callable[[int], None]] = []
+        self._last_cleanup = 0.0
+        self._lock = threading.Lock()
+
+    def _directory(self) -> str:
+        if not self._path:
+            self._path = tempfile.mkdtemp(prefix="nl2sql-results-")
+        else:
+            os.makedirs(self._path, exist_ok=True)
+        return self._path
+
+    def _files(self) -> List[Tuple[float, str, int]]:
+        if not self._path or not os.path.isdir(self._path):
+            return []
+        files = []
+        with os.scandir(self._path) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.is_file():
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        files.sort()
+        return files
+
+    def _cleanup(self) -> None:
+        now = time.time()
+        files = self._files()
+        used = sum(size for _, _, size in files)
+        for mtime, path, size in files:
+            if path in self._writing or now - mtime < self.ttl_seconds:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            used -= size
+            metrics.increment("result_spill_files_removed", reason="ttl")
+        self.used_bytes = used
+        self._last_cleanup = time.monotonic()
+
+    def maybe_cleanup(self) -> None:
+        """Remove expired files, at most once per cleanup_interval."""
+        if time.monotonic() - self._last_cleanup < self.cleanup_interval:
+            return
+        with self._lock:
+            self._cleanup()
+
+    def create(self, suffix: str) -> Tuple[str, BinaryIO]:
+        with self._lock:
+            path = os.path.join(self._directory(), uuid.uuid4().hex + suffix)
+            self._writing.add(path)
+        return path, open(path, "w+b")
+
+    def finished(self, path: str) -> None:
+        with self._lock:
+            self._writing.discard(path)
+
+    def touch(self, path: str) -> None:
+        """Restart a file's TTL, e.g. when a longer-lived owner takes it over."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def add_evictor(self, evictor: Callable[[int], None]) -> None:
+        """Register a callback that frees about n bytes of the files it owns when asked."""
+        with self._lock:
+            self._evictors.append(evictor)
+
+    def remove_evictor(self, evictor: Callable[[int], None]) -> None:
+        with self._lock:
+            if evictor in self._evictors:
+                self._evictors.remove(evictor)
+
+    def reserve(self, nbytes: int) -> None:
+        """Account for nbytes about to be written, making room or raising SpillQuotaExceeded."""
+        with self._lock:
+            if self.used_bytes + nbytes > self.max_bytes:
+                self._cleanup()
+            if self.used_bytes + nbytes <= self.max_bytes:
+                self.used_bytes += nbytes
+                return
+            shortfall = self.used_bytes + nbytes - self.max_bytes
+            evictors = list(self._evictors)
+        # Evictors take their own locks and call remove(), so this lock is not held.
+        for evictor in evictors:
+            evictor(shortfall)
+        with self._lock:
+            if self.used_bytes + nbytes > self.max_bytes:
+                metrics.increment("result_spill_quota_exceeded")
+                raise SpillQuotaExceeded(
+                    f"result spill quota exhausted ({self.used_bytes} of {self.max_bytes} bytes in use)"
+                )
+            self.used_bytes += nbytes
+
+    def remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.used_bytes = max(0, self.used_bytes - size)
+
+    def close(self) -> None:
+        with self._lock:
+            for _, path, _ in self._files():
+                if path not in self._writing:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            if self._owns_path and self._path:
+                try:
+                    os.rmdir(self._path)
+                except OSError:
+                    pass
+                self._path = None
+            self.used_bytes = 0
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "path": self._path,
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+            "writing": len(self._writing),
+        }
+
+
+class SpilledColumn(Sequence):
+    """One column of a SpilledResult; reads only the chunks an access touches."""
+
+    __slots__ = ("_result", "_index", "_cached")
+
+    def __init__(self, result: "SpilledResult", index: int) -> None:
+        self._result = result
+        self._index = index
+        self._cached: Tuple[int, Sequence[object]] = (-1, ())
+
+    def __len__(self) -> int:
+        return self._result.row_count
+
+    def _chunk_values(self, chunk_index: int) -> Sequence[object]:
+        cached_index, values = self._cached
+        if cached_index != chunk_index:
+            values = self._result.read_block(chunk_index, self._index)
+            self._cached = (chunk_index, values)
+        return values
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return tuple(self[i] for i in range(start, stop, step))
+            return self._result.read_range(self._index, start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        chunk_index = self._result.chunk_of(index)
+        return self._chunk_values(chunk_index)[index - self._result.chunk_start(chunk_index)]
+
+    def __iter__(self) -> Iterator[object]:
+        for chunk_index in range(self._result.chunk_count):
+            yield from self._result.read_block(chunk_index, self._index)
+
+
+class SpilledResult(ColumnarResult):
+    """ColumnarResult whose rows live in a memory-mapped spill file.
+
+    The file holds the result as consecutive chunks of column blocks (one chunk
+    per fetched batch); the chunk index stays in memory. Row, slice and batch
+    access decode only the chunks they touch.
+    """
+
+    __slots__ = ("path", "_chunks", "_starts", "_buffer")
+
+    def __init__(
+        self,
+        path: str,
+        sql: str,
+        columns: List[str],
+        row_count: int,
+        chunks: List[_Chunk],
+        handle: Optional[BinaryIO] = None,
+    ) -> None:
+        self.path = path
+        self._chunks = list(chunks)
+        self._starts = [chunk[0] for chunk in self._chunks]
+        if handle is None:
+            with open(path, "rb") as reopened:
+                self._buffer = _map(reopened)
+        else:
+            self._buffer = _map(handle)
+        super().__init__(sql, columns, [SpilledColumn(self, index) for index in range(len(columns))], row_count)
+
+    def reference(self) -> Tuple[str, str, List[str], int, List[_Chunk]]:
+        """Constructor arguments that reopen this result from its file."""
+        return (self.path, self.sql, self.columns, self.row_count, self._chunks)
+
+    def __reduce__(self):
+        # Pickles as a reference to the file, never as its rows.
+        return (SpilledResult, self.reference())
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self._chunks)
+
+    def chunk_start(self, chunk_index: int) -> int:
+        return self._starts[chunk_index]
+
+    def chunk_of(self, row: int) -> int:
+        return bisect_right(self._starts, row) - 1
+
+    def read_block(self, chunk_index: int, column_index: int) -> Sequence[object]:
+        kind, offset, length = self._chunks[chunk_index][2][column_index]
+        return _decode_block(kind, self._buffer[offset : offset + length])
+
+    def read_range(self, column_index: int, start: int, stop: int) -> Sequence[object]:
+        if start >= stop:
+            return ()
+        pieces = []
+        for chunk_index in range(self.chunk_of(start), self.chunk_count):
+            first, count, _ = self._chunks[chunk_index]
+            if first >= stop:
+                break
+            block = self.read_block(chunk_index, column_index)
+            pieces.append(block[max(start - first, 0) : min(stop - first, count)])
+        kinds = {type(piece) is array and piece.typecode for piece in pieces}
+        if len(kinds) == 1 and False not in kinds:
+            joined = array(pieces[0].typecode)
+            for piece in pieces:
+                joined.extend(piece)
+            return joined
+        return tuple(chain.from_iterable(pieces))
+
+    def iter_batches(self, offset: int = 0) -> Iterator[ColumnarResult]:
+        """Yield the rows from offset on as in-memory batches, one chunk at a time."""
+        if not self._chunks:
+            return
+        for chunk_index in range(self.chunk_of(min(offset, self.row_count - 1)), self.chunk_count):
+            first, count, _ = self._chunks[chunk_index]
+            skip = max(offset - first, 0)
+            data = [self.read_block(chunk_index, column) for column in range(len(self.columns))]
+            if skip:
+                data = [column[skip:] for column in data]
+            yield ColumnarResult(self.sql, self.columns, data, row_count=count - skip)
+
+
+def _map(handle: BinaryIO) -> Optional[mmap.mmap]:
+    if os.fstat(handle.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SpillWriter:
+    """Append ColumnarResult batches of one result set to a new spill file."""
+
+    def __init__(self, directory: SpillDirectory, sql: str, columns: List[str]) -> None:
+        self.directory = directory
+        self.sql = sql
+        self.columns = list(columns)
+        self.row_count = 0
+        self.path, self._handle = directory.create(".cols")
+        self._offset = 0
+        self._chunks: List[_Chunk] = []
+
+    def write(self, batch: ColumnarResult) -> None:
+        if not batch.row_count:
+            return
+        encoded = [_encode_block(column) for column in batch.data]
+        self.directory.reserve(sum(len(data) for _, data in encoded))
+        blocks = []
+        for kind, data in encoded:
+            self._handle.write(data)
+            blocks.append((kind, self._offset, len(data)))
+            self._offset += len(data)
+        self._chunks.append((self.row_count, batch.row_count, tuple(blocks)))
+        self.row_count += batch.row_count
+
+    def finish(self) -> SpilledResult:
+        try:
+            self._handle.flush()
+            result = SpilledResult(
+                self.path, self.sql, self.columns, self.row_count, self._chunks, handle=self._handle
+            )
+        finally:
+            self._handle.close()
+            self.directory.finished(self.path)
+        metrics.increment("result_spills")
+        metrics.increment("result_spill_bytes", self._offset)
+        return result
+
+    def abort(self) -> None:
+        self._handle.close()
+        self.directory.finished(self.path)
+        self.directory.remove(self.path)
+
+
+_DIRECTORY: Optional[SpillDirectory] = None
+_DIRECTORY_LOCK = threading.Lock()
+
+
+def get_spill_directory() -> SpillDirectory:
+    """The process-wide spill directory (RESULT_SPILL_DIR, or a temporary one)."""
+    global _DIRECTORY
+    with _DIRECTORY_LOCK:
+        if _DIRECTORY is None:
+            config = load_config()
+            _DIRECTORY = SpillDirectory(
+                config.result_spill_dir,
+                max_bytes=config.result_spill_max_bytes,
+                ttl_seconds=config.result_ttl_seconds,
+            )
+        return _DIRECTORY
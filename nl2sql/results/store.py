@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, List, Optional
+
+from ..config import load_config
+from ..utils import metrics
+from .columnar import ColumnarResult
+from .sizing import approx_nbytes
+from .spill import SpillDirectory, SpilledResult, SpillQuotaExceeded, SpillWriter, get_spill_directory
+
+# Keys copied from a stored sql_result into its reference in session state.
+_REFERENCE_KEYS = ("status", "sql", "columns", "row_count")
+# Keys rebuilt from result_sets when a spilled sql_result is read back.
+_RESULT_KEYS = ("rows", "result_sets")
+
+
+class _Spilled:
+    """A spilled sql_result: its small keys, and each result set as a file reference."""
+
+    __slots__ = ("meta", "result_sets", "has_rows")
+
+    def __init__(self, meta: Dict[str, object], result_sets: List[object], has_rows: bool) -> None:
+        self.meta = meta
+        # SpilledResult.reference() tuples, or result sets too small to need a file.
+        self.result_sets = result_sets
+        self.has_rows = has_rows
+
+    def load(self) -> Dict[str, object]:
+        result_sets = [
+            SpilledResult(*result_set) if isinstance(result_set, tuple) else result_set
+            for result_set in self.result_sets
+        ]
+        payload = dict(self.meta)
+        payload["result_sets"] = result_sets
+        if self.has_rows and result_sets:
+            payload["rows"] = result_sets[0].rows
+        return payload
+
+
+class _Entry:
+    __slots__ = ("payload", "nbytes", "created_at", "spilled", "files", "disk_bytes")
+
+    def __init__(self, payload: Optional[Dict[str, object]], nbytes: int, created_at: float) -> None:
+        self.payload = payload
+        self.nbytes = nbytes
+        self.created_at = created_at
+        self.spilled: Optional[_Spilled] = None
+        # Spill files this entry wrote; they are removed with it.
+        self.files: List[str] = []
+        self.disk_bytes = 0
+
+
+def _write_result_set(spill: SpillDirectory, result_set: ColumnarResult) -> SpilledResult:
+    writer = SpillWriter(spill, result_set.sql, result_set.columns)
+    step = max(1, load_config().stream_batch_size)
+    try:
+        for offset in range(0, result_set.row_count, step):
+            writer.write(result_set.page(offset, step))
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+class ResultStore:
+    """Query results kept outside session state and referenced by id.
+
+    Results live in memory up to max_bytes (sizes from approx_nbytes); the
+    least recently used ones are then written to columnar spill files and
+    read back on access as SpilledResult. Results that were already spilled
+    while being fetched keep their file. When the spill quota runs out, the
+    least recently used spilled results are dropped together with their files.
+    Entries expire ttl_seconds after they were stored.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, spill: SpillDirectory) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self.spill = spill
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Reentrant: spilling reserves quota, which may call back into _evict_spilled.
+        self._lock = threading.RLock()
+        spill.add_evictor(self._evict_spilled)
+
+    def _spill(self, result_id: str, entry: _Entry) -> None:
+        payload = entry.payload
+        result_sets = payload.get("result_sets") or []
+        if not result_sets:
+            self._drop(result_id)
+            metrics.increment("result_store_dropped", reason="unspillable")
+            return
+        references: List[object] = []
+        files: List[str] = []
+        try:
+            for result_set in result_sets:
+                if isinstance(result_set, SpilledResult):
+                    references.append(result_set.reference())
+                elif result_set.columns and result_set.row_count:
+                    written = _write_result_set(self.spill, result_set)
+                    files.append(written.path)
+                    references.append(written.reference())
+                else:
+                    references.append(result_set)
+        except SpillQuotaExceeded:
+            for path in files:
+                self.spill.remove(path)
+            self._drop(result_id)
+            metrics.increment("result_store_dropped", reason="quota")
+            return
+        meta = {key: value for key, value in payload.items() if key not in _RESULT_KEYS}
+        entry.spilled = _Spilled(meta, references, "rows" in payload)
+        entry.payload = None
+        entry.files = files
+        entry.disk_bytes = sum(_file_size(path) for path in files)
+        self.memory_bytes -= entry.nbytes
+        self.spilled_bytes += entry.disk_bytes
+        metrics.increment("result_store_spilled")
+
+    def _drop(self, result_id: str) -> None:
+        entry = self._entries.pop(result_id)
+        if entry.spilled is None:
+            self.memory_bytes -= entry.nbytes
+            return
+        self.spilled_bytes -= entry.disk_bytes
+        for path in entry.files:
+            self.spill.remove(path)
+
+    def _evict_spilled(self, need: int) -> None:
+        """Spill-quota evictor: drop the least recently used spilled results until need bytes are freed."""
+        with self._lock:
+            freed = 0
+            for result_id, entry in list(self._entries.items()):
+                if freed >= need:
+                    break
+                if entry.files:
+                    freed += entry.disk_bytes
+                    self._drop(result_id)
+                    metrics.increment("result_store_dropped", reason="quota")
+
+    def _expire(self, now: float) -> None:
+        expired = [
+            result_id
+            for result_id, entry in self._entries.items()
+            if now - entry.created_at >= self.ttl_seconds
+        ]
+        for result_id in expired:
+            self._drop(result_id)
+        if expired:
+            metrics.increment("result_store_expired", len(expired))
+
+    def _enforce_budget(self) -> None:
+        for result_id, entry in list(self._entries.items()):
+            if self.memory_bytes <= self.max_bytes:
+                break
+            if entry.payload is not None and result_id in self._entries:
+                self._spill(result_id, entry)
+
+    def put(self, payload: Dict[str, object]) -> str:
+        result_id = uuid.uuid4().hex
+        now = time.monotonic()
+        for result_set in payload.get("result_sets") or []:
+            if isinstance(result_set, SpilledResult):
+                # The file was written when the query ran; its TTL now follows this entry.
+                self.spill.touch(result_set.path)
+        with self._lock:
+            self._expire(now)
+            self._entries[result_id] = _Entry(payload, approx_nbytes(payload), now)
+            self.memory_bytes += self._entries[result_id].nbytes
+            self._enforce_budget()
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(result_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(result_id)
+            if entry.payload is not None:
+                return entry.payload
+            spilled = entry.spilled
+        # Spilled results are reopened without holding the lock or re-admitting them.
+        metrics.increment("result_store_disk_reads")
+        try:
+            return spilled.load()
+        except OSError:
+            return None
+
+    def discard(self, result_id: str) -> None:
+        with self._lock:
+            if result_id in self._entries:
+                self._drop(result_id)
+
+    def close(self) -> None:
+        self.spill.remove_evictor(self._evict_spilled)
+        with self._lock:
+            for result_id in list(self._entries):
+                self._drop(result_id)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            spilled = sum(1 for entry in self._entries.values() if entry.spilled is not None)
+            return {
+                "results": len(self._entries),
+                "spilled": spilled,
+                "memory_bytes": self.memory_bytes,
+                "spilled_bytes": self.spilled_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+_STORE: Optional[ResultStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            config = load_config()
+            _STORE = ResultStore(
+                max_bytes=config.result_store_max_bytes,
+                ttl_seconds=config.result_ttl_seconds,
+                spill=get_spill_directory(),
+            )
+        return _STORE
+
+
+def store_sql_result(payload: Dict[str, object]) -> Dict[str, object]:
+    """Put a successful sql_result in the store and return the reference kept in state."""
+    reference = {key: payload[key] for key in _REFERENCE_KEYS if key in payload}
+    reference["result_set_count"] = len(payload.get("result_sets") or [])
+    reference["result_id"] = get_result_store().put(payload)
+    return reference
+
+
+def resolve_sql_result(value: object) -> Optional[Mapping]:
+    """The full sql_result behind a state value; inline results are returned as-is.
+
+    An expired reference resolves to an error payload.
+    """
+    if not isinstance(value, Mapping) or "result_id" not in value:
+        return value
+    payload = get_result_store().get(value["result_id"])
+    if payload is None:
+        return {"status": "error", "error_message": "SQL result expired.", "sql": value.get("sql", "")}
+    return payload
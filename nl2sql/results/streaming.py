@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import logging
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .columnar import ColumnarResult
+from .encoding import encode_json
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # Optional dependency; Arrow output is unavailable without it.
+    pa = None
+
+_LOGGER = logging.getLogger("nl2sql.results")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# mysql-connector FieldType.LONGLONG and FieldFlag.UNSIGNED, read from cursor.description.
+_MYSQL_LONGLONG = 8
+_MYSQL_UNSIGNED_FLAG = 32
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def _ndjson_line(event: dict) -> bytes:
+    return encode_json(event) + b"\n"
+
+
+def prepend_batch(first: ColumnarResult, rest: Iterator[ColumnarResult]) -> Iterator[ColumnarResult]:
+    """Re-attach a batch that was read ahead (e.g. to surface errors before streaming)."""
+    yield first
+    yield from rest
+
+
+def iter_ndjson(result_streams: Iterable[Tuple[str, Iterable[ColumnarResult]]]) -> Iterator[bytes]:
+    """Encode (statement, batches) pairs as NDJSON events, one result set after another.
+
+    Each result set produces a ``result_set`` event with its columns, ``rows``
+    events per fetched batch and an ``end`` event with the row count. A failing
+    statement emits an ``error`` event and stops the stream; a full stream ends
+    with ``done``.
+    """
+    count = 0
+    for index, (statement, batches) in enumerate(result_streams):
+        count += 1
+        row_count = 0
+        started = False
+        try:
+            for batch in batches:
+                if not started:
+                    started = True
+                    yield _ndjson_line(
+                        {
+                            "event": "result_set",
+                            "index": index,
+                            "sql": statement,
+                            "columns": batch.columns,
+                        }
+                    )
+                if not batch.columns:
+                    row_count = batch.row_count
+                    continue
+                if batch.row_count:
+                    row_count += batch.row_count
+                    yield _ndjson_line({"event": "rows", "index": index, "rows": batch.rows})
+        except Exception:
+            _LOGGER.exception("Streamed statement %d failed", index + 1)
+            yield _ndjson_line({"event": "error", "index": index, "error_message": "MySQL query failed."})
+            return
+        finally:
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+        yield _ndjson_line({"event": "end", "index": index, "row_count": row_count})
+    yield _ndjson_line({"event": "done", "status": "success", "result_sets": count})
+
+
+def _arrow_array(values, arrow_type=None):
+    try:
+        return pa.array(values, type=arrow_type, from_pandas=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if arrow_type is not None and not pa.types.is_string(arrow_type):
+            raise
+        return pa.array(
+            [None if value is None else str(value) for value in values],
+            type=pa.string(),
+        )
+
+
+def _unsigned_bigint(entry: Optional[Sequence]) -> bool:
+    if entry is None or len(entry) < 8 or entry[1] != _MYSQL_LONGLONG:
+        return False
+    return isinstance(entry[7], int) and bool(entry[7] & _MYSQL_UNSIGNED_FLAG)
+
+
+def _stream_type(inferred, entry: Optional[Sequence]):
+    """Widen a type inferred from the first batch so later batches still fit it."""
+    if pa.types.is_null(inferred):
+        return pa.string()
+    if _unsigned_bigint(entry):
+        return pa.uint64()
+    if pa.types.is_decimal(inferred):
+        # The first batch only shows the precision its values needed; a DECIMAL
+        # column has one scale, so keep it and take the largest precision.
+        if inferred.precision <= 38:
+            return pa.decimal128(38, inferred.scale)
+        return pa.decimal256(76, inferred.scale)
+    return inferred
+
+
+def _first_batch_arrays(batch: ColumnarResult, description: Optional[Sequence] = None):
+    arrays = []
+    for index, column in enumerate(batch.data):
+        entry = description[index] if description and index < len(description) else None
+        array = _arrow_array(column, pa.uint64() if _unsigned_bigint(entry) else None)
+        arrow_type = _stream_type(array.type, entry)
+        arrays.append(array if arrow_type == array.type else array.cast(arrow_type))
+    schema = pa.schema([pa.field(name, array.type) for name, array in zip(batch.columns, arrays)])
+    return schema, arrays
+
+
+class _ChunkSink:
+    """File-like sink that hands back what the IPC writer wrote since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_arrow_stream(
+    batches: Iterable[ColumnarResult],
+    description: Optional[Sequence] = None,
+) -> Iterator[bytes]:
+    """Encode ColumnarResult batches as an Arrow IPC stream.
+
+    The schema comes from the first batch, widened so later batches fit:
+    DECIMAL precision is raised to 38 (76 past that), and BIGINT UNSIGNED
+    columns in ``description`` (cursor.description) become uint64. The batches
+    are closed when the stream ends or is abandoned, releasing their connection.
+    """
+    if pa is None:
+        raise RuntimeError("Arrow output requires pyarrow.")
+    sink = _ChunkSink()
+    writer = None
+    schema = None
+    try:
+        for batch in batches:
+            if writer is None:
+                schema, arrays = _first_batch_arrays(batch, description)
+                writer = pa.ipc.new_stream(sink, schema)
+            else:
+                arrays = [_arrow_array(column, field.type) for column, field in zip(batch.data, schema)]
+            if batch.row_count and batch.columns:
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        close = getattr(batches, "close", None)
+        if close is not None:
+            close()
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, pa.schema([]))
+    writer.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
@@ -1,26 +1,29 @@
-from .answer_tools import get_answer, save_answer
-from .agentic import (
-    run_output_tool,
-    run_plot_config_agent_tool,
-    run_result_interpreter_agent_tool,
-    run_sql_task_agent_tool,
-)
-from .plot_tools import get_plot_config, get_sql_result, save_plot_config
-from .retry_tools import request_sql_retry
-from .sql import generate_sql, inspect_table_schema, run_sql
+import importlib
 
-__all__ = [
-    "run_sql_task_agent_tool",
-    "run_plot_config_agent_tool",
-    "run_result_interpreter_agent_tool",
-    "run_output_tool",
-    "get_plot_config",
-    "get_sql_result",
-    "save_plot_config",
-    "get_answer",
-    "save_answer",
-    "request_sql_retry",
-    "inspect_table_schema",
-    "generate_sql",
-    "run_sql",
-]
+# Tool name -> defining module. Imported on first access so that SQL-only code
+# paths (e.g. nl2sql.tools.sql.execution) do not pull in the agents and ADK.
+_EXPORTS = {
+    "run_sql_task_agent_tool": ".agentic",
+    "run_plot_config_agent_tool": ".agentic",
+    "run_result_interpreter_agent_tool": ".agentic",
+    "run_output_tool": ".agentic",
+    "get_plot_config": ".plot_tools",
+    "get_sql_result": ".plot_tools",
+    "save_plot_config": ".plot_tools",
+    "get_answer": ".answer_tools",
+    "save_answer": ".answer_tools",
+    "request_sql_retry": ".retry_tools",
+    "inspect_table_schema": ".sql.schema_tools",
+    "generate_sql": ".sql.generate_sql",
+    "run_sql": ".sql.run_sql",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
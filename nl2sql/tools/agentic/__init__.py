@@ -1,11 +1,19 @@
-from .agentic_output_tool import run_output_tool
-from .agentic_plot_tool import run_plot_config_agent_tool
-from .agentic_result_tool import run_result_interpreter_agent_tool
-from .agentic_sql_tool import run_sql_task_agent_tool
-
-__all__ = [
-    "run_sql_task_agent_tool",
-    "run_plot_config_agent_tool",
-    "run_result_interpreter_agent_tool",
-    "run_output_tool",
-]
+import importlib
+
+# Imported on first access: each agentic tool builds its sub-agent at import.
+_EXPORTS = {
+    "run_sql_task_agent_tool": ".agentic_sql_tool",
+    "run_plot_config_agent_tool": ".agentic_plot_tool",
+    "run_result_interpreter_agent_tool": ".agentic_result_tool",
+    "run_output_tool": ".agentic_output_tool",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -5,6 +5,7 @@ from typing import Dict
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.tools.tool_context import ToolContext
 
+from ...agents.llm_gateway import LlmAdmissionError
 from ...agents.plot_config_agent import plot_config_agent
 from .agentic_utils import (
     log_tool_input,
@@ -44,11 +45,9 @@ async def run_plot_config_agent_tool(
         )
 
     sql_query = tool_context.state.get("sql_query") or sql_result.get("sql", "")
-    result_sets = sql_result.get("result_sets") or []
     log_tool_status(
         "run_plot_config_agent_tool",
-        f"sql_result_ok: result_sets={len(result_sets)} rows_per_set="
-        f"{[len(rs.get('rows') or []) for rs in result_sets]}",
+        f"sql_result_ok: row_count={sql_result.get('row_count')}",
     )
     request_parts = [
         f"User question: {question}",
@@ -64,6 +63,8 @@ async def run_plot_config_agent_tool(
             tool_context=tool_context,
         )
         log_tool_output("plot_config_agent", response)
+    except LlmAdmissionError:
+        raise
     except Exception as exc:
         message = f"Plot config agent failed: {exc}"
         tool_context.state["last_error"] = message
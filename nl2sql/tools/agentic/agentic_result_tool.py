@@ -5,6 +5,7 @@ from typing import Dict
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.tools.tool_context import ToolContext
 
+from ...agents.llm_gateway import LlmAdmissionError
 from ...agents.result_interpreter_agent import result_interpreter_agent
 from .agentic_utils import (
     format_sql_result,
@@ -57,6 +58,8 @@ async def run_result_interpreter_agent_tool(
             tool_context=tool_context,
         )
         log_tool_output("result_interpreter_agent", response)
+    except LlmAdmissionError:
+        raise
     except Exception as exc:
         message = f"Result interpreter agent failed: {exc}"
         tool_context.state["last_error"] = message
@@ -5,10 +5,15 @@ from typing import Dict
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.tools.tool_context import ToolContext
 
+from ...agents.llm_gateway import LlmAdmissionError
 from ...agents.sql_task_agent import sql_task_agent
+from ...config import load_config
+from ...utils import metrics
+from ...utils.query_log import record_cache_hit
 from ..sql.schema_tools import inspect_table_schema
 from .agentic_utils import (
     clear_downstream_state,
+    format_previous_turn,
     format_table_schemas,
     log_tool_input,
     log_tool_output,
@@ -20,6 +25,12 @@ from .agentic_utils import (
 _SQL_TASK_TOOL = AgentTool(sql_task_agent)
 
 
+def _cached_schemas_valid(tool_context: ToolContext) -> bool:
+    """Schemas carried over from an earlier turn are reused while ALLOWED_TABLES is unchanged."""
+    state = tool_context.state
+    return bool(state.get("table_schemas")) and state.get("allowed_tables") == load_config().allowed_tables
+
+
 async def run_sql_task_agent_tool(
     question: str,
     tool_context: ToolContext,
@@ -30,12 +41,16 @@ async def run_sql_task_agent_tool(
     clear_downstream_state(tool_context)
     state_remove(tool_context, "sql_retry_request")
 
-    schema_result = inspect_table_schema(tool_context=tool_context)
-    if schema_result.get("status") != "success":
-        message = schema_result.get("error_message", "Schema inspection failed.")
-        tool_context.state["last_error"] = message
-        log_tool_status("run_sql_task_agent_tool", message)
-        return set_status(tool_context, "sql_task_status", "error", message)
+    if _cached_schemas_valid(tool_context):
+        metrics.increment("schema_cache_hits")
+        record_cache_hit("schema")
+    else:
+        schema_result = inspect_table_schema(tool_context=tool_context)
+        if schema_result.get("status") != "success":
+            message = schema_result.get("error_message", "Schema inspection failed.")
+            tool_context.state["last_error"] = message
+            log_tool_status("run_sql_task_agent_tool", message)
+            return set_status(tool_context, "sql_task_status", "error", message)
 
     table_schemas = tool_context.state.get("table_schemas") or {}
     request_parts = [
@@ -45,6 +60,12 @@ async def run_sql_task_agent_tool(
         "Allowed table schemas (JSON):",
         format_table_schemas(table_schemas),
     ]
+    previous_turn = tool_context.state.get("previous_turn")
+    if previous_turn:
+        request_parts += [
+            "Previous turn in this conversation (JSON; the question may refer to it):",
+            format_previous_turn(previous_turn),
+        ]
     request = "\n".join(request_parts)
     log_tool_input("sql_task_agent", request)
 
@@ -54,6 +75,8 @@ async def run_sql_task_agent_tool(
             tool_context=tool_context,
         )
         log_tool_output("sql_task_agent", response)
+    except LlmAdmissionError:
+        raise
     except Exception as exc:
         message = f"SQL task agent failed: {exc}"
         tool_context.state["last_error"] = message
@@ -6,6 +6,14 @@ from typing import Dict, List
 
 from google.adk.tools.tool_context import ToolContext
 
+from ...results import (
+    dumps_json,
+    get_result_store,
+    resolve_sql_result,
+    sample_result_set,
+    summarize_sql_result,
+)
+
 _LOGGER = logging.getLogger("nl2sql.agentic")
 
 
@@ -21,8 +29,8 @@ def _format_for_log(value: object) -> str:
     if isinstance(value, str):
         return _truncate(value)
     try:
-        return _truncate(json.dumps(value, ensure_ascii=True, default=str))
-    except TypeError:
+        return _truncate(dumps_json(value))
+    except (TypeError, ValueError):
         return _truncate(str(value))
 
 
@@ -79,6 +87,9 @@ def state_take(tool_context: ToolContext, key: str):
 
 
 def clear_downstream_state(tool_context: ToolContext) -> None:
+    previous = tool_context.state.get("sql_result")
+    if isinstance(previous, dict) and previous.get("result_id"):
+        get_result_store().discard(previous["result_id"])
     for key in (
         "sql_result",
         "sql_query",
@@ -97,43 +108,60 @@ def format_table_schemas(table_schemas: Dict[str, List[Dict[str, str]]]) -> str:
     return json.dumps(table_schemas, ensure_ascii=True)
 
 
+def _format_result_set(result_set: Dict[str, object], max_rows: int | None) -> Dict[str, object]:
+    sample = sample_result_set(result_set, max_rows)
+    rows = sample.get("rows") or []
+    return {
+        "sql": result_set.get("sql", ""),
+        "columns": sample.get("columns") or [],
+        "rows": rows,
+        "row_count": result_set.get("row_count", len(rows)),
+        "sample_size": len(rows),
+    }
+
+
 def format_sql_result(
     sql_result: Dict[str, object],
     max_rows: int = 20,
     include_all_rows: bool = False,
 ) -> str:
+    sql_result = resolve_sql_result(sql_result) or {}
     sql_query = sql_result.get("sql", "")
+    sample_limit = None if include_all_rows else max_rows
     result_sets = sql_result.get("result_sets") or []
     if result_sets:
-        formatted_sets = []
-        for result_set in result_sets:
-            rows = result_set.get("rows") or []
-            sample_rows = rows if include_all_rows else rows[:max_rows]
-            formatted_sets.append(
-                {
-                    "sql": result_set.get("sql", ""),
-                    "columns": result_set.get("columns") or [],
-                    "rows": sample_rows,
-                    "row_count": result_set.get("row_count", len(rows)),
-                    "sample_size": len(sample_rows),
-                }
-            )
         payload = {
             "sql": sql_query,
-            "result_sets": formatted_sets,
+            "result_sets": [
+                _format_result_set(result_set, sample_limit) for result_set in result_sets
+            ],
         }
-        return json.dumps(payload, ensure_ascii=True, default=str)
-
-    columns = sql_result.get("columns") or []
-    rows = sql_result.get("rows") or []
-    row_count = sql_result.get("row_count", len(rows))
-    sample_rows = rows if include_all_rows else rows[:max_rows]
-    payload = {
-        "sql": sql_query,
-        "columns": columns,
-        "rows": sample_rows,
-        "row_count": row_count,
-        "sample_size": len(sample_rows),
+        return dumps_json(payload)
+
+    payload = _format_result_set(sql_result, sample_limit)
+    payload["sql"] = sql_query
+    return dumps_json(payload)
+
+
+def summarize_turn(state: Dict[str, object], question: str, max_rows: int) -> Dict[str, object]:
+    """Compact record of a finished turn, carried into the next question of a conversation.
+
+    Keeps the SQL, column names, row counts and at most max_rows sample rows per
+    result set, never the full result.
+    """
+    final_response = state.get("final_response") or {}
+    sql_result = resolve_sql_result(state.get("sql_result")) or {}
+    plot_config = final_response.get("plot_config") or {}
+    return {
+        "question": question,
+        "sql": final_response.get("sql") or state.get("sql_query") or sql_result.get("sql") or "",
+        "answer": _truncate(str(final_response.get("answer") or ""), 600),
+        "plot_type": plot_config.get("type") if isinstance(plot_config, dict) else None,
+        "result_sets": summarize_sql_result(sql_result, max_rows)["result_sets"],
     }
-    return json.dumps(payload, ensure_ascii=True, default=str)
 
+
+def format_previous_turn(previous_turn: Dict[str, object] | None) -> str:
+    if not previous_turn:
+        return ""
+    return dumps_json(previous_turn)
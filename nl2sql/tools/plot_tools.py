@@ -5,6 +5,8 @@ from typing import Dict
 
 from google.adk.tools.tool_context import ToolContext
 
+from ..results import resolve_sql_result, sample_result_set
+
 
 def _parse_plot_config(plot_config: object) -> Dict[str, object] | None:
     if isinstance(plot_config, dict):
@@ -21,35 +23,38 @@ def _parse_plot_config(plot_config: object) -> Dict[str, object] | None:
 
 def get_sql_result(tool_context: ToolContext, max_rows: int = 20) -> Dict[str, object]:
     """Fetch the latest SQL result from tool_context.state with optional sampling."""
-    result = tool_context.state.get("sql_result")
+    result = resolve_sql_result(tool_context.state.get("sql_result"))
     if not result:
         return {"status": "error", "error_message": "SQL result not available."}
+    if result.get("status") == "error":
+        return {"status": "error", "error_message": result.get("error_message") or "SQL result not available."}
 
     columns = result.get("columns") or []
     rows = result.get("rows") or []
     row_count = result.get("row_count", len(rows))
     sql = result.get("sql")
-    result_sets = result.get("result_sets") or []
+    limit = max_rows if max_rows is not None and max_rows >= 0 else None
+    # Sample before materializing so only limit rows of each (columnar) result set become lists.
+    result_sets = []
+    for result_set in result.get("result_sets") or []:
+        sample = sample_result_set(result_set, limit)
+        result_sets.append(
+            {
+                "sql": result_set.get("sql", ""),
+                "columns": list(sample.get("columns") or []),
+                "rows": [list(row) for row in sample.get("rows") or []],
+                "row_count": result_set.get("row_count", 0),
+            }
+        )
     if result_sets:
-        full_sets = []
-        for result_set in result_sets:
-            set_rows = result_set.get("rows") or []
-            full_sets.append(
-                {
-                    "sql": result_set.get("sql", ""),
-                    "columns": result_set.get("columns") or [],
-                    "rows": set_rows,
-                    "row_count": result_set.get("row_count", len(set_rows)),
-                }
-            )
-        result_sets = full_sets
         primary = result_sets[0]
-        columns = primary.get("columns") or columns
-        rows = primary.get("rows") or rows
-        row_count = primary.get("row_count", len(rows))
-
-    if max_rows is not None and max_rows >= 0:
-        rows = rows[:max_rows]
+        columns = primary["columns"] or columns
+        rows = primary["rows"]
+        row_count = primary["row_count"]
+    elif limit is not None:
+        rows = rows[:limit]
+    else:
+        rows = list(rows)
 
     sampled = len(rows) < row_count
 
@@ -1,9 +1,20 @@
-from .schema_tools import inspect_table_schema
-from .generate_sql import generate_sql
-from .run_sql import run_sql
-
-__all__ = [
-    "inspect_table_schema",
-    "generate_sql",
-    "run_sql",
-]
+import importlib
+
+# Imported on first access: generate_sql and run_sql load ADK, which SQL-only
+# workers never need. Agents import the tools from their defining modules.
+_EXPORTS = {
+    "inspect_table_schema": ".schema_tools",
+    "generate_sql": ".generate_sql",
+    "run_sql": ".run_sql",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        # Shadow the same-named submodule attribute set by the import.
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
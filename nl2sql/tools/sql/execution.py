@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ...results import ColumnarResult, prepend_batch, store_sql_result
+from ...utils.query_log import current_query_trace
+from .incremental import get_incremental_cache
+from .shared_results import current_shared_results
+from .sql_executor import execute_statements, snapshot_statements, stream_statement
+from .sql_utils import _normalize_sql, _split_sql_statements, fingerprint_sql, validate_sql_is_readonly
+
+if TYPE_CHECKING:
+    # Only the state mapping is used; SQL-only workers never import ADK.
+    from google.adk.tools.tool_context import ToolContext
+
+
+def _trace_statements(
+    statements: List[str],
+    result_sets: Optional[List[ColumnarResult]],
+    started: float,
+    failed: bool = False,
+) -> None:
+    trace = current_query_trace()
+    if trace is None:
+        return
+    trace.add_stage("sql_execute", time.perf_counter() - started)
+    for index, statement in enumerate(statements):
+        rows = result_sets[index].row_count if result_sets and index < len(result_sets) else None
+        trace.add_statement(fingerprint_sql(statement).key, statement, rows, failed=failed)
+
+
+def _execute(statements: List[str]) -> List[ColumnarResult]:
+    cache = get_incremental_cache()
+    if cache is not None and len(statements) == 1:
+        return [cache.execute(statements[0], execute_statements, snapshot_statements)]
+    return execute_statements(statements)
+
+
+def execute_sql(query: str, tool_context: ToolContext, store_result: bool = True) -> Dict[str, object]:
+    """Validate and execute SQL, recording the columnar result in state.
+
+    With store_result the result goes to the result store and state["sql_result"]
+    holds only a reference (see resolve_sql_result); otherwise it is kept inline.
+    Returns the full sql_result (result_sets are ColumnarResult objects) or an
+    error payload. Callers that need plain JSON go through the results encoder.
+    """
+    sql = _normalize_sql(query)
+
+    if not validate_sql_is_readonly(sql):
+        tool_context.state["last_error"] = "Only read-only SQL queries are allowed."
+        return {"status": "error", "error_message": "Only read-only SQL queries are allowed."}
+
+    statements = _split_sql_statements(sql)
+    if not statements:
+        tool_context.state["last_error"] = "Empty SQL after parsing."
+        return {"status": "error", "error_message": "Empty SQL after parsing."}
+
+    shared = current_shared_results()
+    started = time.perf_counter()
+    try:
+        if shared is not None:
+            result_sets = shared.run(tuple(statements), lambda: _execute(statements))
+        else:
+            result_sets = _execute(statements)
+    except Exception as exc:
+        _trace_statements(statements, None, started, failed=True)
+        tool_context.state["last_error"] = str(exc)
+        return {"status": "error", "error_message": "MySQL query failed."}
+    _trace_statements(statements, result_sets, started)
+
+    if not result_sets:
+        result_sets = [ColumnarResult.empty(sql)]
+
+    primary = result_sets[0]
+    # Top-level columns/rows are views onto result_sets[0], not copies.
+    payload = {
+        "status": "success",
+        "sql": sql,
+        "columns": primary.columns,
+        "rows": primary.rows,
+        "row_count": primary.row_count,
+        "result_sets": result_sets,
+    }
+    tool_context.state["generated_sql"] = sql
+    tool_context.state["sql_result"] = store_sql_result(payload) if store_result else payload
+    tool_context.state["last_error"] = None
+    tool_context.state["sql_run_success"] = True
+    return payload
+
+
+def open_sql_streams(query: str, single_statement: bool = False) -> Dict[str, object]:
+    """Validate SQL and open per-statement batch streams for streaming output.
+
+    On success the payload holds ``streams``: (statement, batches) pairs, and
+    ``description``: the first statement's cursor.description. The first
+    statement is started eagerly so that SQL errors are reported before a
+    response is committed; later statements run lazily as the stream is consumed.
+    """
+    sql = _normalize_sql(query)
+    if not validate_sql_is_readonly(sql):
+        return {"status": "error", "error_message": "Only read-only SQL queries are allowed."}
+
+    statements = _split_sql_statements(sql)
+    if not statements:
+        return {"status": "error", "error_message": "Empty SQL after parsing."}
+    if single_statement and len(statements) > 1:
+        return {"status": "error", "error_message": "Only a single SQL statement is supported here."}
+
+    descriptions: List[object] = []
+    first_stream = stream_statement(statements[0], on_description=descriptions.append)
+    started = time.perf_counter()
+    try:
+        first_batch = next(first_stream)
+    except Exception as exc:
+        return {"status": "error", "error_message": "MySQL query failed.", "detail": str(exc)}
+    # Streamed row counts are unknown here; the trace times the first batch only.
+    _trace_statements(statements, None, started)
+
+    streams = [(statements[0], prepend_batch(first_batch, first_stream))]
+    streams.extend((statement, stream_statement(statement)) for statement in statements[1:])
+    return {
+        "status": "success",
+        "sql": sql,
+        "statements": statements,
+        "streams": streams,
+        "description": descriptions[0] if descriptions else None,
+    }
@@ -1,17 +1,130 @@
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.tools.tool_context import ToolContext
+from google.genai import types
 
+from ...agents.llm_gateway import LlmAdmissionError
+from ...agents.router import FAST, STRONG, current_tier, model_tier_scope
 from ...agents.sql_generator_agent import sql_generator_agent
 from ...config import load_config
+from ...utils import metrics
 from ...utils.sql_dialect import get_sql_dialect_rules, normalize_db_type
-from .sql_utils import _coerce_text, _normalize_sql
+from .sql_utils import _coerce_text, _normalize_sql, find_unknown_tables, validate_sql_is_readonly
 
 
 _SQL_GENERATOR_TOOL = AgentTool(sql_generator_agent)
+# Sampling temperature step between speculative candidates; candidate 0 keeps the
+# agent's own settings, so k=1 behaves exactly as before.
+_CANDIDATE_TEMPERATURE_STEP = 0.35
+_MAX_CANDIDATE_TEMPERATURE = 1.0
+
+
+@lru_cache(maxsize=None)
+def _candidate_tool(index: int) -> AgentTool:
+    """Generator tool for speculative candidate index, sampled differently from the others.
+
+    Identical requests to the same deterministic agent return near-identical SQL,
+    so each extra candidate gets a higher temperature and its own seed.
+    """
+    if index == 0:
+        return _SQL_GENERATOR_TOOL
+    config = types.GenerateContentConfig(
+        temperature=min(_CANDIDATE_TEMPERATURE_STEP * index, _MAX_CANDIDATE_TEMPERATURE),
+        seed=index,
+    )
+    return AgentTool(sql_generator_agent.clone(update={"generate_content_config": config}))
+
+
+def _candidate_error(sql: str, table_names: List[str]) -> str | None:
+    if not sql:
+        return "Empty SQL from generator."
+    if not validate_sql_is_readonly(sql):
+        return "Only read-only SQL queries are allowed."
+    unknown = find_unknown_tables(sql, table_names)
+    if unknown:
+        return f"SQL references tables outside the schema map: {', '.join(unknown)}."
+    return None
+
+
+async def _generate_candidate(prompt: str, tool_context: ToolContext, index: int = 0) -> str:
+    sql_text = await _candidate_tool(index).run_async(
+        args={"request": prompt},
+        tool_context=tool_context,
+    )
+    return _normalize_sql(sql_text)
+
+
+async def _speculative_sql(
+    prompt: str,
+    tool_context: ToolContext,
+    candidates: int,
+    table_names: List[str],
+) -> Tuple[str, str | None]:
+    """Request candidates in parallel and keep the first that passes the checks.
+
+    Each candidate samples with its own temperature and seed (see
+    _candidate_tool). Returns (sql, None) on success or ("", last error). The
+    remaining requests are cancelled as soon as one candidate passes.
+    """
+    tasks = [
+        asyncio.ensure_future(_generate_candidate(prompt, tool_context, index))
+        for index in range(candidates)
+    ]
+    metrics.increment("sql_speculative_candidates", candidates)
+    last_error = "SQL generator failed."
+    admission_error: LlmAdmissionError | None = None
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                sql = await finished
+            except LlmAdmissionError as exc:
+                admission_error = admission_error or exc
+                continue
+            except Exception as exc:
+                last_error = str(exc)
+                continue
+            error = _candidate_error(sql, table_names)
+            if error is None:
+                metrics.increment("sql_speculative_used")
+                return sql, None
+            metrics.increment("sql_speculative_rejected")
+            last_error = error
+        if admission_error is not None:
+            raise admission_error
+        return "", last_error
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.increment("sql_speculative_cancelled", len(pending))
+
+
+async def _generate(
+    prompt: str,
+    tool_context: ToolContext,
+    candidates: int,
+    table_names: List[str],
+) -> Tuple[str, str | None, str | None]:
+    """Return (sql, None, None) or ("", message for the agent, detail for last_error)."""
+    if candidates > 1:
+        sql_text, error = await _speculative_sql(prompt, tool_context, candidates, table_names)
+        return sql_text, error, error
+
+    try:
+        sql_text = await _generate_candidate(prompt, tool_context)
+    except LlmAdmissionError:
+        raise
+    except Exception as exc:
+        return "", "SQL generator failed.", str(exc)
+    if not sql_text:
+        return "", "Empty SQL from generator.", "Empty SQL from generator."
+    return sql_text, None, None
 
 
 async def generate_sql(
@@ -50,20 +163,28 @@ async def generate_sql(
         "Dialect rules:",
         f"{dialect_rules}",
     ]
+    previous_turn = tool_context.state.get("previous_turn") or {}
+    if previous_turn.get("sql"):
+        # Follow-ups ("now split that by currency") are usually edits of the last query.
+        prompt_parts += [
+            f"Previous question: {_coerce_text(previous_turn.get('question')).strip()}",
+            f"Previous SQL: {previous_turn['sql']}",
+        ]
     prompt = "\n".join(prompt_parts) + "\n"
-    try:
-        sql_text = await _SQL_GENERATOR_TOOL.run_async(
-            args={"request": prompt},
-            tool_context=tool_context,
-        )
-    except Exception as exc:
-        tool_context.state["last_error"] = str(exc)
-        return {"success": False, "message": "SQL generator failed."}
+    table_names = list(table_schemas)
+    candidates = config.sql_speculative_candidates
+    sql_text, message, detail = await _generate(prompt, tool_context, candidates, table_names)
+    if current_tier() == FAST and (message or _candidate_error(sql_text, table_names)):
+        # The fast deployment produced nothing usable: retry once on the strong one.
+        metrics.increment("router_fallbacks", agent="sql_generator")
+        with model_tier_scope(STRONG):
+            sql_text, message, detail = await _generate(prompt, tool_context, candidates, table_names)
 
-    sql_text = _normalize_sql(sql_text)
-    if not sql_text:
-        tool_context.state["last_error"] = "Empty SQL from generator."
-        return {"success": False, "message": "Empty SQL from generator."}
+    if message:
+        tool_context.state["last_error"] = detail
+        return {"success": False, "message": message}
 
     tool_context.state["generated_sql"] = sql_text
+    if candidates > 1:
+        return {"success": True, "sql": sql_text, "reason": f"first valid of {candidates} candidates"}
     return {"success": True, "sql": sql_text, "reason": "generated by sql_generator_agent"}
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import datetime
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Callable, ContextManager, Dict, List, NamedTuple, Optional, Tuple
+
+import sqlparse
+from sqlparse import sql as S
+from sqlparse import tokens as T
+
+from ...config import load_config
+from ...database import TableVersion, table_version
+from ...results import ColumnarResult, SpilledResult, approx_nbytes
+from ...utils import metrics
+from ...utils.query_log import record_cache_hit
+from .sql_executor import StatementExecutionError
+from .sql_utils import _bare_identifier
+
+# Runs statements and returns one result per statement (execute_statements).
+StatementRunner = Callable[[List[str]], List[ColumnarResult]]
+# Opens a StatementRunner whose statements all read one snapshot (snapshot_statements).
+SnapshotRunner = Callable[[], ContextManager[StatementRunner]]
+
+_PLAIN_COLUMN = re.compile(r"^[\w`\"\[\]]+(?:\.[\w`\"\[\]]+)?$")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_DIRECTION = re.compile(r"\s+(ASC|DESC)$", re.IGNORECASE)
+# A window relative to the clock moves without the table changing.
+_CLOCK = frozenset(
+    {"CURDATE", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP", "CURTIME", "LOCALTIME",
+     "LOCALTIMESTAMP", "NOW", "SYSDATE", "UNIX_TIMESTAMP", "UTC_DATE", "UTC_TIME", "UTC_TIMESTAMP"}
+)
+
+
+class TimeSeriesQuery(NamedTuple):
+    """A SELECT grouped and ordered on a time column, split so buckets can be re-queried.
+
+    head is the statement up to its WHERE condition, tail everything from
+    GROUP BY on; bucket is the grouped column as written and bucket_index its
+    position in the SELECT list.
+    """
+
+    table: str
+    bucket: str
+    bucket_index: int
+    head: str
+    from_clause: str
+    condition: Optional[str]
+    tail: str
+
+    def _where(self, predicate: str) -> str:
+        if self.condition:
+            return f"WHERE ({self.condition}) AND {predicate}"
+        return f"WHERE {predicate}"
+
+    def since(self, literal: str) -> str:
+        """The statement restricted to buckets at or after literal."""
+        return f"{self.head} {self._where(f'{self.bucket} >= {literal}')} {self.tail}"
+
+    def older(self, literal: str, updated_column: str) -> str:
+        """COUNT(*) and MAX(updated_column) of the source rows in buckets before literal.
+
+        Both can be read from an index on (bucket, updated_column) without
+        touching the rows.
+        """
+        predicate = f"{self.bucket} < {literal}"
+        return f"SELECT COUNT(*), MAX({updated_column}) {self.from_clause} {self._where(predicate)}"
+
+
+def _significant(tokens) -> List[object]:
+    return [token for token in tokens if not token.is_whitespace and token.ttype not in T.Comment]
+
+
+def _items(token) -> List[object]:
+    if isinstance(token, S.IdentifierList):
+        return [item for item in token.get_identifiers()]
+    return [token]
+
+
+def _reads_clock(token) -> bool:
+    if token.ttype in T.String:
+        return token.value.strip("'\"").lower() == "now"
+    return (token.ttype in T.Name or token.ttype in T.Keyword) and token.value.upper() in _CLOCK
+
+
+def _expression(item) -> str:
+    """An item's text without its alias."""
+    text = str(item).strip()
+    alias = item.get_alias() if isinstance(item, S.Identifier) else None
+    if alias:
+        text = re.sub(rf"\s+(?:AS\s+)?[`\"]?{re.escape(alias)}[`\"]?$", "", text, flags=re.IGNORECASE)
+    return text
+
+
+@lru_cache(maxsize=256)
+def time_series_query(statement: str) -> Optional[TimeSeriesQuery]:
+    """Split statement when it can be refreshed by time bucket, else None.
+
+    Eligible: a single-table SELECT whose first GROUP BY key is a plain column
+    that is also selected and that the result is ordered by, ascending. LIMIT,
+    joins, subqueries, UNION and window functions are excluded because new
+    rows would change older buckets or the rows returned for them, and so are
+    statements that read the clock (NOW(), CURDATE(), date('now'), ...), whose
+    buckets move without the table changing.
+    """
+    parsed = sqlparse.parse(statement.strip().rstrip(";"))
+    if len(parsed) != 1:
+        return None
+    flat = [token for token in parsed[0].flatten() if not token.is_whitespace]
+    if sum(1 for token in flat if token.ttype in T.DML) != 1:
+        return None
+    if any(token.ttype in T.Keyword and token.normalized in ("OVER", "LIMIT", "UNION", "UNION ALL") for token in flat):
+        return None
+    if any(_reads_clock(token) for token in flat):
+        return None
+
+    tokens = parsed[0].tokens
+    significant = _significant(tokens)
+    if not significant or significant[0].ttype not in T.DML or significant[0].normalized != "SELECT":
+        return None
+    clauses: Dict[str, object] = {}
+    where = None
+    position = {}
+    for index, token in enumerate(tokens):
+        if isinstance(token, S.Where):
+            where = token
+            position["WHERE"] = index
+        elif token.ttype in T.Keyword and token.normalized in ("FROM", "GROUP BY", "HAVING", "ORDER BY"):
+            position[token.normalized] = index
+        elif token.ttype in T.Keyword and "JOIN" in token.normalized:
+            return None
+    if not {"FROM", "GROUP BY", "ORDER BY"} <= position.keys():
+        return None
+    for name, start in position.items():
+        following = _significant(tokens[start + 1 :])
+        if following:
+            clauses[name] = following[0]
+
+    source = clauses.get("FROM")
+    if not isinstance(source, S.Identifier) or not _PLAIN_COLUMN.match(_expression(source)):
+        return None
+    group_keys = _items(clauses["GROUP BY"])
+    bucket = _expression(group_keys[0])
+    if not _PLAIN_COLUMN.match(bucket):
+        return None
+    bucket_name = _bare_identifier(bucket)
+
+    select_list = next((token for token in significant[1:] if isinstance(token, (S.Identifier, S.IdentifierList))), None)
+    if select_list is None:
+        return None
+    selected = _items(select_list)
+    if any(str(item).strip().endswith("*") and "(" not in str(item) for item in selected):
+        return None
+    bucket_index = None
+    for index, item in enumerate(selected):
+        if _PLAIN_COLUMN.match(_expression(item)) and _bare_identifier(_expression(item)) == bucket_name:
+            bucket_index = index
+            break
+    if bucket_index is None:
+        return None
+
+    order = str(_items(clauses["ORDER BY"])[0]).strip()
+    direction = _DIRECTION.search(order)
+    if direction and direction.group(1).upper() == "DESC":
+        return None
+    order = _DIRECTION.sub("", order)
+    alias = selected[bucket_index].get_alias() if isinstance(selected[bucket_index], S.Identifier) else None
+    if order != str(bucket_index + 1) and _bare_identifier(order) not in {bucket_name, (alias or "").lower()}:
+        return None
+
+    from_start = position["FROM"]
+    where_start = position.get("WHERE", position["GROUP BY"])
+    return TimeSeriesQuery(
+        table=source.get_real_name(),
+        bucket=bucket,
+        bucket_index=bucket_index,
+        head="".join(str(token) for token in tokens[:where_start]).strip(),
+        from_clause="".join(str(token) for token in tokens[from_start:where_start]).strip(),
+        condition=str(where).strip()[len("WHERE") :].strip() if where is not None else None,
+        tail="".join(str(token) for token in tokens[position["GROUP BY"] :]).strip(),
+    )
+
+
+def _is_time_value(value: object) -> bool:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return True
+    return isinstance(value, str) and bool(_ISO_DATE.match(value))
+
+
+def _sql_literal(value: object) -> str:
+    if isinstance(value, datetime.datetime):
+        text = value.isoformat(sep=" ")
+    elif isinstance(value, datetime.date):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _first_row(result: ColumnarResult) -> Optional[Tuple[object, ...]]:
+    return tuple(column[0] for column in result.data) if result.row_count and result.data else None
+
+
+class _Entry:
+    __slots__ = ("query", "result", "boundary", "older", "version", "full_at", "nbytes")
+
+    def __init__(
+        self,
+        query: TimeSeriesQuery,
+        result: ColumnarResult,
+        boundary: object,
+        older: Optional[Tuple[object, ...]],
+        version: TableVersion,
+    ) -> None:
+        self.query = query
+        self.result = result
+        self.boundary = boundary
+        self.older = older
+        self.version = version
+        self.full_at = time.monotonic()
+        self.nbytes = approx_nbytes(result)
+
+
+class IncrementalCache:
+    """Results of time-series statements, refreshed by re-querying their latest buckets.
+
+    A full run caches the result with its last bucket (the boundary), the
+    table's version and, when updated_column names the table's last-modified
+    column, COUNT(*) and MAX(updated_column) of the source rows before the
+    boundary (read in the same snapshot as the result, and cheap with an index
+    on the bucket and updated_column). A later run of the same statement then:
+
+    - returns the cached result when the table has not changed since;
+    - otherwise reads COUNT/MAX again and, when they are unchanged, re-runs
+      the statement for buckets at or after the boundary only (in the same
+      snapshot) and splices them onto the older cached buckets;
+    - runs in full when COUNT/MAX moved (older rows were added, removed or
+      updated), there is no updated_column (an in-place update would go
+      unseen, so nothing is merged), the table version is unknown, or the
+      entry is older than full_refresh_seconds (the bound on writes that do
+      not move updated_column).
+
+    Entries are evicted least recently used first beyond max_bytes.
+    """
+
+    def __init__(self, max_bytes: int, full_refresh_seconds: float, updated_column: Optional[str] = None) -> None:
+        self.max_bytes = max_bytes
+        self.full_refresh_seconds = full_refresh_seconds
+        self.updated_column = updated_column
+        self.nbytes = 0
+        self.outcomes: Counter = Counter()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _count(self, outcome: str, reason: Optional[str] = None) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+        if reason is None:
+            metrics.increment("incremental_refresh", outcome=outcome)
+        else:
+            metrics.increment("incremental_refresh", outcome=outcome, reason=reason)
+
+    def _get(self, statement: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(statement)
+            if entry is not None:
+                self._entries.move_to_end(statement)
+            return entry
+
+    def _put(self, statement: str, entry: _Entry) -> None:
+        with self._lock:
+            previous = self._entries.pop(statement, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            if entry.nbytes > self.max_bytes:
+                return
+            self._entries[statement] = entry
+            self.nbytes += entry.nbytes
+            while self.nbytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def _drop(self, statement: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(statement, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+
+    def execute(self, statement: str, run: StatementRunner, snapshot: SnapshotRunner) -> ColumnarResult:
+        """Result of statement, from the cache, a bucket refresh or a full run.
+
+        Statements that are not time series go to run; a refresh or full run
+        reads its statements through one snapshot().
+        """
+        query = time_series_query(statement)
+        if query is None:
+            return run([statement])[0]
+        version = table_version(query.table)
+        entry = self._get(statement)
+        if entry is None:
+            reason = "miss"
+        elif version is None:
+            reason = "unknown_version"
+        elif time.monotonic() - entry.full_at >= self.full_refresh_seconds:
+            reason = "max_age"
+        elif version.updated_at == entry.version.updated_at and entry.version.settled:
+            self._count("unchanged")
+            record_cache_hit("incremental")
+            return entry.result
+        else:
+            merged = self._refresh(statement, entry, version, snapshot)
+            if merged is not None:
+                return merged
+            reason = "older_rows_changed" if entry.older is not None else "unguarded"
+        return self._full(statement, query, version, snapshot, reason)
+
+    def _refresh(
+        self, statement: str, entry: _Entry, version: TableVersion, snapshot: SnapshotRunner
+    ) -> Optional[ColumnarResult]:
+        if entry.older is None or not self.updated_column:
+            return None
+        literal = _sql_literal(entry.boundary)
+        with snapshot() as run:
+            if _first_row(run([entry.query.older(literal, self.updated_column)])[0]) != entry.older:
+                return None
+            recent = run([entry.query.since(literal)])[0]
+        cached = entry.result
+        if isinstance(recent, SpilledResult) or recent.columns != cached.columns:
+            return None
+        keep = bisect_left(cached.data[entry.query.bucket_index], entry.boundary)
+        merged = ColumnarResult.concat(statement, cached.columns, [cached.page(0, keep), recent])
+        refreshed = _Entry(entry.query, merged, entry.boundary, entry.older, version)
+        refreshed.full_at = entry.full_at
+        self._put(statement, refreshed)
+        self._count("merged")
+        record_cache_hit("incremental")
+        return merged
+
+    def _full(
+        self,
+        statement: str,
+        query: TimeSeriesQuery,
+        version: Optional[TableVersion],
+        snapshot: SnapshotRunner,
+        reason: str,
+    ) -> ColumnarResult:
+        self._count("full", reason)
+        with snapshot() as run:
+            result = run([statement])[0]
+            buckets = result.data[query.bucket_index] if query.bucket_index < len(result.data) else ()
+            cacheable = (
+                version is not None
+                and not isinstance(result, SpilledResult)
+                and result.row_count > 0
+                and all(_is_time_value(value) for value in buckets)
+                and all(buckets[index] <= buckets[index + 1] for index in range(len(buckets) - 1))
+            )
+            if not cacheable:
+                self._drop(statement)
+                return result
+            boundary = buckets[-1]
+            older = None
+            if self.updated_column:
+                try:
+                    older = _first_row(run([query.older(_sql_literal(boundary), self.updated_column)])[0])
+                except StatementExecutionError:
+                    # E.g. the table has no such column: cache, but never merge.
+                    older = None
+        self._put(statement, _Entry(query, result, boundary, older, version))
+        return result
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "outcomes": dict(self.outcomes),
+            }
+
+
+_CACHE: Optional[IncrementalCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_incremental_cache() -> Optional[IncrementalCache]:
+    """The process-wide cache, or None unless INCREMENTAL_REFRESH is on."""
+    global _CACHE
+    config = load_config()
+    if not config.incremental_refresh:
+        return None
+    column = config.incremental_updated_at_column
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = IncrementalCache(
+                config.incremental_cache_max_bytes,
+                config.incremental_full_refresh_seconds,
+                column if _PLAIN_COLUMN.match(column) else None,
+            )
+        return _CACHE
@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import base64
+import datetime
+import hashlib
+import json
+import math
+import re
+import time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import sqlparse
+from sqlparse import sql as S
+from sqlparse import tokens as T
+
+from ...config import load_config
+from ...database import active_dialect
+from ...results import ColumnarResult, get_result_store
+from ...utils import metrics
+from .execution import _trace_statements, execute_sql
+from .sql_executor import execute_statements
+from .sql_utils import _normalize_sql, _split_sql_statements, validate_sql_is_readonly
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+_ORDER_ITEM = re.compile(r"^(?P<expr>.+?)(?:\s+(?P<direction>ASC|DESC))?$", re.IGNORECASE | re.DOTALL)
+_PLAIN_NAME = re.compile(r"^[\w`\"\[\]]+(?:\.[\w`\"\[\]]+)?$")
+_ORDINAL = re.compile(r"^\d+$")
+
+
+class PagingError(ValueError):
+    """A cursor that is malformed, expired or belongs to another query."""
+
+
+def encode_cursor(state: Dict[str, object]) -> str:
+    """Opaque, URL-safe cursor for the given paging state."""
+    data = json.dumps(state, separators=(",", ":"), ensure_ascii=True).encode("ascii")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, object]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(data)
+    except (ValueError, TypeError) as exc:
+        raise PagingError("Invalid cursor.") from exc
+    if not isinstance(state, dict):
+        raise PagingError("Invalid cursor.")
+    return state
+
+
+def result_cursor(result_id: str, offset: int) -> str:
+    """Cursor for rows offset.. of a result held in the result store."""
+    return encode_cursor({"result_id": result_id, "offset": offset})
+
+
+class KeysetQuery(NamedTuple):
+    """A SELECT split into its body and its top-level ORDER BY keys.
+
+    Each key is (name, descending), where name is the output column the key
+    sorts on.
+    """
+
+    inner: str
+    keys: Tuple[Tuple[str, bool], ...]
+
+
+def _output_name(expression: str) -> str:
+    return expression.split(".")[-1].strip("`\"[]")
+
+
+def _column_reference(expression: str) -> str:
+    return re.sub(r"[`\"\[\]]", "", expression).lower()
+
+
+def _select_items(tokens) -> Optional[List[Tuple[Optional[str], Optional[str]]]]:
+    """(output name, column reference) per item of the first select list.
+
+    The name is None for an unaliased expression and "*" for a wildcard; the
+    reference is the normalized ``table.column`` an item selects, or None. None
+    when the select list cannot be read.
+    """
+    listed = None
+    for token in tokens[1:]:
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+        if token.ttype in T.Keyword and token.normalized in ("DISTINCT", "ALL", "DISTINCTROW"):
+            continue
+        listed = token
+        break
+    if isinstance(listed, S.IdentifierList):
+        candidates = list(listed.get_identifiers())
+    elif listed is not None:
+        candidates = [listed]
+    else:
+        return None
+    items: List[Tuple[Optional[str], Optional[str]]] = []
+    for item in candidates:
+        if item.ttype in T.Wildcard or (isinstance(item, S.Identifier) and item.is_wildcard()):
+            items.append(("*", None))
+            continue
+        if item.ttype in T.Keyword:
+            return None
+        alias = item.get_alias() if isinstance(item, S.Identifier) else None
+        text = str(item).strip()
+        if alias:
+            text = re.sub(r"\s+(?:AS\s+)?[\w`\"\[\]]+$", "", text, flags=re.IGNORECASE)
+        reference = _column_reference(text) if _PLAIN_NAME.match(text) else None
+        if alias:
+            items.append((alias, reference))
+        else:
+            items.append((_output_name(text) if reference else None, reference))
+    return items
+
+
+def _order_key(expression: str, items: Optional[List[Tuple[Optional[str], Optional[str]]]]) -> Optional[str]:
+    """Output column an ORDER BY expression sorts on, or None when it cannot be told.
+
+    A position names the select item it points at. A qualified name must be the
+    column of the one select item its bare name resolves to: with ``a.name`` and
+    ``b.name AS name`` both around, the bare name is not enough.
+    """
+    if _ORDINAL.match(expression):
+        position = int(expression)
+        if items is None or not 0 < position <= len(items):
+            return None
+        if any(name == "*" for name, _ in items[:position]):
+            return None
+        return items[position - 1][0]
+    name = _output_name(expression)
+    if "." not in expression.strip("`\"[]"):
+        return name
+    if items is None or any(item_name == "*" for item_name, _ in items):
+        return None
+    matches = [reference for item_name, reference in items if item_name and item_name.lower() == name.lower()]
+    if len(matches) != 1 or matches[0] != _column_reference(expression):
+        return None
+    return name
+
+
+@lru_cache(maxsize=256)
+def keyset_query(statement: str) -> Optional[KeysetQuery]:
+    """Split statement for keyset paging, or None when it cannot be paged that way.
+
+    Eligible: a SELECT whose top-level ORDER BY only names selected columns
+    (plain names, aliases or positions of named items) and that has no
+    LIMIT/OFFSET of its own.
+    """
+    parsed = sqlparse.parse(statement.strip().rstrip(";"))
+    if len(parsed) != 1:
+        return None
+    tokens = parsed[0].tokens
+    significant = [token for token in tokens if not token.is_whitespace and token.ttype not in T.Comment]
+    if not significant or significant[0].ttype not in T.DML or significant[0].normalized != "SELECT":
+        return None
+    order_at = None
+    for index, token in enumerate(tokens):
+        if token.ttype in T.Keyword and token.normalized in ("LIMIT", "OFFSET", "FOR UPDATE", "INTO"):
+            return None
+        if token.ttype in T.Keyword and token.normalized == "ORDER BY":
+            order_at = index
+    if order_at is None:
+        return None
+    following = [token for token in tokens[order_at + 1 :] if not token.is_whitespace]
+    if len(following) != 1 or not isinstance(following[0], (S.Identifier, S.IdentifierList)):
+        return None
+    items = following[0].get_identifiers() if isinstance(following[0], S.IdentifierList) else [following[0]]
+    selected = _select_items(tokens)
+    keys = []
+    for item in items:
+        match = _ORDER_ITEM.match(str(item).strip())
+        expression = match.group("expr").strip()
+        if not (_ORDINAL.match(expression) or _PLAIN_NAME.match(expression)):
+            return None
+        name = _order_key(expression, selected)
+        if not name:
+            return None
+        keys.append((name, (match.group("direction") or "").upper() == "DESC"))
+    inner = "".join(str(token) for token in tokens[:order_at]).strip()
+    return KeysetQuery(inner, tuple(keys))
+
+
+def _quote(name: str) -> str:
+    if active_dialect() == "mysql":
+        return "`" + name.replace("`", "``") + "`"
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _typed(value: object) -> Optional[List[str]]:
+    """[tag, text] for a key value kept in a cursor; None when it cannot be compared in SQL."""
+    if value is None:
+        return ["z", ""]
+    if isinstance(value, bool):
+        return ["i", str(int(value))]
+    if isinstance(value, int):
+        return ["i", str(value)]
+    if isinstance(value, float):
+        return ["f", repr(value)] if math.isfinite(value) else None
+    if isinstance(value, Decimal):
+        return ["n", str(value)] if value.is_finite() else None
+    if isinstance(value, datetime.datetime):
+        return ["s", value.isoformat(sep=" ")]
+    if isinstance(value, (datetime.date, datetime.time)):
+        return ["s", value.isoformat()]
+    if isinstance(value, (str, datetime.timedelta)):
+        return ["s", str(value)]
+    return None
+
+
+def _literal(typed: Sequence[str]) -> Optional[str]:
+    """SQL literal for a [tag, text] pair from a cursor; None stands for NULL."""
+    tag, text = typed
+    if tag == "z":
+        return None
+    try:
+        if tag == "i":
+            return str(int(text))
+        if tag == "f":
+            number = float(text)
+            if not math.isfinite(number):
+                raise ValueError(text)
+            # An exponent makes MySQL read the literal as DOUBLE, not DECIMAL.
+            rendered = repr(number)
+            return rendered if "e" in rendered else rendered + "e0"
+        if tag == "n":
+            decimal = Decimal(text)
+            if not decimal.is_finite():
+                raise ValueError(text)
+            return str(decimal)
+    except (ValueError, InvalidOperation) as exc:
+        raise PagingError("Invalid cursor.") from exc
+    if tag != "s":
+        raise PagingError("Invalid cursor.")
+    if active_dialect() == "mysql":
+        text = text.replace("\\", "\\\\")
+    return "'" + text.replace("'", "''") + "'"
+
+
+def keyset_predicate(names: Sequence[str], descending: Sequence[bool], literals: Sequence[Optional[str]]) -> str:
+    """Rows that sort after the given key values.
+
+    NULLs sort first ascending and last descending (MySQL and SQLite), so a
+    NULL key is handled with IS [NOT] NULL rather than a comparison.
+    """
+    terms = []
+    for index, name in enumerate(names):
+        literal = literals[index]
+        if literal is None:
+            if descending[index]:
+                continue
+            after = f"{name} IS NOT NULL"
+        elif descending[index]:
+            after = f"({name} < {literal} OR {name} IS NULL)"
+        else:
+            after = f"{name} > {literal}"
+        equal = [
+            f"{names[prior]} IS NULL" if literals[prior] is None else f"{names[prior]} = {literals[prior]}"
+            for prior in range(index)
+        ]
+        terms.append(" AND ".join(equal + [after]))
+    if not terms:
+        return "1 = 0"
+    return " OR ".join(f"({term})" for term in terms)
+
+
+def _key_indexes(query: KeysetQuery, columns: List[str]) -> Optional[List[int]]:
+    indexes = []
+    for reference, _ in query.keys:
+        matches = [position for position, name in enumerate(columns) if name.lower() == reference.lower()]
+        if len(matches) != 1:
+            return None
+        indexes.append(matches[0])
+    return indexes
+
+
+def _order_by(query: KeysetQuery) -> str:
+    return ", ".join(_quote(name) + (" DESC" if descending else "") for name, descending in query.keys)
+
+
+def _page_sql(query: KeysetQuery, where: Optional[str], limit: int) -> str:
+    condition = f" WHERE {where}" if where else ""
+    return f"SELECT * FROM ({query.inner}) AS _page{condition} ORDER BY {_order_by(query)} LIMIT {limit}"
+
+
+def _tied_page_sql(query: KeysetQuery, where: Optional[str], limit: int) -> str:
+    """_page_sql plus a last column that is 1 where a row ties the one before it on every key.
+
+    The comparison runs in SQL over the limited rows only, so under a collation
+    such as NOCASE or utf8mb4_0900_ai_ci strings that differ in Python still tie.
+    """
+    same = "<=>" if active_dialect() == "mysql" else "IS"
+    order = _order_by(query)
+    tied = " AND ".join(
+        f"{_quote(name)} {same} LAG({_quote(name)}) OVER (ORDER BY {order})" for name, _ in query.keys
+    )
+    return (
+        f"SELECT _rows.*, CASE WHEN {tied} THEN 1 ELSE 0 END AS _keyset_tie "
+        f"FROM ({_page_sql(query, where, limit)}) AS _rows ORDER BY {order}"
+    )
+
+
+def _run(statement: str) -> ColumnarResult:
+    started = time.perf_counter()
+    result = execute_statements([statement])[0]
+    _trace_statements([statement], [result], started)
+    return result
+
+
+def _page_payload(
+    sql: str,
+    result: ColumnarResult,
+    page_size: int,
+    next_cursor: Optional[str],
+    paging: str,
+    row_count: Optional[int],
+) -> Dict[str, object]:
+    metrics.increment("sql_pages", paging=paging)
+    return {
+        "status": "success",
+        "sql": sql,
+        "columns": result.columns,
+        "rows": result.rows,
+        "row_count": row_count,
+        "page_size": page_size,
+        "paging": paging,
+        "next_cursor": next_cursor,
+    }
+
+
+def stored_page(result_id: str, offset: int, page_size: int) -> Dict[str, object]:
+    """A page of the primary result set of a result held in the result store."""
+    payload = get_result_store().get(result_id)
+    if payload is None:
+        raise PagingError("Result expired; run the query again.")
+    result_sets = payload.get("result_sets") or [ColumnarResult.empty(payload.get("sql", ""))]
+    primary = result_sets[0]
+    page = primary.page(offset, page_size)
+    end = offset + page.row_count
+    next_cursor = result_cursor(result_id, end) if end < primary.row_count else None
+    response = _page_payload(payload.get("sql", ""), page, page_size, next_cursor, "result", primary.row_count)
+    response["result_id"] = result_id
+    return response
+
+
+def _keyset_page(
+    sql: str,
+    digest: str,
+    query: KeysetQuery,
+    state: Optional[Dict[str, object]],
+    page_size: int,
+) -> Optional[Dict[str, object]]:
+    where = None
+    names: Optional[List[str]] = None
+    if state is not None:
+        names = state.get("names")
+        after = state.get("after")
+        if (
+            not isinstance(names, list)
+            or not isinstance(after, list)
+            or len(names) != len(query.keys)
+            or len(after) != len(query.keys)
+            or not all(isinstance(value, list) and len(value) == 2 for value in after)
+        ):
+            raise PagingError("Invalid cursor.")
+        literals = [_literal(value) for value in after]
+        where = keyset_predicate([_quote(str(name)) for name in names], [desc for _, desc in query.keys], literals)
+
+    tied = _run(_tied_page_sql(query, where, page_size + 1))
+    ties = tied.data[-1]
+    result = ColumnarResult(tied.sql, tied.columns[:-1], tied.data[:-1], row_count=tied.row_count)
+    indexes = _key_indexes(query, result.columns)
+    if indexes is None:
+        return None
+    names = [result.columns[index] for index in indexes]
+    if result.row_count <= page_size:
+        return _page_payload(sql, result, page_size, None, "keyset", None)
+
+    page = result.page(0, page_size)
+    boundary = tuple(result.data[index][page_size - 1] for index in indexes)
+    typed = [_typed(value) for value in boundary]
+    if any(value is None for value in typed):
+        return None
+    if ties[page_size]:
+        # The rows tied with the last one straddle the page end; keep the whole tie
+        # group on this page, since the next page's ">" skips every row of it.
+        max_rows = load_config().result_page_max_rows
+        literals = [_literal(value) for value in typed]
+        equal = " AND ".join(
+            f"{_quote(name)} IS NULL" if literal is None else f"{_quote(name)} = {literal}"
+            for name, literal in zip(names, literals)
+        )
+        group = _run(_page_sql(query, equal, max_rows + 1))
+        if not 0 < group.row_count <= max_rows:
+            return None
+        start = page_size - 1
+        while start > 0 and ties[start]:
+            start -= 1
+        page = ColumnarResult.concat(result.sql, result.columns, [result.page(0, start), group])
+    next_cursor = encode_cursor({"sql": digest, "names": names, "after": typed})
+    return _page_payload(sql, page, page_size, next_cursor, "keyset", None)
+
+
+def run_sql_page(
+    query: str,
+    tool_context: ToolContext,
+    page_size: int,
+    cursor: Optional[str] = None,
+) -> Dict[str, object]:
+    """One page of a single SELECT, and a cursor for the next one.
+
+    A cursor into a stored result is served from the result store. Otherwise
+    statements with a usable ORDER BY are re-run per page as
+    ``SELECT * FROM (<statement>) ... WHERE <keys after cursor> LIMIT n``, so
+    the first page costs the same however large the full result is. Other
+    statements (and keyset pages the keys cannot delimit) run once in full;
+    the result is stored and paged from memory. Raises PagingError for a bad
+    cursor; SQL errors come back as an error payload, with the database
+    message in tool_context.state["last_error"].
+    """
+    sql = _normalize_sql(query)
+    if not validate_sql_is_readonly(sql):
+        return {"status": "error", "error_message": "Only read-only SQL queries are allowed."}
+    statements = _split_sql_statements(sql)
+    if len(statements) != 1:
+        return {"status": "error", "error_message": "Paging needs a single SQL statement."}
+
+    state = decode_cursor(cursor) if cursor else None
+    if state is not None and "result_id" in state:
+        offset = state.get("offset")
+        if not isinstance(offset, int) or offset < 0:
+            raise PagingError("Invalid cursor.")
+        return stored_page(str(state["result_id"]), offset, page_size)
+
+    digest = hashlib.sha1(statements[0].encode("utf-8")).hexdigest()[:16]
+    if state is not None and state.get("sql") != digest:
+        raise PagingError("Cursor does not belong to this query.")
+    keyset = keyset_query(statements[0])
+    if keyset is not None:
+        try:
+            page = _keyset_page(sql, digest, keyset, state, page_size)
+        except PagingError:
+            raise
+        except Exception as exc:
+            if state is not None:
+                tool_context.state["last_error"] = str(exc)
+                return {"status": "error", "error_message": "MySQL query failed."}
+            # E.g. an ORDER BY on a column that is not selected: page the full result instead.
+            page = None
+        if page is not None:
+            return page
+    if state is not None:
+        raise PagingError("The ORDER BY columns tie on too many rows to page on; add a unique column to it.")
+
+    result = execute_sql(sql, tool_context)
+    if result.get("status") != "success":
+        return result
+    return stored_page(tool_context.state["sql_result"]["result_id"], 0, page_size)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from ...config import load_config
+from ...database import active_dialect, pooled_connection
+from .sql_utils import SqlFingerprint
+
+_LATENCY_SAMPLES = 256
+
+
+def _percentile(ordered: List[float], percentile: float) -> float:
+    rank = min(len(ordered), max(1, int(round(percentile / 100.0 * len(ordered)))))
+    return ordered[rank - 1]
+
+
+class TemplateStat:
+    __slots__ = (
+        "key",
+        "template",
+        "example_sql",
+        "count",
+        "errors",
+        "rows",
+        "total_seconds",
+        "max_seconds",
+        "latencies",
+        "plan",
+        "planned_at",
+    )
+
+    def __init__(self, fingerprint: SqlFingerprint) -> None:
+        self.key = fingerprint.key
+        self.template = fingerprint.template
+        self.example_sql = ""
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.latencies: deque = deque(maxlen=_LATENCY_SAMPLES)
+        self.plan: Optional[List[Dict[str, object]]] = None
+        self.planned_at = 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        ordered = sorted(self.latencies)
+        payload: Dict[str, object] = {
+            "key": self.key,
+            "template": self.template,
+            "example_sql": self.example_sql,
+            "count": self.count,
+            "errors": self.errors,
+            "mean_rows": self.rows / self.count if self.count else 0.0,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds / self.count * 1000 if self.count else 0.0,
+            "p50_ms": _percentile(ordered, 50) * 1000 if ordered else 0.0,
+            "p95_ms": _percentile(ordered, 95) * 1000 if ordered else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+        if self.plan is not None:
+            payload["plan"] = self.plan
+        return payload
+
+
+class TemplateStats:
+    """Latency, row and error statistics per SQL template, plus its cached EXPLAIN plan.
+
+    Keeps at most max_templates; the least recently executed template is
+    dropped first. Percentiles come from the last executions of each template.
+    """
+
+    def __init__(self, max_templates: int, plan_ttl_seconds: float) -> None:
+        self.max_templates = max(1, max_templates)
+        self.plan_ttl_seconds = plan_ttl_seconds
+        self._stats: "OrderedDict[str, TemplateStat]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: SqlFingerprint, statement: str, seconds: float, rows: int, error: bool) -> None:
+        with self._lock:
+            stat = self._stats.get(fingerprint.key)
+            if stat is None:
+                stat = TemplateStat(fingerprint)
+                self._stats[fingerprint.key] = stat
+                while len(self._stats) > self.max_templates:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(fingerprint.key)
+            stat.example_sql = statement
+            stat.count += 1
+            stat.errors += int(error)
+            stat.rows += rows
+            stat.total_seconds += seconds
+            stat.max_seconds = max(stat.max_seconds, seconds)
+            stat.latencies.append(seconds)
+
+    def cached_plan(self, key: str) -> Optional[List[Dict[str, object]]]:
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None or stat.plan is None:
+                return None
+            if time.monotonic() - stat.planned_at >= self.plan_ttl_seconds:
+                return None
+            return stat.plan
+
+    def store_plan(self, key: str, plan: List[Dict[str, object]]) -> None:
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is not None:
+                stat.plan = plan
+                stat.planned_at = time.monotonic()
+
+    def example(self, key: str) -> Optional[str]:
+        with self._lock:
+            stat = self._stats.get(key)
+            return stat.example_sql if stat is not None else None
+
+    def top(self, limit: int, order_by: str = "total_ms") -> List[Dict[str, object]]:
+        """The slowest templates by order_by (total_ms, p95_ms, mean_ms, count or errors)."""
+        with self._lock:
+            rows = [stat.to_dict() for stat in self._stats.values()]
+        rows.sort(key=lambda row: row.get(order_by, 0.0), reverse=True)
+        return rows[:limit]
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "templates": len(self._stats),
+                "executions": sum(stat.count for stat in self._stats.values()),
+                "max_templates": self.max_templates,
+            }
+
+
+_STATS: Optional[TemplateStats] = None
+_STATS_LOCK = threading.Lock()
+
+
+def get_template_stats() -> TemplateStats:
+    global _STATS
+    with _STATS_LOCK:
+        if _STATS is None:
+            config = load_config()
+            _STATS = TemplateStats(config.sql_template_stats_max, config.sql_explain_ttl_seconds)
+        return _STATS
+
+
+def explain_template(key: str) -> Optional[List[Dict[str, object]]]:
+    """EXPLAIN the template's last executed statement, cached for SQL_EXPLAIN_TTL_SECONDS.
+
+    Returns None for an unknown template. Plans are per template, not per
+    literal, so one plan stands for every execution of the template.
+    """
+    stats = get_template_stats()
+    plan = stats.cached_plan(key)
+    if plan is not None:
+        return plan
+    statement = stats.example(key)
+    if statement is None:
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if active_dialect() == "sqlite" else "EXPLAIN "
+    with pooled_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(prefix + statement)
+            columns = [desc[0] for desc in cursor.description or ()]
+            plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    stats.store_plan(key, plan)
+    return plan
@@ -1,11 +1,36 @@
 from __future__ import annotations
 
-from typing import Dict, List
-
-from google.adk.tools.tool_context import ToolContext
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from ...config import load_config
-from ...database import get_mysql_connection
+from ...database import active_dialect, pooled_connection
+
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+# (loaded at, allowed tables, table schemas) of the last successful inspection.
+_SCHEMA_CACHE: Optional[Tuple[float, List[str], Dict[str, List[Dict[str, str]]]]] = None
+_SCHEMA_LOCK = threading.Lock()
+
+
+def _table_columns(cursor, table: str, database: str | None) -> List[Dict[str, str]]:
+    if active_dialect() == "sqlite":
+        escaped = table.replace('"', '""')
+        cursor.execute(f'PRAGMA table_info("{escaped}")')
+        return [{"name": row[1], "type": (row[2] or "").lower()} for row in cursor.fetchall()]
+    cursor.execute(
+        (
+            "SELECT COLUMN_NAME, DATA_TYPE "
+            "FROM INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
+            "ORDER BY ORDINAL_POSITION"
+        ),
+        (database, table),
+    )
+    return [{"name": row[0], "type": row[1]} for row in cursor.fetchall()]
 
 
 def inspect_table_schema(tool_context: ToolContext) -> Dict[str, object]:
@@ -17,35 +42,25 @@ def inspect_table_schema(tool_context: ToolContext) -> Dict[str, object]:
             "error_message": "Missing allowed tables. Set ALLOWED_TABLES or TARGET_TABLE.",
         }
 
+    table_schemas: Dict[str, List[Dict[str, str]]] = {}
+    missing_tables: List[str] = []
     try:
-        connection = get_mysql_connection()
-        cursor = connection.cursor()
-        table_schemas: Dict[str, List[Dict[str, str]]] = {}
-        missing_tables: List[str] = []
-        for table in config.allowed_tables:
-            cursor.execute(
-                (
-                    "SELECT COLUMN_NAME, DATA_TYPE "
-                    "FROM INFORMATION_SCHEMA.COLUMNS "
-                    "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s "
-                    "ORDER BY ORDINAL_POSITION"
-                ),
-                (config.mysql_database, table),
-            )
-            rows = cursor.fetchall()
-            columns = [{"name": row[0], "type": row[1]} for row in rows]
-            if columns:
-                table_schemas[table] = columns
-            else:
-                missing_tables.append(table)
+        with pooled_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for table in config.allowed_tables:
+                    columns = _table_columns(cursor, table, config.mysql_database)
+                    if columns:
+                        table_schemas[table] = columns
+                    else:
+                        missing_tables.append(table)
+            finally:
+                cursor.close()
     except Exception as exc:
         return {
             "status": "error",
-            "error_message": f"MySQL query failed: {exc}",
+            "error_message": f"Schema query failed: {exc}",
         }
-    finally:
-        if "cursor" in locals():
-            cursor.close()
 
     if not table_schemas:
         return {
@@ -55,6 +70,9 @@ def inspect_table_schema(tool_context: ToolContext) -> Dict[str, object]:
 
     tool_context.state["table_schemas"] = table_schemas
     tool_context.state["allowed_tables"] = list(config.allowed_tables)
+    global _SCHEMA_CACHE
+    with _SCHEMA_LOCK:
+        _SCHEMA_CACHE = (time.monotonic(), list(config.allowed_tables), table_schemas)
 
     response: Dict[str, object] = {
         "status": "success",
@@ -63,3 +81,35 @@ def inspect_table_schema(tool_context: ToolContext) -> Dict[str, object]:
     if missing_tables:
         response["missing_tables"] = missing_tables
     return response
+
+
+def cached_schema_state() -> Optional[Dict[str, object]]:
+    """table_schemas/allowed_tables state from the last inspection in this process.
+
+    None when nothing was loaded yet, the load is older than
+    SCHEMA_CACHE_TTL_SECONDS, or ALLOWED_TABLES changed since.
+    """
+    config = load_config()
+    with _SCHEMA_LOCK:
+        cached = _SCHEMA_CACHE
+    if cached is None:
+        return None
+    loaded_at, allowed_tables, table_schemas = cached
+    if time.monotonic() - loaded_at >= config.schema_cache_ttl_seconds or allowed_tables != config.allowed_tables:
+        return None
+    return {"table_schemas": table_schemas, "allowed_tables": list(allowed_tables)}
+
+
+def load_schema_state() -> Dict[str, object]:
+    """Cached schema state, inspecting the tables when the cache is cold.
+
+    Returns the state keys on success, or inspect_table_schema's error payload.
+    """
+    state = cached_schema_state()
+    if state is not None:
+        return {"status": "success", "state": state}
+    holder = SimpleNamespace(state={})
+    result = inspect_table_schema(holder)
+    if result.get("status") != "success":
+        return result
+    return {"status": "success", "state": dict(holder.state)}
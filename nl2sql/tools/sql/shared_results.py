@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, Optional, TypeVar
+
+from ...utils import metrics
+from ...utils.query_log import record_cache_hit
+
+T = TypeVar("T")
+
+_SHARED: contextvars.ContextVar[Optional["SharedResults"]] = contextvars.ContextVar(
+    "shared_sql_results", default=None
+)
+
+
+class SharedResults:
+    """Single-flight execution of identical SQL inside one scope, e.g. a batch.
+
+    The first caller for a key runs the query; concurrent and later callers
+    with the same key get the same result. Failures are not cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, Future] = {}
+        self.executions = 0
+        self.reused = 0
+
+    def run(self, key: Hashable, execute: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._futures[key] = future
+                self.executions += 1
+            else:
+                self.reused += 1
+        if not owner:
+            metrics.increment("sql_shared_results_reused")
+            record_cache_hit("shared_sql")
+            return future.result()
+        try:
+            result = execute()
+        except BaseException as exc:
+            with self._lock:
+                del self._futures[key]
+            future.set_exception(exc)
+            raise
+        future.set_result(result)
+        return result
+
+
+@contextmanager
+def shared_sql_results(shared: Optional[SharedResults] = None) -> Iterator[SharedResults]:
+    """Deduplicate SQL executed inside the block (and tasks started from it)."""
+    shared = shared or SharedResults()
+    token = _SHARED.set(shared)
+    try:
+        yield shared
+    finally:
+        _SHARED.reset(token)
+
+
+def current_shared_results() -> Optional[SharedResults]:
+    return _SHARED.get()
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from itertools import chain
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from ...config import load_config
+from ...database import abandon_unread_result, execute_template, pooled_connection, snapshot_connection
+from ...results import ColumnarResult, approx_nbytes, get_spill_directory
+from ...results.spill import SpillQuotaExceeded, SpillWriter
+from ...utils import metrics
+from .query_templates import get_template_stats
+from .sql_utils import fingerprint_sql
+
+
+class StatementExecutionError(Exception):
+    """A single statement of a multi-statement query failed."""
+
+    def __init__(self, index: int, statement: str, cause: BaseException) -> None:
+        super().__init__(f"Statement {index + 1} failed: {cause}")
+        self.index = index
+        self.statement = statement
+        self.cause = cause
+
+
+def _read_rows(connection, cursor, statement: str, columns: List[str]) -> ColumnarResult:
+    """Fetch rows in batches; past RESULT_SPILL_THRESHOLD_BYTES they go to a spill file.
+
+    Below the threshold the batches are joined in memory. Once it is crossed,
+    the batches held so far and every later one are written to a columnar spill
+    file and the result is returned as a memory-mapped SpilledResult.
+    """
+    config = load_config()
+    get_spill_directory().maybe_cleanup()
+    batches: List[ColumnarResult] = []
+    held = 0
+    writer = None
+    try:
+        while True:
+            rows = cursor.fetchmany(config.stream_batch_size)
+            if not rows:
+                break
+            batch = ColumnarResult.from_rows(statement, columns, rows)
+            if writer is not None:
+                writer.write(batch)
+                continue
+            batches.append(batch)
+            held += approx_nbytes(batch)
+            if held > config.result_spill_threshold_bytes:
+                writer = SpillWriter(get_spill_directory(), statement, columns)
+                for pending in batches:
+                    writer.write(pending)
+                batches = []
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        abandon_unread_result(connection)
+        raise
+    if writer is not None:
+        return writer.finish()
+    return ColumnarResult.concat(statement, columns, batches)
+
+
+def _execute_and_read(connection, cursor, statement: str, fingerprint) -> ColumnarResult:
+    if load_config().sql_prepared_statements and fingerprint.params:
+        cursor = execute_template(
+            connection, cursor, statement, fingerprint.key, fingerprint.template, fingerprint.params
+        )
+    else:
+        cursor.execute(statement)
+    with_rows = getattr(cursor, "with_rows", False)
+    if with_rows or cursor.description:
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        return _read_rows(connection, cursor, statement, columns)
+    row_count = cursor.rowcount if cursor.rowcount is not None else 0
+    return ColumnarResult.empty(statement, row_count=max(row_count, 0))
+
+
+def _fetch_result_set(connection, cursor, statement: str) -> ColumnarResult:
+    """Run one statement through its fingerprinted template and record per-template stats.
+
+    With SQL_PREPARED_STATEMENTS on, statements with bindable literals execute
+    as prepared templates; the rows may then come from a cached prepared
+    cursor, which stays open for the next execution of the same template.
+    """
+    fingerprint = fingerprint_sql(statement)
+    started = time.perf_counter()
+    try:
+        result = _execute_and_read(connection, cursor, statement, fingerprint)
+    except BaseException:
+        get_template_stats().record(fingerprint, statement, time.perf_counter() - started, 0, error=True)
+        raise
+    get_template_stats().record(fingerprint, statement, time.perf_counter() - started, result.row_count, error=False)
+    return result
+
+
+def _run_on(connection, cursor, statements: List[str]) -> List[ColumnarResult]:
+    result_sets = []
+    for index, statement in enumerate(statements):
+        try:
+            result_sets.append(_fetch_result_set(connection, cursor, statement))
+        except Exception as exc:
+            raise StatementExecutionError(index, statement, exc) from exc
+    return result_sets
+
+
+def _run_statements_on_connection(statements: List[str]) -> List[ColumnarResult]:
+    with pooled_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            return _run_on(connection, cursor, statements)
+        finally:
+            cursor.close()
+
+
+@contextmanager
+def snapshot_statements() -> Iterator[Callable[[List[str]], List[ColumnarResult]]]:
+    """A runner like execute_statements whose calls all read one snapshot.
+
+    Statements run one after another on a single connection inside a
+    read-only transaction (snapshot_connection), so a statement built from an
+    earlier one's result still sees the same data.
+    """
+    with snapshot_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            yield lambda statements: _run_on(connection, cursor, statements)
+        finally:
+            cursor.close()
+
+
+def _run_statement(index: int, statement: str) -> ColumnarResult:
+    try:
+        return _run_statements_on_connection([statement])[0]
+    except StatementExecutionError as exc:
+        raise StatementExecutionError(index, statement, exc.cause) from exc.cause
+    except Exception as exc:
+        raise StatementExecutionError(index, statement, exc) from exc
+
+
+def execute_statements(
+    statements: List[str],
+    max_parallel: int | None = None,
+) -> List[ColumnarResult]:
+    """Run independent read-only statements, in parallel across pooled connections.
+
+    Result sets are returned in statement order. The first failing statement
+    cancels any statements that have not started yet and is re-raised as
+    StatementExecutionError.
+    """
+    if not statements:
+        return []
+    config = load_config()
+    limit = max_parallel or config.sql_max_parallel_statements
+    workers = max(1, min(limit, config.mysql_pool_size, len(statements)))
+    if workers == 1:
+        return _run_statements_on_connection(statements)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nl2sql-sql")
+    try:
+        # Each statement runs in a copy of the caller's context, so the request's
+        # query trace still sees cache hits recorded on worker threads.
+        futures = [
+            executor.submit(contextvars.copy_context().run, _run_statement, index, statement)
+            for index, statement in enumerate(statements)
+        ]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = [future for future in futures if future in done and future.exception()]
+        if failed:
+            for future in futures:
+                future.cancel()
+            raise failed[0].exception()
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _HeldCursor:
+    """A streaming cursor whose unread rows move to a spill file after a deadline.
+
+    A timer fires STREAM_MAX_HOLD_SECONDS after the query starts. If rows are
+    still unread, it fetches them into a SpillWriter and releases the pooled
+    connection, so a slow reader holds a spill file instead of a pool slot. When
+    the spill quota is exhausted the rows spilled so far are read first and the
+    rest stay on the connection.
+    """
+
+    def __init__(self, stack: ExitStack, connection, cursor, statement: str, columns: List[str], size: int) -> None:
+        self._stack = stack
+        self._connection = connection
+        self._cursor = cursor
+        self._statement = statement
+        self._columns = columns
+        self._size = size
+        self._lock = threading.Lock()
+        self._spilled = None
+        self._spilled_batches: Optional[Iterator[ColumnarResult]] = None
+        self._error: Optional[BaseException] = None
+        self._finished = False
+        self._released = False
+        self._timer = None
+        hold_seconds = load_config().stream_max_hold_seconds
+        if hold_seconds > 0:
+            self._timer = threading.Timer(hold_seconds, self._spill_unread)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def next_batch(self) -> Optional[ColumnarResult]:
+        """The next batch, or None once every row has been read."""
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._spilled_batches is not None:
+                batch = next(self._spilled_batches, None)
+                if batch is not None:
+                    return batch
+                self._spilled_batches = None
+            if self._released:
+                return None
+            rows = self._cursor.fetchmany(self._size)
+            if not rows:
+                self._finished = True
+                return None
+            return ColumnarResult.from_rows(self._statement, self._columns, rows)
+
+    def _spill_unread(self) -> None:
+        with self._lock:
+            if self._released or self._finished or self._spilled is not None:
+                return
+            writer = SpillWriter(get_spill_directory(), self._statement, self._columns)
+            batch = None
+            try:
+                while True:
+                    rows = self._cursor.fetchmany(self._size)
+                    if not rows:
+                        self._finished = True
+                        break
+                    batch = ColumnarResult.from_rows(self._statement, self._columns, rows)
+                    writer.write(batch)
+                    batch = None
+            except SpillQuotaExceeded:
+                pass
+            except Exception as exc:
+                writer.abort()
+                self._error = exc
+                return
+            if batch is not None and not writer.row_count:
+                # Quota exhausted before anything was spilled: keep streaming.
+                writer.abort()
+                self._spilled_batches = iter([batch])
+                return
+            self._spilled = writer.finish()
+            self._spilled_batches = self._spilled.iter_batches()
+            if batch is not None:
+                # Quota exhausted: the batch in hand is read after the spilled ones
+                # and the rest stay on the connection.
+                self._spilled_batches = chain(self._spilled_batches, [batch])
+            else:
+                self._release()
+            metrics.increment("stream_connection_spills")
+
+    def _release(self) -> None:
+        self._released = True
+        try:
+            if self._finished:
+                self._cursor.close()
+            else:
+                abandon_unread_result(self._connection)
+        finally:
+            self._stack.close()
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._lock:
+            self._spilled_batches = None
+            if not self._released:
+                self._release()
+        if self._spilled is not None:
+            get_spill_directory().remove(self._spilled.path)
+
+
+def stream_statement(
+    statement: str,
+    batch_size: int | None = None,
+    on_description: Optional[Callable[[Sequence], None]] = None,
+) -> Iterator[ColumnarResult]:
+    """Yield one statement's rows as ColumnarResult batches read with fetchmany.
+
+    At least one batch is always yielded so callers see the columns. The pooled
+    connection is held until the generator is exhausted or closed, or at most
+    STREAM_MAX_HOLD_SECONDS, after which the unread rows are read from a spill
+    file (see _HeldCursor). on_description receives cursor.description (column
+    types) before the first batch.
+    """
+    size = batch_size or load_config().stream_batch_size
+    stack = ExitStack()
+    connection = stack.enter_context(pooled_connection())
+    held = None
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(statement)
+        except BaseException:
+            abandon_unread_result(connection)
+            raise
+        if not cursor.description:
+            row_count = cursor.rowcount if cursor.rowcount is not None else 0
+            cursor.close()
+            stack.close()
+            yield ColumnarResult.empty(statement, row_count=max(row_count, 0))
+            return
+        columns = [desc[0] for desc in cursor.description]
+        held = _HeldCursor(stack, connection, cursor, statement, columns, size)
+        if on_description is not None:
+            on_description(cursor.description)
+        emitted = False
+        while True:
+            batch = held.next_batch()
+            if batch is None:
+                break
+            emitted = True
+            yield batch
+        if not emitted:
+            yield ColumnarResult.from_rows(statement, columns, [])
+    finally:
+        if held is not None:
+            held.close()
+        else:
+            stack.close()
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import NamedTuple, Tuple
 
 import sqlparse
+from sqlparse import tokens as T
+from sqlparse.lexer import tokenize
 
 
 DANGEROUS_SQL_PATTERNS = [
@@ -81,3 +87,126 @@ def _split_sql_statements(sql: str) -> list[str]:
 
 def _strip_sql_comments(sql: str) -> str:
     return sqlparse.format(sql, strip_comments=True)
+
+
+_TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN)\s+([`\"\[]?[\w.]+[`\"\]]?)", re.IGNORECASE)
+_CTE_NAME = re.compile(r"(?:\bWITH|,)\s*(?:RECURSIVE\s+)?([`\"]?\w+[`\"]?)\s+AS\s*\(", re.IGNORECASE)
+# Constructs whose FROM is not a table reference, and string literals.
+_NON_TABLE_FROM = re.compile(
+    r"\b(?:EXTRACT|SUBSTRING|SUBSTR|TRIM|POSITION|OVERLAY)\s*\([^()]*\)|\bDISTINCT\s+FROM\b|'(?:[^']|'')*'",
+    re.IGNORECASE,
+)
+
+
+def _bare_identifier(name: str) -> str:
+    return name.strip("`\"[]").split(".")[-1].strip("`\"[]").lower()
+
+
+def find_unknown_tables(sql: str, known_tables: list[str]) -> list[str]:
+    """Tables referenced after FROM/JOIN that are neither known nor CTE names."""
+    cleaned = _NON_TABLE_FROM.sub(" ", _strip_sql_comments(sql))
+    known = {_bare_identifier(table) for table in known_tables}
+    known.update(_bare_identifier(name) for name in _CTE_NAME.findall(cleaned))
+    unknown = []
+    for reference in _TABLE_REFERENCE.findall(cleaned):
+        name = _bare_identifier(reference)
+        if name not in known and name not in unknown:
+            unknown.append(name)
+    return unknown
+
+
+class SqlFingerprint(NamedTuple):
+    """A statement split into a literal-free template and the values bound to it."""
+
+    key: str
+    template: str
+    params: Tuple[object, ...]
+
+
+# Literals become parameters only in these clauses; elsewhere they can name result
+# columns (SELECT list) or change meaning (ORDER BY 1, GROUP BY 1).
+_PARAMETER_CLAUSES = frozenset({"WHERE", "HAVING", "ON", "LIMIT", "OFFSET"})
+_CLAUSE_KEYWORDS = _PARAMETER_CLAUSES | frozenset({"SELECT", "FROM", "GROUP BY", "ORDER BY", "UNION", "UNION ALL"})
+# Typed literals (DATE '2024-01-01') have no parameter form.
+_TYPED_LITERAL_PREFIXES = frozenset({"DATE", "TIME", "TIMESTAMP"})
+# Keywords after which "(" only groups an expression or list; after any other
+# word it opens call arguments or type arguments, whose literals stay inline.
+_GROUPING_KEYWORDS = frozenset(
+    {"WHERE", "HAVING", "ON", "AND", "OR", "NOT", "IN", "BETWEEN", "WHEN", "THEN", "ELSE", "EXISTS", "ANY", "ALL", "SOME"}
+)
+
+
+def _literal_value(ttype, value: str) -> object | None:
+    """The bound value for a literal token, or None when it must stay inline."""
+    if ttype in T.Literal.String.Single:
+        body = value[1:-1]
+        if "\\" in body:
+            return None
+        return body.replace("''", "'")
+    if ttype in T.Literal.Number.Integer:
+        return int(value)
+    if ttype in T.Literal.Number.Float:
+        return Decimal(value)
+    return None
+
+
+@lru_cache(maxsize=1024)
+def fingerprint_sql(statement: str) -> SqlFingerprint:
+    """Replace literals in WHERE/HAVING/ON/LIMIT with ? and return them as parameters.
+
+    Statements that differ only in those literals (or keyword case and spacing)
+    share a key. Comments are dropped and whitespace collapsed; literals in the SELECT list,
+    ORDER BY/GROUP BY, function and type arguments such as SUBSTRING(name, 1, 3)
+    or DECIMAL(10, 2), typed literals and strings with backslash escapes are
+    kept inline. Integers bind as int
+    and other numbers as Decimal, so comparisons keep exact semantics.
+    """
+    parts = []
+    shape = []
+    params = []
+    clause = ""
+    clause_stack = []
+    previous = None
+    previous_significant = None
+    for ttype, value in tokenize(statement):
+        if ttype in T.Comment:
+            continue
+        if ttype in T.Whitespace or ttype in T.Newline:
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            previous = (ttype, value)
+            continue
+        upper = value.upper()
+        if ttype in T.Keyword and upper in _CLAUSE_KEYWORDS:
+            clause = upper
+        elif ttype in T.Punctuation and value == "(":
+            inline = previous_significant is not None and (
+                previous_significant[0] in T.Name
+                or (previous_significant[0] in T.Keyword and previous_significant[1].upper() not in _GROUPING_KEYWORDS)
+            )
+            clause_stack.append(clause)
+            if inline:
+                clause = ""
+        elif ttype in T.Punctuation and value == ")" and clause_stack:
+            clause = clause_stack.pop()
+        literal = None
+        if clause in _PARAMETER_CLAUSES and ttype in T.Literal:
+            adjacent_name = previous is not None and previous[0] in T.Name
+            typed = previous_significant is not None and previous_significant[1].upper() in _TYPED_LITERAL_PREFIXES
+            if not adjacent_name and not typed:
+                literal = _literal_value(ttype, value.lstrip("+-") if ttype in T.Literal.Number else value)
+        if literal is None:
+            parts.append(value)
+            shape.append(upper if ttype in T.Keyword else value)
+        else:
+            if value[0] == "-":
+                parts.append("-")
+                shape.append("-")
+            parts.append("?")
+            shape.append("?")
+            params.append(literal)
+        previous = previous_significant = (ttype, value)
+    template = "".join(parts).strip()
+    # The key ignores keyword case and spacing, so equivalent templates share it.
+    key = hashlib.sha1(" ".join(shape).encode("utf-8")).hexdigest()[:16]
+    return SqlFingerprint(key, template, tuple(params))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+_LOCK = threading.Lock()
+_COUNTERS: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+_SUMMARIES: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], list] = {}
+
+
+def _key(name: str, labels: Dict[str, object]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def increment(name: str, value: float = 1.0, **labels: object) -> None:
+    """Add value to a process-wide counter identified by name and labels."""
+    with _LOCK:
+        _COUNTERS[_key(name, labels)] += value
+
+
+def observe(name: str, value: float, **labels: object) -> None:
+    """Record one observation (count, sum, min, max) for a summary metric."""
+    key = _key(name, labels)
+    with _LOCK:
+        summary = _SUMMARIES.get(key)
+        if summary is None:
+            _SUMMARIES[key] = [1, value, value, value]
+        else:
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = min(summary[2], value)
+            summary[3] = max(summary[3], value)
+
+
+def _series_name(key: Tuple[str, Tuple[Tuple[str, str], ...]]) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{label}={value}" for label, value in labels) + "}"
+
+
+def snapshot() -> Dict[str, Dict[str, object]]:
+    """Counters and summaries keyed as name{label=value,...}."""
+    with _LOCK:
+        counters = {_series_name(key): value for key, value in sorted(_COUNTERS.items())}
+        summaries = {
+            _series_name(key): {
+                "count": count,
+                "sum": total,
+                "mean": total / count,
+                "min": low,
+                "max": high,
+            }
+            for key, (count, total, low, high) in sorted(_SUMMARIES.items())
+        }
+    return {"counters": counters, "summaries": summaries}
+
+
+def reset() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _SUMMARIES.clear()
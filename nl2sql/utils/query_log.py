@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from ..config import load_config
+from . import metrics
+
+_TRACE: contextvars.ContextVar[Optional["QueryTrace"]] = contextvars.ContextVar("query_trace", default=None)
+
+# Longest question, SQL or error text kept per record.
+_MAX_TEXT = 8192
+_JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def _clip(text: Optional[str]) -> Optional[str]:
+    if text is None or len(text) <= _MAX_TEXT:
+        return text
+    return text[:_MAX_TEXT]
+
+
+class QueryTrace:
+    """What one served request did: stages, SQL statements, row counts and cache hits.
+
+    Filled in by the code the request passes through (see current_query_trace)
+    and written to the query log when the request's query_trace block exits.
+    """
+
+    def __init__(self, kind: str, question: Optional[str] = None, session_id: Optional[str] = None) -> None:
+        self.kind = kind
+        self.question = question
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.status = "success"
+        self.error: Optional[str] = None
+        self.sql: Optional[str] = None
+        self.row_count: Optional[int] = None
+        self.fields: Dict[str, object] = {}
+        self.stages: Dict[str, float] = {}
+        self.stage_calls: Counter = Counter()
+        self.cache_hits: Counter = Counter()
+        self.statements: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+            self.stage_calls[name] += 1
+
+    def add_statement(self, fingerprint: str, statement: str, rows: Optional[int], failed: bool = False) -> None:
+        entry: Dict[str, object] = {"fingerprint": fingerprint, "sql": _clip(statement), "rows": rows}
+        if failed:
+            entry["failed"] = True
+        with self._lock:
+            self.statements.append(entry)
+
+    def cache_hit(self, name: str) -> None:
+        with self._lock:
+            self.cache_hits[name] += 1
+
+    def to_record(self) -> Dict[str, object]:
+        with self._lock:
+            record: Dict[str, object] = {
+                "ts": self.started_at,
+                "kind": self.kind,
+                "status": self.status,
+                "total_ms": (time.perf_counter() - self._started) * 1000,
+                "question": _clip(self.question),
+                "session_id": self.session_id,
+                "sql": _clip(self.sql),
+                "row_count": self.row_count,
+                "statements": list(self.statements),
+                "stages": dict(self.stages),
+                "stage_calls": dict(self.stage_calls),
+                # A stage entered again in the same request is a retry.
+                "retries": sum(count - 1 for count in self.stage_calls.values() if count > 1),
+                "cache_hits": dict(self.cache_hits),
+            }
+            if self.error is not None:
+                record["error"] = _clip(self.error)
+            record.update(self.fields)
+        return record
+
+
+def current_query_trace() -> Optional[QueryTrace]:
+    return _TRACE.get()
+
+
+def record_cache_hit(name: str) -> None:
+    """Count a cache hit against the request being traced, if any."""
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.cache_hit(name)
+
+
+@contextmanager
+def query_trace(kind: str, question: Optional[str] = None, session_id: Optional[str] = None) -> Iterator[QueryTrace]:
+    """Trace the block as one served request and append it to the query log on exit.
+
+    An exception marks the record as failed and is re-raised. Without
+    QUERY_LOG_PATH the trace is still collected but nothing is written.
+    """
+    trace = QueryTrace(kind, question, session_id)
+    token = _TRACE.set(trace)
+    try:
+        yield trace
+    except BaseException as exc:
+        trace.status = "error"
+        if trace.error is None:
+            trace.error = str(getattr(exc, "detail", None) or exc) or type(exc).__name__
+        raise
+    finally:
+        _TRACE.reset(token)
+        log = get_query_log()
+        if log is not None:
+            log.append(trace.to_record())
+
+
+def _encode(record: Dict[str, object]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class QueryLog:
+    """Append-only log of served requests, written by a background thread in batches.
+
+    append() never blocks a request: records queue up (at most max_queued,
+    later ones are dropped and counted) and are written every flush_seconds or
+    batch_size records. Paths ending in .jsonl/.ndjson get one JSON object per
+    line; anything else is a SQLite file (WAL mode, readable while written).
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS query_log ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, kind TEXT NOT NULL, "
+        "status TEXT NOT NULL, question TEXT, sql TEXT, total_ms REAL, record TEXT NOT NULL)"
+    )
+
+    def __init__(self, path: str, batch_size: int, flush_seconds: float, max_queued: int) -> None:
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.jsonl = path.lower().endswith(_JSONL_SUFFIXES)
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, object]]]" = queue.Queue(maxsize=max(1, max_queued))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="nl2sql-query-log", daemon=True)
+                    self._thread.start()
+
+    def append(self, record: Dict[str, object]) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.increment("query_log_dropped")
+
+    def _open_sqlite(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(self._SCHEMA)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_query_log_ts ON query_log (ts)")
+        connection.commit()
+        return connection
+
+    def _write(self, connection: Optional[sqlite3.Connection], batch: List[Dict[str, object]]) -> None:
+        if self.jsonl:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write("".join(_encode(record) + "\n" for record in batch))
+        else:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO query_log (ts, kind, status, question, sql, total_ms, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            record["ts"],
+                            record["kind"],
+                            record["status"],
+                            record.get("question"),
+                            record.get("sql"),
+                            record.get("total_ms"),
+                            _encode(record),
+                        )
+                        for record in batch
+                    ],
+                )
+        self.written += len(batch)
+        metrics.increment("query_log_written", len(batch))
+
+    def _run(self) -> None:
+        connection = None if self.jsonl else self._open_sqlite()
+        stopping = False
+        try:
+            while not stopping:
+                batch: List[Dict[str, object]] = []
+                deadline = time.monotonic() + self.flush_seconds
+                while len(batch) < self.batch_size:
+                    try:
+                        record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if record is None:
+                        stopping = True
+                        break
+                    batch.append(record)
+                if not batch:
+                    continue
+                try:
+                    self._write(connection, batch)
+                except (OSError, sqlite3.Error):
+                    self.dropped += len(batch)
+                    metrics.increment("query_log_dropped", len(batch))
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued records and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "format": "jsonl" if self.jsonl else "sqlite",
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+def read_query_log(path: str, kinds: Optional[List[str]] = None, limit: Optional[int] = None) -> Iterator[Dict[str, object]]:
+    """Records of a query log file in the order they were written.
+
+    Works on either format while the server is still writing; a partially
+    written last JSONL line is skipped.
+    """
+    emitted = 0
+    if path.lower().endswith(_JSONL_SUFFIXES):
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if kinds and record.get("kind") not in kinds:
+                    continue
+                yield record
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+        return
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        sql = "SELECT record FROM query_log"
+        params: List[object] = []
+        if kinds:
+            sql += f" WHERE kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for (record,) in connection.execute(sql, params):
+            yield json.loads(record)
+    finally:
+        connection.close()
+
+
+def hot_statements(path: str, limit: int, max_records: int = 100000) -> List[str]:
+    """The most frequently executed successful statements in a query log, one per template.
+
+    Reads the newest max_records records; each template is represented by its
+    most recent statement.
+    """
+    counts: Counter = Counter()
+    latest: Dict[str, str] = {}
+    for record in deque(read_query_log(path), maxlen=max_records):
+        if record.get("status") != "success":
+            continue
+        for statement in record.get("statements") or []:
+            fingerprint = statement.get("fingerprint")
+            if not fingerprint or not statement.get("sql") or statement.get("failed"):
+                continue
+            counts[fingerprint] += 1
+            latest[fingerprint] = statement["sql"]
+    return [latest[fingerprint] for fingerprint, _ in counts.most_common(limit)]
+
+
+_LOG: Optional[QueryLog] = None
+_LOG_LOCK = threading.Lock()
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """The process-wide query log, or None when QUERY_LOG_PATH is not set."""
+    global _LOG
+    if _LOG is not None:
+        return _LOG
+    config = load_config()
+    if not config.query_log_path:
+        return None
+    with _LOG_LOCK:
+        if _LOG is None:
+            _LOG = QueryLog(
+                config.query_log_path,
+                batch_size=config.query_log_batch_size,
+                flush_seconds=config.query_log_flush_seconds,
+                max_queued=config.query_log_max_queued,
+            )
+        return _LOG